@@ -1,4 +1,10 @@
+import csv
+import os
+import tempfile
 from datetime import datetime as _datetime
+from typing import Iterable, Iterator, Sequence, Union
+
+import numpy as np
 
 import timeutil
 
@@ -20,8 +26,21 @@ def from_datetime(dt, *_):
     return (dt.astimezone(timeutil.UTC) if dt.tzinfo else dt).strftime("""'%Y-%m-%d %H:%M:%S.%f'""")
 
 
+def to_datetime(value: Union[str, bytes]) -> _datetime:
+    """DATETIME(6) converter
+
+    datetime.fromisoformat parses 'YYYY-MM-DD HH:MM:SS[.ffffff]' in C, dateutil is only used for anything else.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode('ascii')
+    try:
+        return _datetime.fromisoformat(value).replace(tzinfo=timeutil.UTC)
+    except ValueError:
+        return timeutil.to_datetime(value)
+
+
 _mysql_converters.conversions[_datetime] = from_datetime
-_mysql_converters.conversions[_mysql.FIELD_TYPE.DATETIME] = timeutil.to_datetime
+_mysql_converters.conversions[_mysql.FIELD_TYPE.DATETIME] = to_datetime
 
 
 def connect(*, user: str = 'root', passwd: str = 'root', host: str = 'localhost', db: str = '',
@@ -29,5 +48,72 @@ def connect(*, user: str = 'root', passwd: str = 'root', host: str = 'localhost'
     return _mysql.connect(user=user, passwd=passwd, host=host, db=db, **kwargs)
 
 
+def iter_batches(conn: _mysql_connections.Connection, query: str, args=None, *,
+                 dtype: np.dtype, batch_size: int = 10000) -> Iterator[np.ndarray]:
+    """stream query results by a server side cursor as numpy structured arrays of up to batch_size rows
+
+    Columns are matched to dtype fields by position. datetime64 fields receive naive UTC values.
+    """
+    dtype = np.dtype(dtype)
+    c = conn.cursor(_mysql_cursors.SSCursor)
+    try:
+        c.execute(query, args)
+        while True:
+            rows = c.fetchmany(batch_size)
+            if not rows:
+                break
+            a = np.empty(len(rows), dtype=dtype)
+            for name, column in zip(dtype.names, zip(*rows)):
+                if dtype[name].kind == 'M':
+                    column = [None if v is None else
+                              (v.astimezone(timeutil.UTC) if v.tzinfo else v).replace(tzinfo=None)
+                              for v in column]
+                a[name] = column
+            yield a
+    finally:
+        c.close()
+
+
+def insert_many(conn: _mysql_connections.Connection, table: str, columns: Sequence[str],
+                rows: Iterable[Sequence], *, ignore: bool = True) -> int:
+    """insert rows by executemany, which the driver sends as multi-row INSERT statements"""
+    query = 'INSERT {}INTO {}({}) VALUES ({})'.format('IGNORE ' if ignore else '', table, ','.join(columns),
+                                                      ','.join(['%s'] * len(columns)))
+    with conn.cursor() as c:
+        n = c.executemany(query, list(rows))
+    conn.commit()
+    return n
+
+
+def load_data(conn: _mysql_connections.Connection, table: str, columns: Sequence[str],
+              rows: Iterable[Sequence], *, ignore: bool = True) -> int:
+    """insert rows by LOAD DATA LOCAL INFILE via a temporary csv file
+
+    conn must be opened with local_infile enabled. None is written as NULL and datetime as UTC.
+    """
+
+    def convert(v):
+        if v is None:
+            return '\\N'
+        if isinstance(v, _datetime):
+            return from_datetime(v).strip("'")
+        return v
+
+    fd, path = tempfile.mkstemp(prefix='mysqlutil_', suffix='.csv')
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            csv.writer(f, lineterminator='\n').writerows([convert(v) for v in row] for row in rows)
+        with conn.cursor() as c:
+            n = c.execute("LOAD DATA LOCAL INFILE %s {}INTO TABLE {} "
+                          "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                          "LINES TERMINATED BY '\\n' ({})".format('IGNORE ' if ignore else '', table,
+                                                                  ','.join(columns)),
+                          (path,))
+        conn.commit()
+        return n
+    finally:
+        os.remove(path)
+
+
 cursors = _mysql_cursors
 Warning = _mysql.Warning
@@ -23,4 +23,4 @@ if __name__ == '__main__':
           license='MIT',
           packages=['mysqlutil'],
           package_dir={'mysqlutil': '.'},
-          install_requires=('pymysql',), )
+          install_requires=('numpy', 'pymysql',), )
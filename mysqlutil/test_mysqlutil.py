@@ -1,6 +1,11 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
 import timeutil
 
-from . import connect
+from . import connect, insert_many, iter_batches, load_data, to_datetime
+
 
 def test_mysqlutil():
     conn = connect()
@@ -16,3 +21,32 @@ def test_mysqlutil():
             print('#', dt)
         finally:
             c.execute('DROP DATABASE testdb')
+
+
+def test_to_datetime():
+    dt = to_datetime('2016-10-22 05:00:00.123456')
+    assert dt == timeutil.UTC.localize(datetime(2016, 10, 22, 5, 0, 0, 123456))
+    assert to_datetime(b'2016-10-22 05:00:00') == timeutil.UTC.localize(datetime(2016, 10, 22, 5))
+
+
+def test_iter_batches():
+    conn = connect(local_infile=True)
+    try:
+        with conn.cursor() as c:
+            c.execute('CREATE DATABASE testdb')
+            c.execute('USE testdb')
+            c.execute('CREATE TABLE t(time DATETIME(6) PRIMARY KEY, bid FLOAT, ask FLOAT)')
+        now = timeutil.utc_now()
+        rows = [(now + timedelta(seconds=i), 100 + i, 101 + i) for i in range(25)]
+        assert insert_many(conn, 't', ('time', 'bid', 'ask'), rows[:10]) == 10
+        assert load_data(conn, 't', ('time', 'bid', 'ask'), rows[10:]) == 15
+
+        dtype = [('time', 'datetime64[us]'), ('bid', 'f8'), ('ask', 'f8')]
+        batches = list(iter_batches(conn, 'SELECT time, bid, ask FROM t ORDER BY time', dtype=dtype, batch_size=10))
+        assert [len(x) for x in batches] == [10, 10, 5]
+        a = np.concatenate(batches)
+        assert a['time'][0] == np.datetime64(now.replace(tzinfo=None))
+        assert list(a['bid']) == [x[1] for x in rows]
+    finally:
+        with conn.cursor() as c:
+            c.execute('DROP DATABASE testdb')
@@ -0,0 +1,7 @@
+from .glyphcache import GlyphCache
+from .npclassifier import NumpyClassifier
+from .regioncache import RegionCache
+from .segmentation import binarize, trim_margin, crop_first, glyph_spans, glyph_array, read_fields
+
+__all__ = ['GlyphCache', 'NumpyClassifier', 'RegionCache',
+           'binarize', 'trim_margin', 'crop_first', 'glyph_spans', 'glyph_array', 'read_fields']
@@ -0,0 +1,108 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class GlyphCache:
+    """LRU cache of (char, width) by the content of a binarized glyph
+
+    Prices are drawn by a few fixed fonts, so nearly every glyph repeats bit for bit and the nets only have to run
+    on misses. Keys are the md5 of the float32 glyph, the same keys as the train data, so labelled glyphs can seed
+    the cache. Entries are results of the current model, clear() them after training.
+    """
+    FILE = 'glyph.pickle'
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # type: Dict[str, Tuple[str, int]]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(arr: np.ndarray) -> str:
+        return hashlib.md5(np.ascontiguousarray(arr, dtype=np.float32)).hexdigest()
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        n = self.hits + self.misses
+        return self.hits / n if n else None
+
+    def get(self, key: str) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, char: str, width: int):
+        with self._lock:
+            self._entries[key] = (char, int(width))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def lookup(self, arr: np.ndarray, classify: Callable[[np.ndarray], Tuple[str, int]]) -> Tuple[str, int]:
+        """(char, width) of arr from the cache, by classify(arr) on a miss"""
+        key = self.key(arr)
+        value = self.get(key)
+        if value is None:
+            value = classify(arr)
+            self.put(key, *value)
+        return value
+
+    def lookup_many(self, arrs: List[np.ndarray],
+                    classify_many: Callable[[np.ndarray], List[Tuple[str, int]]]) -> List[Tuple[str, int]]:
+        """lookup() of arrs with one classify_many() call on the distinct misses"""
+        keys = [self.key(arr) for arr in arrs]
+        values = [self.get(key) for key in keys]
+        misses = {}  # type: Dict[str, int]
+        for i, value in enumerate(values):
+            if value is None:
+                misses.setdefault(keys[i], i)
+        if misses:
+            classified = dict(zip(misses, classify_many(np.stack([arrs[i] for i in misses.values()]))))
+            for key, value in classified.items():
+                self.put(key, *value)
+            values = [classified[key] if value is None else value for key, value in zip(keys, values)]
+        return values
+
+    def seed(self, train_data: dict):
+        """put labelled glyphs of train data {md5: (arr, char, width)}"""
+        for key, (_, char, width) in train_data.items():
+            self.put(key, char, width)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def load(self, file_path: str) -> 'GlyphCache':
+        try:
+            with open(file_path, 'rb') as f:
+                items = pickle.load(f)
+            with self._lock:
+                self._entries = OrderedDict(items[-self.maxsize:])
+            logging.info('{} glyphs loaded from {}'.format(len(self._entries), os.path.abspath(file_path)))
+        except FileNotFoundError:
+            pass
+        return self
+
+    def save(self, file_path: str):
+        with self._lock:
+            items = list(self._entries.items())
+        with open(file_path, 'wb') as f:
+            pickle.dump(items, f)
+        logging.info('{} glyphs saved to {}'.format(len(items), os.path.abspath(file_path)))
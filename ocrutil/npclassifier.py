@@ -0,0 +1,52 @@
+import logging
+import os
+from typing import List, Sequence
+
+import numpy as np
+
+
+class NumpyClassifier:
+    """inference of a dense relu classifier by numpy only
+
+    Weights exported from a trained Keras or chainer model are saved as .npz, so nodes only recognizing glyphs need
+    no deep learning framework. Softmax is left out since it does not change the argmax.
+    """
+
+    def __init__(self, weights: Sequence[np.ndarray], biases: Sequence[np.ndarray]):
+        """weights: [(n_in, n_out)], biases: [(n_out,)] of each layer"""
+        assert len(weights) == len(biases)
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+
+    @property
+    def n_units(self) -> List[int]:
+        return [self.weights[0].shape[0]] + [w.shape[1] for w in self.weights]
+
+    def calculate(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float32).reshape(-1, self.weights[0].shape[0])
+        for w, b in zip(self.weights[:-1], self.biases[:-1]):
+            x = np.maximum(x @ w + b, 0)
+        return x @ self.weights[-1] + self.biases[-1]
+
+    def classify(self, x: np.ndarray) -> np.ndarray:
+        return self.calculate(x).argmax(axis=1)
+
+    def classify_one(self, x: np.ndarray):
+        return self.classify(x)[0]
+
+    def save(self, file_path: str):
+        arrays = {}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays['W{}'.format(i)] = w
+            arrays['b{}'.format(i)] = b
+        with open(file_path, 'wb') as f:
+            np.savez(f, **arrays)
+        logging.info('model exported to {}'.format(os.path.abspath(file_path)))
+
+    @classmethod
+    def load(cls, file_path: str) -> 'NumpyClassifier':
+        with np.load(file_path) as arrays:
+            n = len(arrays.files) // 2
+            model = cls([arrays['W{}'.format(i)] for i in range(n)], [arrays['b{}'.format(i)] for i in range(n)])
+        logging.info('model loaded from {}'.format(os.path.abspath(file_path)))
+        return model
@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+LABELS = 'labels.json'
+# metrics of compare()
+COMPARED = ('frame_accuracy', 'field_accuracy', 'char_accuracy', 'frames_per_sec', 'glyphs_per_sec')
+
+# png file, RGB frame, expected rows [{key: text}]
+Sample = Tuple[str, np.ndarray, List[dict]]
+
+
+def load_corpus(dir_path: str) -> Dict[str, List[Sample]]:
+    """{broker: samples} of a directory per broker holding png files and their labels in LABELS
+
+    LABELS maps a png file name to the rows [{key: text}] a decoder should read from it. Samples are sorted by file
+    name, so every run decodes the same frames in the same order.
+    """
+    corpus = {}
+    for name in sorted(os.listdir(dir_path)):
+        labels_path = os.path.join(dir_path, name, LABELS)
+        if not os.path.isfile(labels_path):
+            continue
+        with open(labels_path, encoding='utf-8') as f:
+            labels = json.load(f)
+        samples = []
+        for png_name in sorted(labels):
+            with Image.open(os.path.join(dir_path, name, png_name)) as img:
+                samples.append((png_name, np.asarray(img.convert('RGB')), labels[png_name]))
+        corpus[name] = samples
+    return corpus
+
+
+def score_field(expected: str, actual: Optional[str]) -> Tuple[int, int]:
+    """(correct, total) chars of a field compared position by position"""
+    actual = actual or ''
+    return sum(a == b for a, b in zip(expected, actual)), max(len(expected), len(actual))
+
+
+def latency_summary(latencies: List[float]) -> dict:
+    """exact percentiles in seconds, corpora are small enough to keep every latency"""
+    if not latencies:
+        return {'count': 0, 'mean': None, 'p50': None, 'p99': None, 'max': None}
+    a = np.asarray(latencies)
+    return {'count': len(a), 'mean': float(a.mean()), 'p50': float(np.percentile(a, 50)),
+            'p99': float(np.percentile(a, 99)), 'max': float(a.max())}
+
+
+def bench(samples: List[Sample], decode: Callable[[np.ndarray], List[dict]], *, repeat: int = 1,
+          max_errors: int = 20) -> dict:
+    """accuracy and throughput of decode over samples
+
+    The first pass is scored and also reported as 'cold', since the glyph caches of a decoder fill in it. Later
+    passes only add latencies of warm caches.
+    """
+    latencies = []
+    fields = correct_fields = correct_frames = correct_chars = total_chars = glyphs = 0
+    errors = []
+    for i in range(repeat):
+        for png_name, frame, expected in samples:
+            start = time.perf_counter()
+            rows = decode(frame)
+            latencies.append(time.perf_counter() - start)
+            glyphs += sum(len(expected_row.get(k) or '') for expected_row in expected for k in expected_row)
+            if i:
+                continue
+            frame_ok = len(rows) == len(expected)
+            for n, expected_row in enumerate(expected):
+                row = rows[n] if n < len(rows) else {}
+                for k, text in expected_row.items():
+                    fields += 1
+                    correct, total = score_field(text, row.get(k))
+                    correct_chars += correct
+                    total_chars += total
+                    if row.get(k) == text:
+                        correct_fields += 1
+                    else:
+                        frame_ok = False
+                        if len(errors) < max_errors:
+                            errors.append({'file': png_name, 'row': n, 'key': k, 'expected': text,
+                                           'actual': row.get(k)})
+            correct_frames += frame_ok
+    elapsed = sum(latencies)
+    return {
+        'frames': len(samples),
+        'fields': fields,
+        'frame_accuracy': correct_frames / len(samples) if samples else None,
+        'field_accuracy': correct_fields / fields if fields else None,
+        'char_accuracy': correct_chars / total_chars if total_chars else None,
+        'frames_per_sec': len(latencies) / elapsed if elapsed else None,
+        'glyphs_per_sec': glyphs / elapsed if elapsed else None,
+        'cold': latency_summary(latencies[:len(samples)]),
+        'latency': latency_summary(latencies),
+        'errors': errors,
+    }
+
+
+def run(corpus: Dict[str, List[Sample]], make_decode: Callable[[str], Callable[[np.ndarray], List[dict]]], *,
+        repeat: int = 1) -> dict:
+    """bench each broker of corpus with a fresh decoder of make_decode(broker)"""
+    brokers = {}
+    for name, samples in corpus.items():
+        brokers[name] = bench(samples, make_decode(name), repeat=repeat)
+        logging.info('{} {}'.format(name, {k: v for k, v in brokers[name].items() if k != 'errors'}))
+    return {'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'repeat': repeat, 'brokers': brokers}
+
+
+def compare(baseline: dict, result: dict) -> Dict[str, dict]:
+    """{broker: {metric: (baseline, result)}} of the brokers of both runs, p50/p99 per frame included"""
+    diff = {}
+    for name, r in result['brokers'].items():
+        b = baseline['brokers'].get(name)
+        if b is None:
+            continue
+        d = {k: (b[k], r[k]) for k in COMPARED}
+        for p in ('p50', 'p99'):
+            d[p] = (b['latency'][p], r['latency'][p])
+        diff[name] = d
+    return diff
+
+
+def save(result: dict, file_path: str):
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False, sort_keys=True)
+    logging.info('benchmark saved to {}'.format(os.path.abspath(file_path)))
+
+
+def load(file_path: str) -> dict:
+    with open(file_path, encoding='utf-8') as f:
+        return json.load(f)
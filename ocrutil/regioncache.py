@@ -0,0 +1,49 @@
+import hashlib
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+Rect = Tuple[int, int, int, int]
+
+
+class RegionCache:
+    """last decoded value of capture rects by the md5 of their pixels
+
+    Most rects of a rate board do not change between frames, so only the changed ones have to be recognized again.
+    """
+
+    def __init__(self):
+        self._entries = {}  # type: Dict[Rect, Tuple[bytes, Any]]
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def digest(frame: np.ndarray, rect: Rect) -> bytes:
+        left, top, right, bottom = rect
+        return hashlib.md5(np.ascontiguousarray(frame[top:bottom, left:right])).digest()
+
+    def decode(self, frame: np.ndarray, rects: Sequence[Rect], decode_many: Callable[[List[Rect]], List[Any]]) -> list:
+        """values of rects of frame, decode_many(changed rects) is called on the changed ones only"""
+        digests = [self.digest(frame, rect) for rect in rects]
+        values = []
+        changed = []  # type: List[int]
+        for i, (rect, digest) in enumerate(zip(rects, digests)):
+            entry = self._entries.get(rect)
+            if entry is not None and entry[0] == digest:
+                values.append(entry[1])
+            else:
+                values.append(None)
+                changed.append(i)
+        self.hits += len(rects) - len(changed)
+        self.misses += len(changed)
+        if changed:
+            for i, value in zip(changed, decode_many([rects[i] for i in changed])):
+                values[i] = value
+                self._entries[rects[i]] = (digests[i], value)
+        return values
+
+    def clear(self):
+        self._entries.clear()
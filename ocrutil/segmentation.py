@@ -0,0 +1,81 @@
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .glyphcache import GlyphCache
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """255 on pixels on the other side of the mean from the top left background, 0 elsewhere"""
+    mean = gray.mean()
+    fg = gray > mean if gray[0, 0] <= mean else gray <= mean
+    return fg.astype(np.float32) * 255
+
+
+def trim_margin(a: np.ndarray, left=True, right=True, up=True, down=True) -> np.ndarray:
+    top, _left, bottom, _right = 0, 0, a.shape[0], a.shape[1]
+    if left or right:
+        cols = np.flatnonzero(a.any(axis=0))
+        if len(cols):
+            _left = cols[0] if left else 0
+            _right = cols[-1] + 1 if right else a.shape[1]
+    if up or down:
+        rows = np.flatnonzero(a.any(axis=1))
+        if len(rows):
+            top = rows[0] if up else 0
+            bottom = rows[-1] + 1 if down else a.shape[0]
+    return a[top:bottom, _left:_right]
+
+
+def crop_first(field: np.ndarray, width: int, height: int) -> np.ndarray:
+    """height x width input of the glyph at the left of field, blank from its first blank column"""
+    a = np.zeros((height, width), dtype=np.float32)
+    part = field[:height, :width]
+    a[:part.shape[0], :part.shape[1]] = part
+    blank = np.flatnonzero(~a.any(axis=0))
+    if len(blank):
+        a[:, blank[0]:] = 0
+    return a
+
+
+def glyph_spans(field: np.ndarray) -> List[Tuple[int, int]]:
+    """[(start, end)] of the runs of non blank columns of a binarized field"""
+    cols = np.concatenate(([False], field.any(axis=0), [False]))
+    edges = np.flatnonzero(cols[1:] != cols[:-1])
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def glyph_array(field: np.ndarray, start: int, end: int, width: int, height: int) -> np.ndarray:
+    """height x width input of the glyph at start, blank after its end like the glyphs peeled one by one"""
+    return crop_first(field[:, start:end], width, height)
+
+
+def read_fields(fields: Sequence[np.ndarray], classify_many: Callable[[np.ndarray], List[Tuple[str, int]]], *,
+                width: int, height: int, cache: GlyphCache = None) -> List[Optional[str]]:
+    """read binarized fields in two phases, segmentation by column projection then one batched classification
+
+    classify_many takes an (n, height, width) array and returns [(char, width)]. Fields whose glyphs touch, i.e.
+    a predicted width shorter than its span, are None and left to the width net glyph by glyph.
+    """
+    spans = [glyph_spans(field) for field in fields]
+    glyphs = [glyph_array(field, start, end, width, height)
+              for field, field_spans in zip(fields, spans) for start, end in field_spans]
+    if not glyphs:
+        return ['' for _ in fields]
+    if cache is None:
+        results = classify_many(np.stack(glyphs))
+    else:
+        results = cache.lookup_many(glyphs, classify_many)
+    texts = []
+    i = 0
+    for field_spans in spans:
+        s = ''
+        for start, end in field_spans:
+            c, w = results[i]
+            i += 1
+            if s is not None and w >= end - start:
+                s += c
+            else:
+                s = None
+        texts.append(s)
+    return texts
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+
+from .glyphcache import GlyphCache
+
+
+def test_glyph_cache(tmpdir):
+    calls = []
+
+    def classify(arr):
+        calls.append(arr)
+        return str(int(arr.sum()) // 255), 3
+
+    glyphs = [np.zeros((16, 16), dtype=np.float32) for _ in range(3)]
+    for i, glyph in enumerate(glyphs):
+        glyph[:i + 1, 0] = 255
+
+    cache = GlyphCache(maxsize=2)
+    assert cache.hit_rate is None
+    for _ in range(10):
+        assert cache.lookup(glyphs[0], classify) == ('1', 3)
+        assert cache.lookup(glyphs[1], classify) == ('2', 3)
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (18, 2)
+    assert cache.hit_rate == 0.9
+
+    # least recently used glyphs[0] is evicted
+    cache.lookup(glyphs[2], classify)
+    assert len(cache) == 2
+    assert cache.get(cache.key(glyphs[0])) is None
+    assert cache.get(cache.key(glyphs[1])) == ('2', 3)
+
+    # same keys as the train data
+    cache.seed({cache.key(glyphs[0]): (glyphs[0].flatten(), 'x', 5)})
+    assert cache.lookup(glyphs[0], classify) == ('x', 5)
+
+    file_path = os.path.join(str(tmpdir), GlyphCache.FILE)
+    cache.save(file_path)
+    loaded = GlyphCache().load(file_path)
+    assert len(loaded) == 2
+    assert loaded.lookup(glyphs[0].flatten(), classify) == ('x', 5)
+    assert GlyphCache().load(os.path.join(str(tmpdir), 'none')).get('') is None
@@ -0,0 +1,38 @@
+import os
+import time
+
+import numpy as np
+
+from .npclassifier import NumpyClassifier
+
+
+def test_numpy_classifier(tmpdir):
+    rs = np.random.RandomState(0)
+    n_units = (256, 100, 100, 128)
+    weights = [rs.randn(n1, n2).astype(np.float32) for n1, n2 in zip(n_units[:-1], n_units[1:])]
+    biases = [rs.randn(n).astype(np.float32) for n in n_units[1:]]
+    model = NumpyClassifier(weights, biases)
+    assert model.n_units == list(n_units)
+
+    x = rs.rand(50, 16, 16).astype(np.float32)
+    h = x.reshape(50, -1)
+    for i, (w, b) in enumerate(zip(weights, biases)):
+        h = h @ w + b
+        if i < len(weights) - 1:
+            h[h < 0] = 0
+    expected = h.argmax(axis=1)
+    assert np.array_equal(model.classify(x), expected)
+    assert model.classify_one(x[3].flatten()) == expected[3]
+
+    file_path = os.path.join(str(tmpdir), 'char.npz')
+    model.save(file_path)
+    loaded = NumpyClassifier.load(file_path)
+    assert np.array_equal(loaded.classify(x), expected)
+
+    start = time.time()
+    for arr in x:
+        model.classify_one(arr)
+    one = (time.time() - start) / len(x)
+    start = time.time()
+    model.classify(x)
+    print('#', 'classify_one 1:', one, 'classify 1:', (time.time() - start) / len(x))
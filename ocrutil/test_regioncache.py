@@ -0,0 +1,27 @@
+import numpy as np
+
+from .regioncache import RegionCache
+
+
+def test_region_cache():
+    frame = np.zeros((20, 40), dtype=np.uint8)
+    rects = [(0, 0, 10, 10), (10, 0, 20, 10), (0, 10, 10, 20)]
+    decoded = []
+
+    def decode_many(changed):
+        decoded.append(changed)
+        return ['{}:{}'.format(rect[:2], frame[rect[1]:rect[3], rect[0]:rect[2]].sum()) for rect in changed]
+
+    cache = RegionCache()
+    assert cache.decode(frame, rects, decode_many) == ['(0, 0):0', '(10, 0):0', '(0, 10):0']
+    assert decoded == [rects]
+
+    # only the changed rect is decoded again
+    frame = frame.copy()
+    frame[12, 5] = 7
+    frame[5, 30] = 1
+    assert cache.decode(frame, rects, decode_many) == ['(0, 0):0', '(10, 0):0', '(0, 10):7']
+    assert decoded[1:] == [[(0, 10, 10, 20)]]
+    assert cache.decode(frame, rects, decode_many)[2] == '(0, 10):7'
+    assert len(decoded) == 2
+    assert (cache.hits, cache.misses) == (5, 4)
@@ -0,0 +1,133 @@
+import time
+from typing import List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .glyphcache import GlyphCache
+from .segmentation import binarize, glyph_spans, glyph_array, read_fields, trim_margin
+
+# 3x3 bitmaps of a tiny font, '.' is one column wide
+FONT = {
+    '1': ['010', '010', '010'],
+    '2': ['110', '010', '011'],
+    '7': ['111', '001', '001'],
+    '.': ['0', '0', '1'],
+}
+
+
+def render(text: str, gap: int = 1) -> np.ndarray:
+    cols = [np.zeros((3, 0), dtype=np.float32)]
+    for i, c in enumerate(text):
+        bitmap = np.array([[int(px) * 255 for px in row] for row in FONT[c]], dtype=np.float32)
+        cols.extend([np.zeros((3, gap if i else 0), dtype=np.float32), bitmap[:, bitmap.any(axis=0)]])
+    return np.concatenate(cols, axis=1)
+
+
+class FontClassifier:
+    def __init__(self):
+        self.glyphs = {GlyphCache.key(glyph_array(render(c), 0, 3, 4, 4)): c for c in FONT}
+        self.calls = 0
+
+    def classify_many(self, arrs: np.ndarray):
+        self.calls += 1
+        results = []
+        for arr in arrs:
+            c = self.glyphs.get(GlyphCache.key(arr))
+            # the width of a known glyph and its gap, of the leading one of touching glyphs otherwise
+            results.append((c, int(arr.any(axis=0).sum()) + 1) if c else ('?', 2))
+        return results
+
+
+def test_glyph_spans():
+    field = render('1.27')
+    assert glyph_spans(field) == [(0, 1), (2, 3), (4, 7), (8, 11)]
+    assert glyph_spans(np.zeros((3, 5))) == []
+    a = glyph_array(field, 4, 7, 4, 4)
+    assert a.shape == (4, 4)
+    assert not a[:, 3:].any() and not a[3:].any()
+
+
+def test_read_fields():
+    classifier = FontClassifier()
+    fields = [render(s) for s in ['1.27', '72.1', '', '11.2'] * 5] + [np.zeros((3, 2), dtype=np.float32)]
+    # a single batch for a whole board
+    texts = read_fields(fields, classifier.classify_many, width=4, height=4)
+    assert texts == ['1.27', '72.1', '', '11.2'] * 5 + ['']
+    assert classifier.calls == 1
+
+    # only distinct misses are classified
+    cache = GlyphCache()
+    calls = []
+    texts = read_fields(fields, lambda arrs: calls.append(len(arrs)) or classifier.classify_many(arrs),
+                        width=4, height=4, cache=cache)
+    assert texts[:4] == ['1.27', '72.1', '', '11.2']
+    assert calls == [4]
+    read_fields(fields, classifier.classify_many, width=4, height=4, cache=cache)
+    assert classifier.calls == 2
+
+    # touching glyphs are left to the width net
+    assert read_fields([render('17', gap=0), render('12')], classifier.classify_many, width=4, height=4) == \
+        [None, '12']
+
+
+def render_board(rows: int = 20) -> Tuple[Image.Image, List[Tuple[int, int, int, int]]]:
+    img = Image.new('RGB', (240, rows * 16 + 8), (16, 16, 32))
+    draw = ImageDraw.Draw(img)
+    boxes = []
+    for i in range(rows):
+        top = 4 + i * 16
+        for left, text in ((4, 'USD/JPY'), (80, '{:.3f}'.format(110 + i * 0.137)), (160, '{:.3f}'.format(110.01 + i))):
+            draw.text((left + 2, top + 2), text, fill=(240, 240, 200))
+            boxes.append((left, top, left + 72, top + 15))
+    return img, boxes
+
+
+def pil_gen_arrays(img: Image.Image, box: Tuple[int, int, int, int]):
+    """glyph inputs by the PIL pipeline that preceded binarize()/trim_margin()/crop_first()"""
+    img = img.crop(box).convert('L')
+    colors = img.getcolors()
+    avg = sum(count * color for count, color in colors) / (img.size[0] * img.size[1])
+    if img.getpixel((0, 0)) <= avg:
+        img = img.point(lambda px: 0 if px <= avg else 255)
+    else:
+        img = img.point(lambda px: 0 if px > avg else 255)
+    img = img.crop(img.getbbox())
+    while True:
+        bbox = img.getbbox()
+        if bbox is None:
+            break
+        arr = np.asarray(img.crop((bbox[0], 0, bbox[0] + 16, 16)), dtype=np.float32)
+        arr.flags.writeable = True
+        for j, col_sum in enumerate(arr.sum(axis=0).flatten()):
+            if not col_sum:
+                arr[:, j:] = 0
+                break
+        yield arr
+        img = img.crop((bbox[0] + int(arr.any(axis=0).sum()), 0, img.size[0], img.size[1]))
+
+
+def test_preprocess_benchmark():
+    img, boxes = render_board()
+
+    def numpy_arrays():
+        gray = np.asarray(img.convert('L'))
+        glyphs = []
+        for left, top, right, bottom in boxes:
+            field = trim_margin(binarize(gray[top:bottom, left:right]))
+            glyphs.extend(glyph_array(field, start, end, 16, 16) for start, end in glyph_spans(field))
+        return glyphs
+
+    def pil_arrays():
+        return [arr for box in boxes for arr in pil_gen_arrays(img, box)]
+
+    glyphs = numpy_arrays()
+    assert len(glyphs) > 20 * 15
+    pil = pil_arrays()
+    assert len(glyphs) == len(pil)
+    assert all(np.array_equal(a, b) for a, b in zip(glyphs, pil))
+    for name, func in (('pil', pil_arrays), ('numpy', numpy_arrays)):
+        start = time.time()
+        for _ in range(10):
+            func()
+        print('#', name, '1:', (time.time() - start) / 10)
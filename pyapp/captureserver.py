@@ -7,6 +7,7 @@ import sys
 import time
 from typing import List, Tuple, Dict, Iterator
 
+import numpy as np
 from PIL import Image
 from docopt import docopt
 from gevent.threading import Lock
@@ -22,6 +23,7 @@ try:
 except ImportError:
     pass
 
+from ocrutil import RegionCache, ocrbench
 from recognizer import Recognizer
 
 
@@ -40,6 +42,8 @@ class CaptureServer(Slave):
         self.recognizer = Recognizer(name=name, in_width=16, in_height=16, n_units=100, n_out=128,
                                      filter_mode=filter_mode,
                                      chrome=chrome)
+        self.regions = RegionCache()
+        self._png_index = 0
         self._lock = Lock()
 
     def __getattr__(self, item):
@@ -102,8 +106,11 @@ class CaptureServer(Slave):
             return self.capture_window(self.last_handle)
         if os.name == 'posix':
             try:
-                files = glob.glob(os.path.join(self.dir_path, '*.png'))
-                return Image.open(random.choice(files))
+                # in turn, so runs without windows are reproducible
+                files = sorted(glob.glob(os.path.join(self.dir_path, '*.png')))
+                f = files[self._png_index % len(files)]
+                self._png_index += 1
+                return Image.open(f)
             except Exception as e:
                 self.logger.exception(str(e))
                 self.last_handle = None
@@ -143,16 +150,25 @@ class CaptureServer(Slave):
             self.last_handle = self.find_window(self.title_re)
         if not self.last_handle:
             return []
-        img = self.capture()
+        # one grayscale conversion for all fields
+        img = self.capture().convert('L')
+        rects = [rect for rect_d in self.capture_rects for rect in rect_d.values()]
+        # unchanged rects keep their last prices
+        texts = iter(self.regions.decode(np.asarray(img), rects,
+                                         lambda changed: self.recognize_many([img.crop(rect) for rect in changed])))
         results = []
         for instrument, rect_d in zip(self.instruments, self.capture_rects):
-            d = {}
-            for label, rect in rect_d.items():
-                d[label] = self.recognize(img.crop(rect))
+            d = {label: next(texts) for label in rect_d}
             results.append(dict(service=self.service, instrument=instrument or d['instrument'],
                                 bid=float(d['bid']), ask=float(d['ask'])))
         return results
 
+    def decode(self, frame: np.ndarray) -> List[dict]:
+        """rows {label: text} of capture_rects of an RGB frame by the recognizer alone, for benchmarks"""
+        img = Image.fromarray(frame).convert('L')
+        texts = iter(self.recognize_many([img.crop(rect) for rect_d in self.capture_rects for rect in rect_d.values()]))
+        return [{label: next(texts) for label in rect_d} for rect_d in self.capture_rects]
+
     def get_accounts(self, do_refresh: bool = False) -> List[dict]:
         return []
 
@@ -172,6 +188,9 @@ def main():
       --snap-interval SEC  [default: 1]
       --chrome
       --title TITLE_RE
+      --bench CORPUS_DIR  benchmark the recognizers of the brokers of CORPUS_DIR instead of NAME
+      --bench-repeat N  [default: 3]
+      --bench-output FILE  [default: ocrbench.json]
     """.format(f=sys.argv[0]))
     name = args['NAME']
     l = args['--master'].split(':')
@@ -198,6 +217,17 @@ def main():
                 time.sleep(snap_interval)
         return
 
+    if args['--bench']:
+        def make_decode(service: str):
+            bench_server = CaptureServer(service, bind_address, master_address=master_address, chrome=chrome,
+                                         **server_options(service, chrome=chrome))
+            bench_server.load_model()
+            return bench_server.decode
+
+        result = ocrbench.run(ocrbench.load_corpus(args['--bench']), make_decode, repeat=int(args['--bench-repeat']))
+        ocrbench.save(result, args['--bench-output'])
+        return
+
     server = CaptureServer(name, bind_address, master_address=master_address, chrome=chrome,
                            **server_options(name, chrome=chrome))
     if snap_n > 0:
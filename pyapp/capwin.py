@@ -23,6 +23,7 @@ from docopt import docopt
 import selepy
 import timeutil
 from chainerutil import TrainableMixin
+from ocrutil import RegionCache, segmentation
 
 
 def open_file(*paths, mode='rb'):
@@ -41,32 +42,7 @@ class ImageFilter:
 
     @classmethod
     def trim_margin(cls, a: np.ndarray, left=True, right=True, up=True, down=True):
-        _left, top, _right, bottom = 0, 0, a.shape[1], a.shape[0]
-        if left or right:
-            cols = a.sum(axis=0).flatten()
-            if left:
-                for i, col in enumerate(cols):
-                    if col:
-                        _left = i
-                        break
-            if right:
-                for i, col in enumerate(reversed(cols)):
-                    if col:
-                        _right = len(cols) - i
-                        break
-        if up or down:
-            rows = a.sum(axis=1).flatten()
-            if up:
-                for i, row in enumerate(rows):
-                    if row:
-                        top = i
-                        break
-            if down:
-                for i, row in enumerate(reversed(rows)):
-                    if row:
-                        bottom = len(rows) - i
-                        break
-        return a[top:bottom, _left:_right]
+        return segmentation.trim_margin(a, left=left, right=right, up=up, down=down)
 
     def _filter0(self, img: Image):
         if img.mode != 'L':
@@ -215,15 +191,7 @@ class Recognizer:
         return img
 
     def crop_first(self, arr: np.ndarray) -> np.ndarray:
-        arr = arr[:self.HEIGHT, :self.WIDTH]
-        a = np.zeros((self.HEIGHT, self.WIDTH), dtype=np.float32)
-        a[:arr.shape[0], :arr.shape[1]] = arr
-        col_sums = a.sum(axis=0).flatten()
-        for j, col_sum in enumerate(col_sums):
-            if not col_sum:
-                a[:, j:] = ImageFilter.BG
-                break
-        return a
+        return segmentation.crop_first(arr, self.WIDTH, self.HEIGHT)
 
     def recognize(self, img: Image) -> str:
         img = self.adjust_image(img)
@@ -351,6 +319,7 @@ class Snapper:
         self.logger = logging.getLogger(self.__class__.__name__)
         self.row_labels = []
         self.image_filter = image_filter or ImageFilter()
+        self.regions = RegionCache()
 
     def load_file(self, f_name=None):
         if not f_name:
@@ -397,15 +366,21 @@ class Snapper:
     def recognize(self):
         if not self.img:
             return {}
+        def recognize_many(rects):
+            return [self.recognizer.recognize(Image.fromarray(self.image_filter.filter(self.img.crop(rect))))
+                    for rect in rects]
+
         try:
             results = []
+            rects = [rect for row in self.rect_matrix for _, rect in zip(self.labels, row)]
+            # unchanged rects keep their last values
+            values = iter(self.regions.decode(np.asarray(self.img), rects, recognize_many))
             for i, row in enumerate(self.rect_matrix):
                 d = OrderedDict()
                 if self.row_labels:
                     d['instrument'] = self.row_labels[i]
-                for label, rect in zip(self.labels, row):
-                    img = Image.fromarray(self.image_filter.filter(self.img.crop(rect)))
-                    d[label] = self.recognizer.recognize(img)
+                for label, _ in zip(self.labels, row):
+                    d[label] = next(values)
                 results.append(d)
         except RecognitionError as e:
             self.logger.exception('{}'.format(e.img))
@@ -1,12 +1,133 @@
+import csv
+import os
+import re
 import sqlite3
 import sys
-from datetime import datetime
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from typing import List, Optional, Tuple
 
+import numpy as np
 from docopt import docopt
 
 import mysql
 import timeutil
 
+CHECKPOINT_TABLE = '_loaddb_checkpoint'
+
+# naive sqlite times were written in JST (Asia/Tokyo has no DST)
+NAIVE_OFFSET = timedelta(hours=9)
+
+_OFFSET_RE = re.compile(r'(?:Z|([+-])(\d\d):?(\d\d))$')
+
+
+def parse_offset(s: str) -> Tuple[str, timedelta]:
+    """return (suffix, utcoffset) of the tz suffix of s"""
+    m = _OFFSET_RE.search(s)
+    if not m:
+        return '', NAIVE_OFFSET
+    if not m.group(1):
+        return m.group(0), timedelta(0)
+    offset = timedelta(hours=int(m.group(2)), minutes=int(m.group(3)))
+    return m.group(0), (offset if m.group(1) == '+' else -offset)
+
+
+def to_utc_strings(times: List[str]) -> np.ndarray:
+    """convert sqlite time strings to mysql DATETIME(6) strings in UTC
+
+    A batch written by one recorder shares one format, so the common case is converted with numpy at once.
+    Mixed batches fall back to timeutil.parse_datetime per row. Naive times are JST on both paths.
+    """
+    a = np.asarray(times, dtype=str)
+    suffix, offset = parse_offset(times[0])
+    width = len(times[0])
+    if (np.char.str_len(a) == width).all() and (not suffix or np.char.endswith(a, suffix).all()):
+        try:
+            dt = a.astype('U{}'.format(width - len(suffix))).astype('datetime64[us]')
+            dt -= np.timedelta64(offset)
+            return np.char.replace(np.datetime_as_string(dt, unit='us'), 'T', ' ')
+        except ValueError:
+            pass
+
+    def convert(x: str) -> str:
+        # not to_datetime, which takes naive times as UTC
+        dt = timeutil.parse_datetime(x)
+        if not dt.tzinfo:
+            dt = timeutil.TOKYO.localize(dt)
+        return mysql.from_datetime(dt).strip("'")
+
+    return np.array([convert(x) for x in times])
+
+
+def create_tables(db: str, tables: List[str]):
+    conn = mysql.connect(user='root', passwd='root')
+    with conn as c:
+        c.execute('CREATE DATABASE IF NOT EXISTS {}'.format(db))
+        c.execute('USE {}'.format(db))
+        c.execute("""CREATE TABLE IF NOT EXISTS {}(
+            file VARCHAR(255),
+            tbl VARCHAR(64),
+            last_time VARCHAR(64),
+            n BIGINT,
+            PRIMARY KEY (file, tbl)
+            )""".format(CHECKPOINT_TABLE))
+        for table in tables:
+            c.execute("""CREATE TABLE IF NOT EXISTS {}(
+                time DATETIME(6) PRIMARY KEY,
+                bid FLOAT,
+                ask FLOAT
+                )""".format(table))
+    conn.commit()
+    conn.close()
+
+
+def load_checkpoint(c, f_name: str, table: str) -> Tuple[Optional[str], int]:
+    c.execute('SELECT last_time, n FROM {} WHERE file=%s AND tbl=%s'.format(CHECKPOINT_TABLE), (f_name, table))
+    row = c.fetchone()
+    return (row[0], row[1]) if row else (None, 0)
+
+
+def load_table(db: str, f_name: str, table: str, batch_size: int) -> int:
+    """copy one sqlite table into mysql with LOAD DATA, resuming from the last committed batch"""
+    conn = mysql.connect(user='root', passwd='root', db=db, local_infile=1)
+    sqlite_conn = sqlite3.connect(f_name)
+    try:
+        c = conn.cursor()
+        c.execute('SET sql_log_bin=OFF')
+        dt_from, n = load_checkpoint(c, f_name, table)
+
+        query = "SELECT time, IFNULL(bid, '\\N'), IFNULL(ask, '\\N') FROM {}".format(table)
+        if dt_from is None:
+            r = sqlite_conn.execute(query + ' ORDER BY time ASC')
+        else:
+            r = sqlite_conn.execute(query + ' WHERE ? < time ORDER BY time ASC', (dt_from,))
+
+        fd, path = tempfile.mkstemp(prefix='loaddb_', suffix='.csv')
+        os.close(fd)
+        try:
+            while True:
+                results = r.fetchmany(batch_size)
+                if not results:
+                    break
+                times, bids, asks = zip(*results)
+                with open(path, 'w', newline='') as f:
+                    csv.writer(f, lineterminator='\n').writerows(zip(to_utc_strings(times), bids, asks))
+                c.execute("LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE {} "
+                          "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                          "LINES TERMINATED BY '\\n' (time, bid, ask)".format(table), (path,))
+                n += len(results)
+                c.execute('REPLACE INTO {} VALUES (%s, %s, %s, %s)'.format(CHECKPOINT_TABLE),
+                          (f_name, table, times[-1], n))
+                conn.commit()
+                print('#{}'.format(n), f_name, table, times[-1])
+        finally:
+            os.remove(path)
+        return n
+    finally:
+        sqlite_conn.close()
+        conn.close()
+
 
 def main():
     args = docopt("""
@@ -15,61 +136,30 @@ def main():
 
     Options:
       --database DB  mysql database[default: ratedb]
-      --limit LIMIT  [default: 1000]
+      --limit LIMIT  rows per LOAD DATA batch[default: 100000]
+      --workers N  parallel table loaders[default: 4]
     """.format(f=sys.argv[0]))
-    files = args['FILES']
+    files = [os.path.abspath(f) for f in args['FILES']]
     db = args['--database']
     limit = int(args['--limit'])
+    workers = int(args['--workers'])
 
-    conn = mysql.connect(user='root', passwd='root')  # , cursorclass=mysql.cursors.SSCursor)
-
-    for f_i, f_name in enumerate(files):
+    jobs = []
+    for f_name in files:
         sqlite_conn = sqlite3.connect(f_name)
         r = sqlite_conn.execute('SELECT name FROM sqlite_master WHERE type="table"')
         tables = list(sorted(set([x[0].lower() for x in r.fetchall()])))
+        sqlite_conn.close()
+        jobs.extend((f_name, table) for table in tables)
+
+    create_tables(db, sorted(set(table for _, table in jobs)))
 
-        for t_i, table in enumerate(sorted(tables)):
-
-            with conn as c:
-                c.execute('CREATE DATABASE IF NOT EXISTS {}'.format(db))
-                c.execute('USE {}'.format(db))
-                c.execute("""CREATE TABLE IF NOT EXISTS {}(
-                    time DATETIME(6) PRIMARY KEY,
-                    bid FLOAT,
-                    ask FLOAT
-                    )""".format(table))
-
-            def gen_data(table):
-                dt_from = datetime.min
-                while True:
-                    r = sqlite_conn.execute(
-                        'SELECT time, bid, ask FROM {} WHERE ? < time ORDER BY time ASC LIMIT {}'.format(table, limit),
-                        (dt_from,))
-                    results = r.fetchall()
-                    if not results:
-                        break
-                    yield results
-                    dt_from = results[-1][0]
-
-            with conn as c:
-                c.execute('SET sql_log_bin=OFF')
-                i = 0
-                for results in gen_data(table):
-                    N = len(results)
-
-                    def dt_convert(x):
-                        dt = timeutil.to_datetime(x[0])
-                        if not dt.tzinfo:
-                            dt = dt.replace(tzinfo=timeutil.TOKYO)
-                        return (dt,) + x[1:]
-
-                    flatten_results = [flatten for inner in results for flatten in dt_convert(inner)]
-                    c.execute('INSERT IGNORE INTO {} VALUES {}'.format(table, ','.join(['(%s,%s,%s)'] * N)),
-                              flatten_results)
-                    i += N
-                    print('# {}/{} {}/{} #{}'.format(f_i + 1, len(files), t_i + 1, len(tables), i), f_name, table,
-                          flatten_results[-3:])
-                    conn.commit()
+    with ProcessPoolExecutor(workers) as executor:
+        futures = {executor.submit(load_table, db, f_name, table, limit): (f_name, table)
+                   for f_name, table in jobs}
+        for i, future in enumerate(as_completed(futures), 1):
+            f_name, table = futures[future]
+            print('# {}/{} done'.format(i, len(jobs)), f_name, table, future.result())
 
 
 if __name__ == '__main__':
@@ -13,7 +13,6 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import QBrush
 from PyQt5.QtGui import QCloseEvent
 from PyQt5.QtGui import QResizeEvent
-from PyQt5.QtMultimedia import QSound
 from PyQt5.QtWidgets import *
 from docopt import docopt
 from gsocketpool.pool import Pool
@@ -239,6 +238,8 @@ class SoundPlayer:
         q = self.q_sounds.get(name)
         finished = False
         if not q:
+            # QtMultimedia loads its backends, only GUIs playing sounds pay for it
+            from PyQt5.QtMultimedia import QSound
             self.q_sounds[name] = q = QSound(sound['file'])
             finished = True
         if q.isFinished() or finished:
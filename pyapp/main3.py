@@ -15,7 +15,6 @@ import gevent
 from PyQt5.QtCore import *
 from PyQt5.QtGui import QBrush
 from PyQt5.QtGui import QCloseEvent
-from PyQt5.QtMultimedia import QSound
 from PyQt5.QtWidgets import *
 from docopt import docopt
 from gsocketpool.pool import Pool
@@ -475,6 +474,8 @@ class SoundPlayer(ConfigurableMixin, QWidget):
         q = self.q_sounds.get(name)
         finished = False
         if not q:
+            # QtMultimedia loads its backends, only GUIs playing sounds pay for it
+            from PyQt5.QtMultimedia import QSound
             self.q_sounds[name] = q = QSound(sound['file'])
             finished = True
         if q.isFinished() or finished:
@@ -4,18 +4,15 @@ import os
 import pickle
 import sys
 from pprint import pprint
-from typing import Iterator
+from typing import Iterator, List, Tuple
 
-import chainer
-import chainer.functions as F
-import chainer.links as L
 import numpy as np
 from PIL import Image
 from docopt import docopt
 
 import env
 import timeutil
-from chainerutil import TrainableMixin
+from ocrutil import GlyphCache, NumpyClassifier, segmentation
 
 
 def open_file(*paths, mode='rb'):
@@ -34,32 +31,7 @@ class ImageFilter:
 
     @classmethod
     def trim_margin(cls, a: np.ndarray, left=True, right=True, up=True, down=True):
-        _left, top, _right, bottom = 0, 0, a.shape[1], a.shape[0]
-        if left or right:
-            cols = a.sum(axis=0).flatten()
-            if left:
-                for i, col in enumerate(cols):
-                    if col:
-                        _left = i
-                        break
-            if right:
-                for i, col in enumerate(reversed(cols)):
-                    if col:
-                        _right = len(cols) - i
-                        break
-        if up or down:
-            rows = a.sum(axis=1).flatten()
-            if up:
-                for i, row in enumerate(rows):
-                    if row:
-                        top = i
-                        break
-            if down:
-                for i, row in enumerate(reversed(rows)):
-                    if row:
-                        bottom = len(rows) - i
-                        break
-        return a[top:bottom, _left:_right]
+        return segmentation.trim_margin(a, left=left, right=right, up=up, down=down)
 
     def _filter0(self, img: Image):
         if img.mode != 'L':
@@ -155,64 +127,22 @@ class RecognitionError(Exception):
 
 
 class Recognizer:
-    class ListNetwork(TrainableMixin, chainer.ChainList):
-        def __init__(self, n_in, n_units, n_out):
-            super().__init__(
-                L.Linear(n_in, n_units),
-                L.Linear(n_units, n_units),
-                L.Linear(n_units, n_out),
-            )
-            self.cache = {}
-
-        def __call__(self, x):
-            for i in range(len(self) - 1):
-                x = F.relu(self[i](x))
-            return self[-1](x)
-
-        def calc(self, arr: np.ndarray) -> np.int32:
-            md5 = hashlib.md5(arr).hexdigest()
-            value = self.cache.get(md5)
-            if value is None:
-                value = np.argmax(self(arr).data)
-                self.cache[md5] = value
-            return value
-
-    class NameNetwork(TrainableMixin, chainer.Chain):
-        def __init__(self, n_in, n_units, n_out):
-            super().__init__(
-                l1=L.Linear(n_in, n_units),
-                l2=L.Linear(n_units, n_units),
-                l3=L.Linear(n_units, n_out),
-            )
-            self.cache = {}
-
-        def __call__(self, x):
-            h1 = F.relu(self.l1(x))
-            h2 = F.relu(self.l2(h1))
-            return self.l3(h2)
-
-        def calc(self, arr: np.ndarray) -> np.int32:
-            md5 = hashlib.md5(arr).hexdigest()
-            value = self.cache.get(md5)
-            if value is None:
-                value = np.argmax(self(arr).data)
-                self.cache[md5] = value
-            return value
-
-    Network = NameNetwork
-
     def __init__(self, *, name=None, in_width: int, in_height: int, n_units: int, n_out: int, filter_mode: int = 0,
                  chrome: bool = False):
         self.name = name
         self.logger = logging.getLogger(name or self.__class__.__name__)
         self.in_width = in_width
         self.in_height = in_height
-        n_in = in_width * in_height
-        self.width_recognizer = Recognizer.Network(n_in, n_units, n_out)
-        self.char_recognizer = Recognizer.Network(n_in, n_units, n_out)
+        self._net_units = (in_width * in_height, n_units, n_out)
+        # chainer nets, built on first use by training or serialization
+        self._nets = None
+        self._model_path = None
+        # inference by numpy on the weights of the nets
+        self.char_classifier = self.width_classifier = None  # type: NumpyClassifier
         self.train_data = {}
         self.image_filter = ImageFilter(mode=filter_mode)
         self.chrome = chrome
+        self.glyphs = GlyphCache()
         print('#', self.dir_path)
 
     @property
@@ -258,12 +188,30 @@ class Recognizer:
             pickle.dump(self.train_data, f)
             self.logger.info('train_data saved to {}'.format(f_name))
 
+    @property
+    def nets(self):
+        """(char, width) chainer nets, chainer is imported here rather than with this module"""
+        if self._nets is None:
+            from recognizernet import NameNetwork
+            self._nets = NameNetwork(*self._net_units), NameNetwork(*self._net_units)
+            if self._model_path:
+                self._load_nets(self._model_path)
+        return self._nets
+
+    @property
+    def char_recognizer(self):
+        return self.nets[0]
+
+    @property
+    def width_recognizer(self):
+        return self.nets[1]
+
     def serialize(self, serializer):
         self.char_recognizer.serialize(serializer)
         self.width_recognizer.serialize(serializer)
 
-    def load_model(self, f_name=None):
-        f_name = os.path.join(self.dir_path, f_name or 'model')
+    def _load_nets(self, f_name: str):
+        import chainer
 
         def load(model, f):
             try:
@@ -275,7 +223,25 @@ class Recognizer:
         load(self.char_recognizer, f_name + '.char.npz')
         load(self.width_recognizer, f_name + '.width.npz')
 
+    def load_model(self, f_name=None):
+        f_name = os.path.join(self.dir_path, f_name or 'model')
+        try:
+            # the exported weights recognize without chainer
+            char_classifier = NumpyClassifier.load(f_name + '.char.mlp.npz')
+            width_classifier = NumpyClassifier.load(f_name + '.width.mlp.npz')
+        except FileNotFoundError:
+            self._load_nets(f_name)
+            self.export_nets()
+        else:
+            self.char_classifier, self.width_classifier = char_classifier, width_classifier
+            # nets are loaded again on first use
+            self._nets = None
+            self._model_path = f_name
+        self.glyphs.clear()
+        self.glyphs.load(os.path.join(self.dir_path, GlyphCache.FILE))
+
     def save_model(self, f_name=None):
+        import chainer
         f_name = os.path.join(self.dir_path, f_name or 'model')
 
         def save(model, f):
@@ -290,6 +256,18 @@ class Recognizer:
         timestamp = timeutil.jst_now().strftime('%Y%m%dT%H%M%S')
         save(self.char_recognizer, f_name + '.char.npz' + '.' + timestamp)
         save(self.width_recognizer, f_name + '.width.npz' + '.' + timestamp)
+        self.char_classifier.save(f_name + '.char.mlp.npz')
+        self.width_classifier.save(f_name + '.width.mlp.npz')
+        self.glyphs.save(os.path.join(self.dir_path, GlyphCache.FILE))
+
+    @staticmethod
+    def to_numpy(net: 'chainer.Link') -> NumpyClassifier:
+        links = [link for _, link in sorted(net.namedlinks(skipself=True))]
+        return NumpyClassifier([link.W.data.T for link in links], [link.b.data for link in links])
+
+    def export_nets(self):
+        self.char_classifier = self.to_numpy(self.char_recognizer)
+        self.width_classifier = self.to_numpy(self.width_recognizer)
 
     def adjust_image(self, img: Image) -> Image:
         orig_img = img
@@ -311,15 +289,27 @@ class Recognizer:
         return img
 
     def crop_first(self, arr: np.ndarray) -> np.ndarray:
-        arr = arr[:self.in_height, :self.in_width]
-        a = np.zeros((self.in_height, self.in_width), dtype=np.float32)
-        a[:arr.shape[0], :arr.shape[1]] = arr
-        col_sums = a.sum(axis=0).flatten()
-        for j, col_sum in enumerate(col_sums):
-            if not col_sum:
-                a[:, j:] = ImageFilter.BG
-                break
-        return a
+        return segmentation.crop_first(arr, self.in_width, self.in_height)
+
+    def classify(self, a: np.ndarray) -> Tuple[str, int]:
+        return self.classify_many(a[np.newaxis])[0]
+
+    def classify_many(self, arrs: np.ndarray) -> List[Tuple[str, int]]:
+        if self.char_classifier is None:
+            # no model loaded, the untrained nets
+            self.export_nets()
+        x = arrs.reshape(len(arrs), -1)
+        chars = self.char_classifier.classify(x)
+        widths = self.width_classifier.classify(x)
+        return [(chr(int(c)), int(w)) for c, w in zip(chars, widths)]
+
+    def recognize_many(self, imgs: List[Image.Image]) -> List[str]:
+        """recognize() of all fields of a board by one batched forward pass"""
+        fields = [np.asarray(self.adjust_image(img), dtype=np.float32) for img in imgs]
+        texts = segmentation.read_fields(fields, self.classify_many, width=self.in_width, height=self.in_height,
+                            cache=self.glyphs)
+        # touching glyphs are split by the width net
+        return [self.recognize(img) if s is None else s for img, s in zip(imgs, texts)]
 
     def recognize(self, img: Image) -> str:
         img = self.adjust_image(img)
@@ -327,11 +317,10 @@ class Recognizer:
         s = ''
         while arr.shape[1] > 2:
             a = self.crop_first(arr)
-            width = self.width_recognizer.calc(a.reshape(1, -1))
+            c, width = self.glyphs.lookup(a, self.classify)
             if not width:
                 raise RecognitionError('Recoginition Error', img)
-            c_index = self.char_recognizer.calc(a.reshape(1, -1))
-            s += chr(int(c_index))
+            s += c
             arr = ImageFilter().trim_margin(arr[:, width:], up=False, right=False, down=False)
         return s
 
@@ -461,6 +450,10 @@ class Recognizer:
         pprint('width_data len {}, char_data len {}'.format(len(width_data), len(char_data)))
         self.width_recognizer.train_classifier(width_data * data_multiple, width_data[:], epoch=epoch)
         self.char_recognizer.train_classifier(char_data * data_multiple, char_data[:], epoch=epoch)
+        self.export_nets()
+        # results of the old model
+        self.glyphs.clear()
+        self.glyphs.seed(self.train_data)
 
 
 def main():
@@ -0,0 +1,54 @@
+import hashlib
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+
+from chainerutil import TrainableMixin
+
+
+class ListNetwork(TrainableMixin, chainer.ChainList):
+    def __init__(self, n_in, n_units, n_out):
+        super().__init__(
+            L.Linear(n_in, n_units),
+            L.Linear(n_units, n_units),
+            L.Linear(n_units, n_out),
+        )
+        self.cache = {}
+
+    def __call__(self, x):
+        for i in range(len(self) - 1):
+            x = F.relu(self[i](x))
+        return self[-1](x)
+
+    def calc(self, arr: np.ndarray) -> np.int32:
+        md5 = hashlib.md5(arr).hexdigest()
+        value = self.cache.get(md5)
+        if value is None:
+            value = np.argmax(self(arr).data)
+            self.cache[md5] = value
+        return value
+
+
+class NameNetwork(TrainableMixin, chainer.Chain):
+    def __init__(self, n_in, n_units, n_out):
+        super().__init__(
+            l1=L.Linear(n_in, n_units),
+            l2=L.Linear(n_units, n_units),
+            l3=L.Linear(n_units, n_out),
+        )
+        self.cache = {}
+
+    def __call__(self, x):
+        h1 = F.relu(self.l1(x))
+        h2 = F.relu(self.l2(h1))
+        return self.l3(h2)
+
+    def calc(self, arr: np.ndarray) -> np.int32:
+        md5 = hashlib.md5(arr).hexdigest()
+        value = self.cache.get(md5)
+        if value is None:
+            value = np.argmax(self(arr).data)
+            self.cache[md5] = value
+        return value
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from loaddb import NAIVE_OFFSET, parse_offset, to_utc_strings
+
+
+def test_parse_offset():
+    assert parse_offset('2017-01-02 03:04:05.000001') == ('', NAIVE_OFFSET)
+    assert parse_offset('2017-01-02T03:04:05.000001Z') == ('Z', timedelta(0))
+    assert parse_offset('2017-01-02 03:04:05+09:00') == ('+09:00', timedelta(hours=9))
+    assert parse_offset('20170102T030405-0130') == ('-0130', -timedelta(hours=1, minutes=30))
+
+
+def test_to_utc_strings():
+    # the fast path, one format per batch
+    assert list(to_utc_strings(['2017-01-02 03:04:05.000001', '2017-01-02 03:04:06.000002'])) == \
+        ['2017-01-01 18:04:05.000001', '2017-01-01 18:04:06.000002']
+    assert list(to_utc_strings(['2017-01-02T03:04:05.000001Z'])) == ['2017-01-02 03:04:05.000001']
+    assert list(to_utc_strings(['2017-01-02 03:04:05.000001+09:00'])) == ['2017-01-01 18:04:05.000001']
+    # the fallback of a format numpy does not read
+    assert list(to_utc_strings(['20170102T030405+0900'])) == ['2017-01-01 18:04:05.000000']
+    # a mixed batch converts each row as its own batch would
+    times = ['2017-01-02 03:04:05.000001', '2017-01-02 03:04:05', '2017-01-02T03:04:05Z']
+    assert list(to_utc_strings(times)) == \
+        ['2017-01-01 18:04:05.000001', '2017-01-01 18:04:05.000000', '2017-01-02 03:04:05.000000']
+    assert list(to_utc_strings(times)) == [to_utc_strings([t])[0] for t in times]
@@ -2,12 +2,11 @@ import json
 import logging
 import threading
 import time
-from collections import OrderedDict
-from concurrent.futures import ThreadPoolExecutor
-from queue import Queue, Empty
+from concurrent.futures import Future, TimeoutError
+from queue import Queue
 from threading import RLock
 
-from typing import Dict
+from typing import Dict, List, Sequence, Tuple
 from websocket import WebSocketApp
 
 from pychrome.mixin import Network, Page, Input
@@ -21,15 +20,16 @@ class Connection(Input, Page, Network):
         self.logger = logger or logging.getLogger(self.__class__.__name__)
         self._seq_no = 0  # type: int
         self._seq_no_lock = RLock()
-        self._response_queues = OrderedDict()  # type: Dict[int, Queue]
+        self._futures = {}  # type: Dict[int, Future]
+        self._event_q = Queue()
         self._ws = WebSocketApp(url=ws_url,
                                 on_open=self.on_open,
                                 on_close=self.on_close,
                                 on_message=self.on_message,
                                 on_error=self.on_error)
 
-        self._thread_pool = ThreadPoolExecutor()
         threading.Thread(target=self.run, daemon=True).start()
+        threading.Thread(target=self.run_events, daemon=True).start()
         self.wait_connected()
 
     def run(self):
@@ -38,6 +38,7 @@ class Connection(Input, Page, Network):
         except Exception as e:
             self.logger.exception(str(e))
             self.safe_close()
+        self._event_q.put(None)
         self.logger.info('run_forever finished.')
 
     def is_connected(self):
@@ -75,67 +76,85 @@ class Connection(Input, Page, Network):
     def on_open(self, ws):
         self.logger.info('#on_open')
 
-    def on_close(self, ws):
+    def on_close(self, ws, *args):
         self.logger.info('#on_close')
-        for q in list(self._response_queues.values()):
-            q.put(dict(error='no response by on_close'))
+        for seq_no in list(self._futures):
+            future = self._futures.pop(seq_no, None)
+            if future:
+                future.set_result(dict(error='no response by on_close'))
 
-    def command(self, method: str, **params) -> dict:
+    def send(self, method: str, **params) -> Future:
+        """send a command without waiting, the future is resolved with the response"""
         with self._seq_no_lock:
             self._seq_no += 1
             seq_no = self._seq_no
+            future = self._futures[seq_no] = Future()
+            future.seq_no = seq_no
+        self.logger.debug('#command={} id={} params={}'.format(method, seq_no, params))
+        try:
+            self._ws.send(json.dumps(dict(id=seq_no, method=method, params=params)))
+        except Exception:
+            self._futures.pop(seq_no, None)
+            raise
+        return future
 
-        data = dict(id=seq_no, method=method, params=params)
-
-        q = Queue()
-        self._response_queues[seq_no] = q
+    def wait(self, future: Future, method: str = '', timeout: float = None) -> dict:
         try:
-            self.logger.debug('#command={} id={} params={}'.format(method, seq_no, params))
-            self._ws.send(json.dumps(data))
-            res = q.get(timeout=self.TIMEOUT)
-            self.logger.debug('#RES:command={} id={} res={}'.format(method, seq_no, res))
+            res = future.result(timeout=self.TIMEOUT if timeout is None else timeout)
+            self.logger.debug('#RES:command={} res={}'.format(method, res))
             return res
-        except Empty as e:
+        except TimeoutError as e:
+            self._futures.pop(getattr(future, 'seq_no', None), None)
             if self.is_connected():
-                self.logger.exception('ERR:command={} id={} params={}\n{}'.format(method, seq_no, params, str(e)))
+                self.logger.exception('ERR:command={} timeout\n{}'.format(method, str(e)))
                 raise
             return dict(error='response timeout by disconnection')
+
+    def command(self, method: str, **params) -> dict:
+        try:
+            return self.wait(self.send(method, **params), method)
         except Exception as e:
             self.logger.exception('method={} params={}\n{}'.format(method, params, str(e)))
             raise
-        finally:
-            del self._response_queues[seq_no]
+
+    def commands(self, calls: Sequence[Tuple[str, dict]]) -> List[dict]:
+        """pipeline [(method, params)], all commands are sent before the first response is waited"""
+        futures = [(method, self.send(method, **params)) for method, params in calls]
+        return [self.wait(future, method) for method, future in futures]
 
     def on_event(self, data: dict):
         pass
 
     def on_message(self, ws, message):
-        future = self._thread_pool.submit(self._on_message, ws, message)
-
-    def _on_message(self, ws, message):
+        """responses resolve their futures here, events are queued to run_events in order"""
         self.logger.debug('on_message message={}'.format(message))
+        try:
+            data = json.loads(message)
+            if data.get('method'):
+                self._event_q.put(data)
+            elif data.get('id'):
+                future = self._futures.pop(data['id'], None)
+                if future:
+                    future.set_result(data)
+        except Exception as e:
+            self.logger.exception(str(e))
+
+    def run_events(self):
         func_tuples = [
             ('DOM', self.on_dom),
             ('Network', self.on_network),
             ('Page', self.on_page),
             ('', self.on_event),  # match all
         ]
-        try:
-            data = json.loads(message)
-            if data.get('method'):
-                for _, func in func_tuples:
-                    try:
-                        func(data)
-                    except Exception as e:
-                        self.logger.exception(str(e))
-            elif data.get('id'):
+        while True:
+            data = self._event_q.get()
+            if data is None:
+                break
+            for _, func in func_tuples:
                 try:
-                    q = self._response_queues[data['id']]
-                    q.put(data)
-                except KeyError:
-                    pass
-        except Exception as e:
-            self.logger.exception(str(e))
+                    func(data)
+                except Exception as e:
+                    self.logger.exception(str(e))
 
     def on_error(self, ws, error):
         self.logger.info('#on_error {}'.format(error))
@@ -1,9 +1,11 @@
 import os
+import random
+from queue import Queue
 
 import time
 
-from pychrome import Driver
-from pychrome.test_utils import new_browser, TEST_ADDR
+from pychrome import Driver, Connection
+from pychrome.test_utils import new_browser, TEST_ADDR, FakeCDPServer
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -20,3 +22,38 @@ def test_connection():
         time.sleep(1.0)
         print(conn.frame_ids)
         print(res)
+
+
+def test_pipelined_commands():
+    server = FakeCDPServer(lambda method, params: {'outerHTML': '<tr>{}</tr>'.format(params['nodeId'])},
+                           delay=0.1)
+    conn = Connection('ws://{}:{}/devtools/page/1'.format(*server.address))
+    try:
+        start = time.time()
+        results = conn.commands([('DOM.getOuterHTML', dict(nodeId=i)) for i in range(30)])
+        # one delay for all 30 instead of 30 round trips
+        assert time.time() - start < 1.0
+        assert [res['result']['outerHTML'] for res in results] == ['<tr>{}</tr>'.format(i) for i in range(30)]
+        assert conn.command('DOM.getOuterHTML', nodeId=1)['result'] == {'outerHTML': '<tr>1</tr>'}
+    finally:
+        conn.safe_close()
+        server.close()
+
+
+def test_events_in_order():
+    server = FakeCDPServer()
+    received = Queue()
+
+    class EventConnection(Connection):
+        def on_event(self, data: dict):
+            time.sleep(random.random() * 0.001)
+            received.put(data['params']['n'])
+
+    conn = EventConnection('ws://{}:{}/devtools/page/1'.format(*server.address))
+    try:
+        for i in range(100):
+            server.emit('Custom.event', n=i)
+        assert [received.get(timeout=1) for _ in range(100)] == list(range(100))
+    finally:
+        conn.safe_close()
+        server.close()
@@ -1,13 +1,32 @@
-import json
+import functools
 import logging
 import re
+import threading
+import time
 
 import requests
-from typing import Dict, Iterator, Sequence, Tuple, Optional
+from typing import Callable, Dict, Iterator, Sequence, Tuple, Optional
 
 from .connection import Connection
 
 
+@functools.lru_cache(maxsize=256)
+def _compile(url_re: str):
+    return re.compile(url_re)
+
+
+class TargetWatcher(Connection):
+    """browser level connection reporting Target.* events to on_target"""
+
+    def __init__(self, ws_url: str, on_target: Callable[[str, dict], None], *, logger: logging.Logger = None):
+        self._on_target = on_target
+        super().__init__(ws_url, logger=logger)
+
+    def on_event(self, data: dict):
+        if data['method'].startswith('Target.'):
+            self._on_target(data['method'], data['params'])
+
+
 class Driver:
     TIMEOUT = 5.0
 
@@ -19,34 +38,75 @@ class Driver:
         self._connections = {}  # type: Dict[str, Connection]
         self.logger = logger or logging.getLogger(self.__class__.__name__)
         self._connection_factory = connection_factory or Connection
+        self._session = requests.Session()
+        # endpoints by target id, kept current by the watcher
+        self._targets = {}  # type: Dict[str, dict]
+        self._targets_lock = threading.RLock()
+        self._watcher = None  # type: Optional[TargetWatcher]
+        self._watch_tried_at = 0.0
+
+    def _get_json(self, path: str):
+        r = self._session.get('http://{0}:{1}{2}'.format(*self.address, path), timeout=self.TIMEOUT)
+        return r.json()
+
+    def _watch(self) -> bool:
+        """return True if the target cache is kept current by a browser level connection"""
+        if self._watcher and self._watcher.is_connected():
+            return True
+        if time.time() - self._watch_tried_at < self.TIMEOUT:
+            return False
+        self._watch_tried_at = time.time()
+        try:
+            ws_url = self._get_json('/json/version')['webSocketDebuggerUrl']
+            targets = {ep['id']: ep for ep in self._get_json('/json')}
+            with self._targets_lock:
+                self._targets = targets
+            self._watcher = TargetWatcher(ws_url, self.on_target, logger=self.logger)
+            res = self._watcher.command('Target.setDiscoverTargets', discover=True)
+            if 'error' in res:
+                self.logger.warning('Target.setDiscoverTargets {}'.format(res))
+                self._watcher.safe_close()
+                return False
+            return True
+        except Exception as e:
+            self.logger.warning('no target discovery, fall back to /json. {}'.format(e))
+            return False
+
+    def on_target(self, method: str, params: dict):
+        if method in ('Target.targetCreated', 'Target.targetInfoChanged'):
+            info = params['targetInfo']
+            with self._targets_lock:
+                ep = self._targets.setdefault(info['targetId'], {'id': info['targetId']})
+                ep.update(type=info['type'], url=info['url'], title=info.get('title', ''))
+        elif method == 'Target.targetDestroyed':
+            with self._targets_lock:
+                self._targets.pop(params['targetId'], None)
+            conn = self._connections.pop(params['targetId'], None)
+            if conn:
+                conn.safe_close()
 
     def get_endpoints(self, *, types: Sequence[str] = None) -> Dict[str, dict]:
         types = types or ['page']
-        r = requests.get('http://{0}:{1}/json'.format(*self.address))
-        return {ep['id']: ep for ep in filter(lambda ep: ep['type'] in types, json.loads(r.text))}
+        if self._watch():
+            with self._targets_lock:
+                endpoints = list(self._targets.values())
+        else:
+            endpoints = self._get_json('/json')
+            for page_id in set(self._connections) - {ep['id'] for ep in endpoints}:
+                self._connections.pop(page_id).safe_close()
+        return {ep['id']: ep for ep in endpoints if ep['type'] in types}
 
     def _create_connection(self, page_id: str, connection_factory=None) -> Connection:
         connection_factory = connection_factory or self._connection_factory
-
-        def gc_clients():
-            for _id, _conn in list(self._connections.items()):
-                if not _conn.is_connected():
-                    self._connections.pop(_id)
-
-        gc_clients()
-
         conn = self._connections.get(page_id)
-        if not conn:
+        if not conn or not conn.is_connected():
             ws_url = 'ws://{0}:{1}/devtools/page/{2}'.format(*self.address, page_id)
             conn = connection_factory(ws_url=ws_url, logger=self.logger)
             self._connections[page_id] = conn
         return conn
 
     def connections(self, url_re: str = None) -> Iterator[Connection]:
-        url_re = url_re or '.*'
-        if not url_re and not id:
-            url_re = '.*'
-        search_func = re.compile(url_re).search
+        search_func = _compile(url_re or '.*').search
         for page_id, ep in self.get_endpoints().items():
             if search_func(ep['url']):
                 yield self._create_connection(page_id=ep['id'])
@@ -1,5 +1,7 @@
+import time
+
 from pychrome import Driver
-from pychrome.test_utils import new_browser, TEST_ADDR
+from pychrome.test_utils import new_browser, TEST_ADDR, FakeCDPServer
 
 
 def test_get_endpoints():
@@ -11,3 +13,25 @@ def test_get_endpoints():
 
     for conn in driver.connections('.*'):
         print(conn)
+
+
+def test_target_cache():
+    server = FakeCDPServer(targets=[{'id': 'A', 'type': 'page', 'url': 'https://a.example/index.html'}])
+    driver = Driver(server.address)
+    try:
+        assert set(driver.get_endpoints()) == {'A'}
+        assert server.http_paths == ['/json/version', '/json']
+        conn = driver.connection('a\\.example')
+        assert conn and conn.is_connected()
+
+        server.emit('Target.targetCreated', targetInfo={'targetId': 'B', 'type': 'page', 'url': 'about:blank'})
+        server.emit('Target.targetInfoChanged',
+                    targetInfo={'targetId': 'B', 'type': 'page', 'url': 'https://b.example/'})
+        server.emit('Target.targetDestroyed', targetId='A')
+        time.sleep(0.2)
+        assert {k: ep['url'] for k, ep in driver.get_endpoints().items()} == {'B': 'https://b.example/'}
+        assert list(driver.connections('a\\.example')) == []
+        # lookups are served from the cache
+        assert server.http_paths == ['/json/version', '/json']
+    finally:
+        server.close()
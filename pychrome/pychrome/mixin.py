@@ -1,28 +1,91 @@
 import base64
+import itertools
 import random
+import re
+import threading
+import time
+from collections import OrderedDict
 from pprint import pformat
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Callable, Optional, Set
+
+
+class Subscription:
+    def __init__(self, css_selector: str, callback: Callable[[str], None], frame_key: tuple = None):
+        self.css_selector = css_selector
+        self.callback = callback
+        self.frame_key = frame_key
+        self.node_id = None  # type: Optional[int]
+        self.html = None  # type: Optional[str]
 
 
 class DOM:
     TIMEOUT = 3.0
+    # events that change the subtree of their target node
+    MUTATION_EVENTS = {
+        'DOM.childNodeInserted': 'parentNodeId',
+        'DOM.childNodeRemoved': 'parentNodeId',
+        'DOM.childNodeCountUpdated': 'nodeId',
+        'DOM.characterDataModified': 'nodeId',
+        'DOM.attributeModified': 'nodeId',
+        'DOM.attributeRemoved': 'nodeId',
+    }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._current_node_id = None
         self.frame_ids = {}  # type: Dict[tuple, int]
+        self._parent_ids = {}  # type: Dict[int, int]
+        self._subscriptions = {}  # type: Dict[int, Subscription]
+        self._subscribed_node_ids = {}  # type: Dict[int, Set[int]]
+        self._dirty_subscriptions = set()  # type: Set[int]
+        self._subscription_cond = threading.Condition()
+        self._subscription_thread = None  # type: threading.Thread
+        self._subscription_ids = itertools.count(1)
+
+    def _add_nodes(self, parent_id: int, nodes: List[dict]):
+        for node in nodes:
+            self._parent_ids[node['nodeId']] = parent_id
+            self._add_nodes(node['nodeId'], node.get('children', ()))
+            if 'contentDocument' in node:
+                self._add_nodes(node['nodeId'], [node['contentDocument']])
+
+    def _mark_dirty(self, node_id: Optional[int], inserted: bool = False):
+        """mark subscriptions on node_id or its ancestors, and unresolved ones if a node is inserted"""
+        dirty = set()
+        while node_id:
+            dirty.update(self._subscribed_node_ids.get(node_id, ()))
+            node_id = self._parent_ids.get(node_id)
+        if inserted:
+            dirty.update(sub_id for sub_id, sub in self._subscriptions.items() if not sub.node_id)
+        if dirty:
+            with self._subscription_cond:
+                self._dirty_subscriptions.update(dirty)
+                self._subscription_cond.notify()
+
+    def request_frames(self):
+        for node_id in self.get_node_id_all(css_selector='frame,iframe'):
+            self.command('DOM.requestChildNodes', nodeId=node_id, depth=-1)
 
     def on_dom(self, data: dict):
         method = data['method']
         params = data['params']
+        if method in self.MUTATION_EVENTS:
+            self._mark_dirty(params.get(self.MUTATION_EVENTS[method]), method == 'DOM.childNodeInserted')
         if method == 'DOM.documentUpdated':
             self.current_node_id = None
             self.frame_ids.clear()
+            self._parent_ids.clear()
             self.logger.info('document updated. frame_ids.clear')
-            for node_id in self.get_node_id_all(css_selector='frame,iframe'):
-                self.command('DOM.requestChildNodes', nodeId=node_id, depth=-1)
+            with self._subscription_cond:
+                for sub in self._subscriptions.values():
+                    sub.node_id = None
+                self._subscribed_node_ids.clear()
+                self._dirty_subscriptions.update(self._subscriptions)
+                self._subscription_cond.notify()
+            self.request_frames()
         if method == 'DOM.setChildNodes':
+            self._add_nodes(params['parentId'], params['nodes'])
             for node in params['nodes']:
                 if node['localName'] in ('frame', 'iframe'):
                     attributes = node['attributes']
@@ -35,13 +98,82 @@ class DOM:
                     self.logger.info('CURRENT frame_ids=\n{}'.format(pformat(self.frame_ids)))
                     self.get_node_id_all(css_selector='frame,iframe', node_id=node_id)
         elif method == 'DOM.childNodeInserted':
+            self._add_nodes(params['parentNodeId'], [params['node']])
             self.command('DOM.requestChildNodes', nodeId=params['node']['nodeId'], depth=-1)
         elif method == 'DOM.childNodeRemoved':
             node_id = params['nodeId']
+            self._parent_ids.pop(node_id, None)
             for k, v in list(self.frame_ids.items()):
                 if v == node_id:
                     del self.frame_ids[k]
 
+    def subscribe(self, css_selector: str, callback: Callable[[str], None], *, frame_key: tuple = None) -> int:
+        """call callback(outer_html) of css_selector whenever DOM mutation events touch its subtree
+
+        frame_key: an attribute (name, value) of frame_ids to search css_selector in instead of the document.
+        Bursts of events are coalesced, callback is called from a subscription thread only when the html changed.
+        """
+        with self._subscription_cond:
+            if self._subscription_thread is None:
+                self.command('DOM.enable')
+                self._subscription_thread = threading.Thread(target=self.run_subscriptions,
+                                                             name='{}.subscriptions'.format(self.logger.name),
+                                                             daemon=True)
+                self._subscription_thread.start()
+            sub_id = next(self._subscription_ids)
+            self._subscriptions[sub_id] = Subscription(css_selector, callback, frame_key)
+            self._dirty_subscriptions.add(sub_id)
+            self._subscription_cond.notify()
+        return sub_id
+
+    def unsubscribe(self, sub_id: int):
+        with self._subscription_cond:
+            sub = self._subscriptions.pop(sub_id, None)
+            if sub and sub.node_id:
+                self._subscribed_node_ids.get(sub.node_id, set()).discard(sub_id)
+
+    def _resolve(self, sub_id: int, sub: Subscription) -> Optional[int]:
+        root_id = None
+        if sub.frame_key:
+            root_id = self.frame_ids.get(sub.frame_key)
+            if not root_id:
+                self.request_frames()
+                return None
+        node_id = self.get_node_id(sub.css_selector, node_id=root_id)
+        if not node_id:
+            return None
+        # mutation events are only sent for nodes already sent to the client
+        self.command('DOM.requestChildNodes', nodeId=node_id, depth=-1)
+        with self._subscription_cond:
+            sub.node_id = node_id
+            self._subscribed_node_ids.setdefault(node_id, set()).add(sub_id)
+        return node_id
+
+    def run_subscriptions(self):
+        while self.is_connected():
+            with self._subscription_cond:
+                if not self._dirty_subscriptions:
+                    self._subscription_cond.wait(timeout=1.0)
+                dirty, self._dirty_subscriptions = self._dirty_subscriptions, set()
+                subs = [(sub_id, self._subscriptions[sub_id]) for sub_id in dirty if sub_id in self._subscriptions]
+            for sub_id, sub in subs:
+                try:
+                    node_id = sub.node_id or self._resolve(sub_id, sub)
+                    if not node_id:
+                        continue
+                    html = self._get_html(node_id)
+                    if not html:
+                        # removed, resolve again on the next insertion
+                        with self._subscription_cond:
+                            self._subscribed_node_ids.get(node_id, set()).discard(sub_id)
+                            sub.node_id = None
+                        continue
+                    if html != sub.html:
+                        sub.html = html
+                        sub.callback(html)
+                except Exception as e:
+                    self.logger.exception(str(e))
+
     def get_root_node_id(self) -> int:
         res = self.command('DOM.getDocument')  # , traverseFrames=True)
         if 'result' not in res:
@@ -85,10 +217,9 @@ class DOM:
 
     def get_html_all(self, css_selector: str, *, node_id: int = None) -> List[str]:
         node_id = node_id or self.current_node_id
-        htmls = []
-        for node_id in self.get_node_id_all(css_selector=css_selector, node_id=node_id):
-            htmls.append(self._get_html(node_id=node_id))
-        return htmls
+        node_ids = self.get_node_id_all(css_selector=css_selector, node_id=node_id)
+        results = self.commands([('DOM.getOuterHTML', dict(nodeId=node_id)) for node_id in node_ids])
+        return [res['result']['outerHTML'] if 'result' in res else '' for res in results]
 
     def get_attributes(self, css_selector: str = None, *, node_id: int = None) -> Dict[str, str]:
         node_id = node_id or self.current_node_id
@@ -114,9 +245,14 @@ class DOM:
 
     def get_box_all(self, css_selector: str, *, node_id: int = None) -> List[Tuple[int, int, int, int]]:
         node_id = node_id or self.current_node_id
+        node_ids = self.get_node_id_all(css_selector=css_selector, node_id=node_id)
         boxes = []
-        for node_id in self.get_node_id_all(css_selector=css_selector, node_id=node_id):
-            boxes.append(self._get_box(node_id=node_id))
+        for res in self.commands([('DOM.getBoxModel', dict(nodeId=node_id)) for node_id in node_ids]):
+            if 'result' not in res:
+                boxes.append(None)
+                continue
+            l = res['result']['model']['content']
+            boxes.append(tuple(map(int, (l[0], l[1], l[2], l[-1]))))
         return boxes
 
 
@@ -162,8 +298,95 @@ class Input(DOM):
 
 
 class Network:
+    MAX_REQUESTS = 1000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._capture = None
+        self._requests = OrderedDict()  # type: Dict[str, list]
+        self._websockets = {}  # type: Dict[str, str]
+
+    def capture_network(self, url_prefixes: Tuple[str, ...],
+                on_body: Callable[[str, str, bytes, str, float], None],
+                on_websocket_frame: Callable[[str, bytes, float], None] = None,
+                on_request: Callable[[str, str, Dict[str, str], Optional[bytes]], None] = None):
+        """enable Network and hand over bodies and websocket frames of urls starting with url_prefixes
+
+        on_body(method, url, body, content_type, received_at) is called from the websocket thread when
+        Network.getResponseBody returns, and on_websocket_frame(url, payload, received_at) from the event thread.
+        on_request(method, url, headers, post_data) is called from the event thread on Network.requestWillBeSent, and
+        again when Network.requestWillBeSentExtraInfo adds the headers of the network stack, e.g. cookies.
+        None may wait for a command.
+        """
+        self._capture = (tuple(url_prefixes), on_body, on_websocket_frame, on_request)
+        self.command('Network.enable')
+
     def on_network(self, data: dict):
-        pass
+        if not self._capture:
+            return
+        url_prefixes, on_body, on_websocket_frame, on_request = self._capture
+        method = data['method']
+        params = data['params']
+        if method == 'Network.requestWillBeSent':
+            request = params['request']
+            url = request['url']
+            if url.startswith(url_prefixes):
+                # method, url, content type, request
+                self._requests[params['requestId']] = [request['method'], url, '', request]
+                if len(self._requests) > self.MAX_REQUESTS:
+                    self._requests.popitem(last=False)
+                if on_request:
+                    post_data = request.get('postData')
+                    on_request(request['method'], url, request.get('headers', {}),
+                               post_data.encode('utf-8') if post_data is not None else None)
+        elif method == 'Network.requestWillBeSentExtraInfo':
+            request = self._requests.get(params['requestId'])
+            if request and on_request:
+                post_data = request[3].get('postData')
+                on_request(request[0], request[1], dict(request[3].get('headers', {}), **params.get('headers', {})),
+                           post_data.encode('utf-8') if post_data is not None else None)
+        elif method == 'Network.responseReceived':
+            request = self._requests.get(params['requestId'])
+            if request:
+                response = params['response']
+                headers = {k.lower(): v for k, v in response.get('headers', {}).items()}
+                request[2] = headers.get('content-type', response.get('mimeType', ''))
+        elif method == 'Network.loadingFinished':
+            request = self._requests.pop(params['requestId'], None)
+            if request:
+                received_at = time.time()
+
+                def done(future):
+                    res = future.result()
+                    if 'result' not in res:
+                        self.logger.info('{} {}'.format(request[1], res))
+                        return
+                    body = res['result']['body']
+                    content_type = request[2]
+                    if res['result']['base64Encoded']:
+                        body = base64.b64decode(body)
+                    else:
+                        # chrome has decoded the text already
+                        body = body.encode('utf-8')
+                        content_type = re.sub(r'charset=[\w-]+', 'charset=utf-8', content_type)
+                    on_body(request[0], request[1], body, content_type, received_at)
+
+                self.send('Network.getResponseBody', requestId=params['requestId']).add_done_callback(done)
+        elif method == 'Network.loadingFailed':
+            self._requests.pop(params['requestId'], None)
+        elif method == 'Network.webSocketCreated':
+            if params['url'].startswith(url_prefixes):
+                self._websockets[params['requestId']] = params['url']
+        elif method == 'Network.webSocketClosed':
+            self._websockets.pop(params['requestId'], None)
+        elif method == 'Network.webSocketFrameReceived':
+            url = self._websockets.get(params['requestId'])
+            if url and on_websocket_frame:
+                response = params['response']
+                payload = response['payloadData']
+                # opcode 2 is a binary frame
+                payload = base64.b64decode(payload) if response['opcode'] == 2 else payload.encode('utf-8')
+                on_websocket_frame(url, payload, time.time())
 
     def get_response_body(self, request_id: str):
         res = self.command('Network.getResponseBody', requestId=request_id)
@@ -0,0 +1,58 @@
+import logging
+import threading
+from queue import Queue
+
+from pychrome.mixin import DOM
+
+
+class FakeDOM(DOM):
+    """answers DOM commands from a fixed tree: 1 document > 2 body > 3 table > 4 text"""
+
+    def __init__(self):
+        super().__init__()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.text = 'a'
+        self.commands = []
+
+    def is_connected(self):
+        return True
+
+    def command(self, method: str, **params) -> dict:
+        self.commands.append(method)
+        if method == 'DOM.getDocument':
+            return {'result': {'root': {'nodeId': 1}}}
+        if method == 'DOM.querySelector':
+            return {'result': {'nodeId': 3 if params['selector'] == 'table' else 0}}
+        if method == 'DOM.querySelectorAll':
+            return {'result': {'nodeIds': []}}
+        if method == 'DOM.requestChildNodes':
+            threading.Thread(target=self.on_dom, args=({'method': 'DOM.setChildNodes', 'params': {
+                'parentId': 3, 'nodes': [{'nodeId': 4, 'localName': '', 'children': []}]}},)).start()
+            return {'result': {}}
+        if method == 'DOM.getOuterHTML':
+            return {'result': {'outerHTML': '<table>{}</table>'.format(self.text)}}
+        return {'result': {}}
+
+
+def test_subscribe():
+    dom = FakeDOM()
+    q = Queue()
+    dom.on_dom({'method': 'DOM.setChildNodes', 'params': {
+        'parentId': 1, 'nodes': [{'nodeId': 2, 'localName': 'body', 'children': [
+            {'nodeId': 3, 'localName': 'table'}]}]}})
+    dom.subscribe('table', q.put)
+    assert q.get(timeout=1) == '<table>a</table>'
+
+    dom.text = 'b'
+    n = len(dom.commands)
+    dom.on_dom({'method': 'DOM.characterDataModified', 'params': {'nodeId': 4, 'characterData': 'b'}})
+    assert q.get(timeout=1) == '<table>b</table>'
+    # the node is resolved once, a change costs a single getOuterHTML
+    assert dom.commands[n:] == ['DOM.getOuterHTML']
+
+    # outside of the subscribed subtree
+    dom.text = 'c'
+    dom.on_dom({'method': 'DOM.attributeModified', 'params': {'nodeId': 2, 'name': 'x', 'value': 'y'}})
+    dom.on_dom({'method': 'DOM.childNodeCountUpdated', 'params': {'nodeId': 3, 'childNodeCount': 1}})
+    assert q.get(timeout=1) == '<table>c</table>'
+    assert q.empty()
@@ -1,10 +1,15 @@
+import base64
+import contextlib
+import hashlib
+import json
 import logging
 import os
+import socket
+import struct
 import subprocess
+import threading
 import time
 
-from typing import Tuple
-
 
 def default_profile_dir():
     if os.name == 'posix':
@@ -30,3 +35,119 @@ def new_browser():
         subprocess.call('{} {}'.format(path, ' '.join(chrome_args)), shell=True)
     else:
         assert False, 'unknown os {}'.format(os.name)
+
+
+class FakeCDPServer:
+    """minimal devtools endpoint for tests: GET /json, /json/version and websocket CDP on /devtools/...
+
+    handler(method, params) returns the result of a command, responses are delayed by delay seconds
+    in their own threads. emit() sends an event to every connected client.
+    """
+
+    def __init__(self, handler=None, *, targets=None, delay: float = 0.0):
+        self.handler = handler or (lambda method, params: {})
+        self.targets = targets or []
+        self.delay = delay
+        self.received = []
+        self.http_paths = []
+        self._clients = []
+        self._lock = threading.Lock()
+        self._sock = socket.socket()
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(16)
+        self.address = self._sock.getsockname()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def close(self):
+        self._sock.close()
+        with self._lock:
+            for client in self._clients:
+                with contextlib.suppress(OSError):
+                    client.close()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client: socket.socket):
+        f = client.makefile('rb')
+        request_line = f.readline().decode()
+        headers = {}
+        for line in iter(f.readline, b'\r\n'):
+            k, _, v = line.decode().partition(':')
+            headers[k.strip().lower()] = v.strip()
+        path = request_line.split()[1]
+        if path.startswith('/json'):
+            self.http_paths.append(path)
+            if path == '/json/version':
+                body = json.dumps({'webSocketDebuggerUrl': 'ws://{}:{}/devtools/browser/fake'.format(*self.address)})
+            else:
+                body = json.dumps(self.targets)
+            body = body.encode()
+            client.sendall(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n'
+                           b'Connection: close\r\n\r\n%s' % (len(body), body))
+            client.close()
+            return
+        accept = base64.b64encode(hashlib.sha1(
+            (headers['sec-websocket-key'] + '258EAFA5-E914-47DA-95CA-C5AB0DC85B11').encode()).digest())
+        client.sendall(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                       b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+        with self._lock:
+            self._clients.append(client)
+        try:
+            while True:
+                opcode, payload = self._read_frame(f)
+                if opcode is None or opcode == 0x8:
+                    break
+                if opcode != 0x1:
+                    continue
+                data = json.loads(payload.decode())
+                self.received.append(data)
+                threading.Thread(target=self._respond, args=(client, data), daemon=True).start()
+        finally:
+            with self._lock:
+                self._clients.remove(client)
+            client.close()
+
+    def _respond(self, client: socket.socket, data: dict):
+        if self.delay:
+            time.sleep(self.delay)
+        result = self.handler(data['method'], data.get('params', {}))
+        self._send(client, dict(id=data['id'], result=result))
+
+    @staticmethod
+    def _read_frame(f):
+        header = f.read(2)
+        if len(header) < 2:
+            return None, b''
+        opcode, length = header[0] & 0x0f, header[1] & 0x7f
+        if length == 126:
+            length = struct.unpack('>H', f.read(2))[0]
+        elif length == 127:
+            length = struct.unpack('>Q', f.read(8))[0]
+        mask = f.read(4) if header[1] & 0x80 else b'\0\0\0\0'
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(f.read(length)))
+        return opcode, payload
+
+    def _send(self, client: socket.socket, data: dict):
+        payload = json.dumps(data).encode()
+        if len(payload) < 126:
+            header = struct.pack('>BB', 0x81, len(payload))
+        elif len(payload) < 1 << 16:
+            header = struct.pack('>BBH', 0x81, 126, len(payload))
+        else:
+            header = struct.pack('>BBQ', 0x81, 127, len(payload))
+        with self._lock:
+            with contextlib.suppress(OSError):
+                client.sendall(header + payload)
+
+    def emit(self, method: str, **params):
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            self._send(client, dict(method=method, params=params))
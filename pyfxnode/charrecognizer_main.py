@@ -19,10 +19,13 @@ def main():
       {f} [options] capture TITLE DIR
       {f} [options] make_data NAME DIR
       {f} [options] train DIR
+      {f} [options] export DIR
       
     Options:
       --epoch EPOCH  [default: 10]
       --capture-interval SEC  [default: 5]
+      --batch  label the glyphs of all pngs by the train data in parallel
+      --workers N  processes of --batch
     """.format(f=sys.argv[0]))
 
     name = args['NAME']
@@ -37,13 +40,19 @@ def main():
                 window.get_screen_shot().save('{}.png'.format(jst_now_aware().strftime('%Y%m%dT%H%M%S')))
                 sleep(float(args['--capture-interval']))
     if args['make_data']:
-        recognizer = CharRecognizer('.')
-        recognizer.make_train_data(name)
+        if args['--batch']:
+            workers = int(args['--workers']) if args['--workers'] else None
+            CharRecognizer.make_train_data_batch(name, workers=workers)
+        else:
+            recognizer = CharRecognizer('.')
+            recognizer.make_train_data(name)
     if args['train']:
         epoch = int(args['--epoch'])
         recognizer = CharRecognizer('.')
         recognizer.train(epoch)
         recognizer.save()
+    if args['export']:
+        CharRecognizer('.').export()
 
     for w in Window.iter_window():
         print(w.get_title())
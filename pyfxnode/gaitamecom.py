@@ -2,16 +2,16 @@ import csv
 import logging
 import re
 import sys
-import threading
 import time
 from io import StringIO
+from typing import Optional
 
 import lxml.html
-import pychrome
 from docopt import docopt
 from mitmproxy.http import HTTPFlow
 
 from pyfxnode.account import Account
+from pyfxnode.dispatcher import ProxyResponse
 from pyfxnode.price import Price
 from pyfxnode.utils import jst_now_aware
 from pyfxnode.webnode import WebNode
@@ -23,6 +23,9 @@ class Gaitamecom(WebNode):
     ACCOUNT_URL = 'https://tradefx.gaitame.com/webserviceapi/accountDetail.do'
     POSITION_URL = 'https://tradefx.gaitame.com/webserviceapi/possumDetailA.do'
     GAITAMECOM_URL = 'https://tradefx.gaitame.com/pcweb/gneo/trade.html'
+    DISPATCH_URLS = (RATE_URL,)
+    CAPTURE_URLS = (ACCOUNT_URL, POSITION_URL)
+    POLL_INTERVALS = {RATE_URL: 0.5}
 
     accounts = {
         NAME: Account(NAME),
@@ -31,34 +34,9 @@ class Gaitamecom(WebNode):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        threading.Thread(target=lambda: self.poll_chrome(5.0), daemon=True).start()
-        self.refresh_flag = False
+        self.watch_chrome(self.GAITAMECOM_URL, '#uforex1_id_byCurrencyPairListHome_MyTable', self.on_positions)
 
-    def poll_chrome(self, interval: float):
-        if not self.chrome:
-            self.warning('no chrome driver')
-            return
-        while True:
-            try:
-                for conn in self.chrome.connections(re.escape(self.GAITAMECOM_URL)):
-                    self.on_positions(conn, self.refresh_flag)
-                self.refresh_flag = False
-            except Exception as e:
-                self.exception(str(e))
-            time.sleep(interval)
-
-    def on_positions(self, conn: pychrome.Connection, refresh: bool):
-        if refresh:
-            self.refresh_flag = False
-            self.info('refresh')
-            conn.click(css_selector='#uforex1_id_byCurrencyPairListHome_MyTable a.btnUpdate')
-            self.info('refresh clicked')
-
-        # if not chrome.url.startswith(self.GAITAMECOM_URL):
-        #            return
-        html = conn.get_html(css_selector='#uforex1_id_byCurrencyPairListHome_MyTable')
-        if not html:
-            return
+    def on_positions(self, html: str):
         dom = lxml.html.fromstring(html)
         positions = {}
         for tr in dom.cssselect('table tr'):
@@ -78,7 +56,12 @@ class Gaitamecom(WebNode):
         self.push_data(accounts=self.accounts)
 
     def refresh(self):
-        self.refresh_flag = True
+        if not self.chrome:
+            return
+        for conn in self.chrome.connections(re.escape(self.GAITAMECOM_URL)):
+            self.info('refresh')
+            conn.click(css_selector='#uforex1_id_byCurrencyPairListHome_MyTable a.btnUpdate')
+            self.info('refresh clicked')
 
     def handle_response_header(self, flow: HTTPFlow):
         req = flow.request
@@ -98,7 +81,7 @@ class Gaitamecom(WebNode):
         if req.method == 'POST':
             if req.pretty_url.startswith(self.RATE_URL):
                 data = self.parse_prices(res.text)
-                self.push_data(**data)
+                self.push_data(stamps=self.stamps(res.timestamp_end), **data)
             elif req.pretty_url.startswith(self.ACCOUNT_URL):
                 data = self.parse_account(content=res.text)
                 self.push_data(**data)
@@ -106,6 +89,19 @@ class Gaitamecom(WebNode):
                 data = self.parse_stream_positions(content=res.text)
                 self.push_data(**data)
 
+    def handle_dispatched_response(self, response: ProxyResponse):
+        if response.method == 'POST' and response.url.startswith(self.ACCOUNT_URL):
+            self.push_data(**self.parse_account(content=response.text))
+        elif response.method == 'POST' and response.url.startswith(self.POSITION_URL):
+            self.push_data(**self.parse_stream_positions(content=response.text))
+        else:
+            super().handle_dispatched_response(response)
+
+    def parse_dispatched_response(self, response: ProxyResponse) -> Optional[dict]:
+        if response.method == 'POST' and response.url.startswith(self.RATE_URL):
+            return dict(stamps=self.stamps(response.received_at), **self.parse_prices(response.text))
+        return None
+
     def parse_prices(self, content: str) -> dict:
         # rate
         """
@@ -185,6 +181,9 @@ def main():
               --proxy IP_PORT  [default: 127.0.0.1:8083]
               --chrome IP_PORT  [default: 127.0.0.1:11003]
               --hub IP_PORT  [default: 127.0.0.1:10000]
+              --dispatch  parse rates in a worker process
+              --capture  capture rates from chrome's Network domain without the proxy
+              --poll  poll rates at POLL_INTERVALS besides the browser
             """.format(f=sys.argv[0]))
 
     l = args['--bind'].split(':')
@@ -200,9 +199,12 @@ def main():
                      args['--hub'].split(',')]
 
     node = Gaitamecom(Gaitamecom.NAME, address,
-                      proxy_address=proxy_address,
+                      proxy_address=None if args['--capture'] else proxy_address,
                       chrome_address=chrome_address,
-                      hub_addresses=hub_addresses)
+                      hub_addresses=hub_addresses,
+                      dispatch=args['--dispatch'],
+                      capture=args['--capture'],
+                      poll=args['--poll'])
     try:
         node.start()
         while node.is_running():
@@ -1,5 +1,4 @@
 import contextlib
-import copy
 import itertools
 import logging
 import random
@@ -10,13 +9,11 @@ import time
 from collections import OrderedDict, defaultdict, deque
 from datetime import timedelta
 from queue import Queue
-from typing import Tuple, Dict, Type, Sequence, Any, List, Union, Set, Optional, DefaultDict
+from typing import Tuple, Dict, Type, Sequence, Any, List, Union, Set, Optional, DefaultDict, Iterable
 
 import yaml
-from PyQt5 import Qt
 from PyQt5.QtCore import *
 from PyQt5.QtGui import QCloseEvent, QBrush
-from PyQt5.QtMultimedia import QSound
 from PyQt5.QtWidgets import *
 from docopt import docopt
 
@@ -24,6 +21,7 @@ from pyfxnode.account import Account
 from pyfxnode.datanode import DataNode
 from pyfxnode.dummyserver import DummyServer
 from pyfxnode.hubnode import HubNode
+from pyfxnode.latency import LatencyRecorder
 from pyfxnode.price import Price
 from pyfxnode.utils import unpack_from_bytes, jst_now_aware, JST
 
@@ -68,16 +66,106 @@ def get_float_format(instrument: str) -> str:
     return '{:.6f}'
 
 
-class TableUI(QTableWidget):
+class TableModel(QAbstractTableModel):
+    """table cells as dicts of value/bg/flags/checked
+
+    set_rows() diffs against the current cells and emits dataChanged only for the cells that changed.
+    """
+
+    def __init__(self, header: Sequence[str]):
+        super().__init__()
+        self.header = header
+        self._labels = list(header)
+        self._rows = []  # type: List[List[dict]]
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.header)
+
+    def headerData(self, section: int, orientation: int, role: int = Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._labels[section] if section < len(self._labels) else None
+        return section + 1
+
+    def set_labels(self, labels: Sequence[str]):
+        self._labels = list(labels)
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(self.header) - 1)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        cell = self._rows[index.row()][index.column()]
+        if role == Qt.DisplayRole:
+            return cell.get('value')
+        if role == Qt.BackgroundRole:
+            return cell.get('bg')
+        if role == Qt.CheckStateRole:
+            checked = cell.get('checked')
+            if checked is None:
+                return None
+            return Qt.Checked if checked else Qt.Unchecked
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        self._rows[index.row()][index.column()]['checked'] = value == Qt.Checked
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = self._rows[index.row()][index.column()].get('flags')
+        return flags if flags is not None else Qt.ItemIsEnabled
+
+    def to_cells(self, row: Union[List[Any], Dict[str, Any]]) -> List[dict]:
+        cells = [{} for _ in self.header]
+        if isinstance(row, dict):
+            items = ((self.header.index(k), v) for k, v in row.items())
+        else:
+            assert isinstance(row, (list, tuple))
+            items = enumerate(row)
+        for j, v in items:
+            cells[j] = dict(v) if isinstance(v, dict) else {'value': v}
+        return cells
+
+    def set_rows(self, rows: Iterable[Union[List[Any], Dict[str, Any]]]):
+        new_rows = [self.to_cells(row) for row in rows]
+        row_n, current_row_n = len(new_rows), len(self._rows)
+        if row_n < current_row_n:
+            self.beginRemoveRows(QModelIndex(), row_n, current_row_n - 1)
+            del self._rows[row_n:]
+            self.endRemoveRows()
+        for i, (old, new) in enumerate(zip(self._rows, new_rows)):
+            changed = [j for j, (a, b) in enumerate(zip(old, new)) if a != b]
+            if changed:
+                self._rows[i] = new
+                self.dataChanged.emit(self.index(i, changed[0]), self.index(i, changed[-1]))
+        if row_n > current_row_n:
+            self.beginInsertRows(QModelIndex(), current_row_n, row_n - 1)
+            self._rows.extend(new_rows[current_row_n:])
+            self.endInsertRows()
+
+
+class TableUI(QTableView):
     FONT_P = 8
     ROW_H = 14
 
+    cellClicked = pyqtSignal(int, int)
+
     def __init__(self, header: Sequence[str]):
         super().__init__()
         self.setContentsMargins(0, 0, 0, 0)
-        self.setColumnCount(len(header))
-        self.setHorizontalHeaderLabels(header)
         self.header = header
+        self.table_model = TableModel(header)
+        self.setModel(self.table_model)
+        self.verticalHeader().setDefaultSectionSize(self.ROW_H)
+        self.clicked.connect(lambda index: self.cellClicked.emit(index.row(), index.column()))
 
         # set font
         font = self.font()
@@ -87,47 +175,17 @@ class TableUI(QTableWidget):
         font.setPointSize(self.FONT_P - 2)
         self.verticalHeader().setFont(font)
 
-    def set_data(self, rows: Sequence[Union[List[Any], Dict[str, Any]]]):
-        row_n = len(rows)
-        current_row_n = self.rowCount()
-        if current_row_n != row_n:
-            self.setRowCount(0)
-        self.setRowCount(row_n)
-        for row in range(row_n):
-            self.setRowHeight(row, self.ROW_H)
-
-        data_set = []  # type: List[Tuple[int, int, dict]]
-        for i, row in enumerate(rows):
-            if isinstance(row, dict):
-                for k, v in row.items():
-                    j = self.header.index(k)
-                    if not isinstance(v, dict):
-                        v = {'value': v}
-                    data_set.append((i, j, v))
-            else:
-                assert isinstance(row, (list, tuple))
-                for j, v in enumerate(row):
-                    if not isinstance(v, dict):
-                        v = {'value': v}
-                    data_set.append((i, j, v))
-        for i, j, v in data_set:
-            r = self.set_cell(i, j, **v)
-
-    def set_cell(self, row: int, col: int, value=None, bg=None, flags=None, checked=None, widget=None):
-        if row >= self.rowCount() or col >= self.columnCount():
-            return False
-        if not self.item(row, col):
-            self.setItem(row, col, QTableWidgetItem())
-
-        flags = flags if flags is not None else Qt.ItemIsEnabled
-        self.item(row, col).setData(Qt.BackgroundRole, bg)
-        self.item(row, col).setData(Qt.DisplayRole, value)
-        self.item(row, col).setFlags(flags)
-        if checked is not None:
-            self.item(row, col).setCheckState(Qt.Checked if checked else Qt.Unchecked)
-        if widget is not None:
-            self.setCellWidget(row, col, widget)
-        return True
+    def setHorizontalHeaderLabels(self, labels: Sequence[str]):
+        self.table_model.set_labels(labels)
+
+    def set_data(self, rows: Iterable[Union[List[Any], Dict[str, Any]]]):
+        self.table_model.set_rows(rows)
+
+    def cell_data(self, row: int, col: int, role: int = Qt.DisplayRole):
+        return self.table_model.index(row, col).data(role)
+
+    def cell_flags(self, row: int, col: int):
+        return self.table_model.flags(self.table_model.index(row, col))
 
 
 class PriceUI(QWidget):
@@ -233,13 +291,11 @@ class PriceUI(QWidget):
 
     @pyqtSlot(int, int)
     def cell_clicked(self, row: int, col: int):
-        item = self.price_table.item(row, col)
-        flags = item.flags()
+        flags = self.price_table.cell_flags(row, col)
         if not (flags & Qt.ItemIsUserCheckable):
             return
-        checked = item.checkState()
-        name = item.text()
-        checked = checked == Qt.Checked
+        checked = self.price_table.cell_data(row, col, Qt.CheckStateRole) == Qt.Checked
+        name = self.price_table.cell_data(row, col)
         self.config[self.instrument][name] = checked
         logging.info('instrument={} name={} checked={}'.format(self.instrument, name, checked))
 
@@ -337,8 +393,8 @@ class AccountUI(TableUI):
         label = self.header[col]  # type: str
         if label not in ('name',):
             return
-        checked = self.item(row, col).checkState() == Qt.Checked
-        name = self.item(row, self.header.index('name')).data(Qt.DisplayRole)
+        checked = self.cell_data(row, col, Qt.CheckStateRole) == Qt.Checked
+        name = self.cell_data(row, self.header.index('name'))
         if checked:
             self.enabled_accounts.add(name)
         else:
@@ -444,6 +500,8 @@ class SoundUI(QWidget):
             return
         q = self.q_sounds.get(name)
         if not q:
+            # QtMultimedia loads its backends, only GUIs playing sounds pay for it
+            from PyQt5.QtMultimedia import QSound
             self.q_sounds[name] = q = QSound(sound['file'])
         if q.isFinished():
             q.setLoops(sound['loop'])
@@ -507,6 +565,9 @@ class SignalUI(TableUI):
             if len(self.sp_history) > 0:
                 if self.sp_history[-1]['time'] >= price_time:
                     return None
+                # not checked while the pair had no new price, so the stale history is dropped here
+                if price_time - self.sp_history[-1]['time'] >= timedelta(seconds=5):
+                    self.sp_history.clear()
             self.sp_history.append({
                 'time': price_time,
                 'sp': sp,
@@ -553,14 +614,16 @@ class SignalUI(TableUI):
             self.signal_checkers[key] = self.SignalChecker(instrument, pair, self.config)
         return self.signal_checkers[key]
 
-    def on_data(self, data: dict):
+    def on_data(self, data: dict, instruments: Set[str] = None):
+        """check signals of instruments (all if None)"""
         accounts = data.get('accounts', {})
-        instruments = set()
+        all_instruments = set()
         all_prices = defaultdict(dict)
         for name, instrument_prices in data.get('prices', {}).items():
             for instrument, price in instrument_prices.items():
-                instruments.add(instrument)
+                all_instruments.add(instrument)
                 all_prices[instrument][name] = price
+        instruments = all_instruments if instruments is None else all_instruments & instruments
         for instrument in instruments:
             prices = all_prices[instrument]
             names = tuple(prices.keys())
@@ -621,6 +684,22 @@ class GUINode(DataNode):
         self.data_q = Queue()
         self.accounts = {}
         self.prices = defaultdict(dict)
+        # changed since the last update_data
+        self._dirty_lock = threading.Lock()
+        self._dirty_accounts = set()  # type: Set[str]
+        self._dirty_prices = set()  # type: Set[Tuple[str, str]]
+        self._dirty_all = True
+        self._live_prices = set()  # type: Set[Tuple[str, str]]
+        # (broker, instrument) reported stale by the hub
+        self._stale_feeds = set()  # type: Set[Tuple[str, str]]
+        self.latencies = LatencyRecorder()
+
+    def get_latencies(self) -> dict:
+        """latency summaries by broker and hop up to subscriber_received"""
+        return self.latencies.summary()
+
+    def reset_latencies(self):
+        self.latencies.reset()
 
     @classmethod
     def new_object(cls, name: str, obj_type: Type[QObject], *args, **kwargs):
@@ -721,16 +800,18 @@ class GUINode(DataNode):
             prefix = 'price[{}]'.format(i)
             price_ui = self.new_object(prefix, PriceUI, prefix, self.config)
             price_ui.setContentsMargins(0, 0, 0, 0)
+            price_ui.instruments.currentTextChanged.connect(lambda _: self.invalidate())
             price_ui_list.append(price_ui)
             splitter.addWidget(price_ui_list[i])
         self.price_ui_list = price_ui_list
 
         update_interval = self.new_object('update_interval', DoubleSpinBoxUI,
-                                          value=0.5,
+                                          value=0.05,
                                           min=0.01, max=10.0, decimals=2, single_step=0.01)
 
         adjust = self.new_object('adjust', DoubleSpinBoxUI, value=0.0, min=-10000000, max=10000000, decimals=0,
                                  single_step=1000)
+        adjust.valueChanged.connect(lambda _: self.invalidate())
 
         # accounts
         account_ui = self.new_object('account', AccountUI, adjust)  # type: AccountUI
@@ -787,34 +868,72 @@ class GUINode(DataNode):
         self.stop()
         sys.exit(status)
 
+    def invalidate(self):
+        """redraw every view on the next update_data"""
+        self._dirty_all = True
+
     def update_data(self):
+        # Price/Account are immutable, so shallow copies are enough
+        with self._dirty_lock:
+            dirty_accounts, self._dirty_accounts = self._dirty_accounts, set()
+            dirty_prices, self._dirty_prices = self._dirty_prices, set()
+            dirty_all, self._dirty_all = self._dirty_all, False
+            accounts = dict(self.accounts)
+            all_prices = {name: dict(instrument_v) for name, instrument_v in self.prices.items()}
+            stale_feeds = set(self._stale_feeds)
+
         prices = {}
-        now = jst_now_aware()
-        for name, instrument_v in copy.deepcopy(self.prices).items():
+        live_prices = set()
+        expired_at = jst_now_aware() - timedelta(seconds=10)
+        for name, instrument_v in all_prices.items():
             for instrument, price in instrument_v.items():
-                if price.time >= now - timedelta(seconds=10):
+                if price.time >= expired_at and (name, instrument) not in stale_feeds:
                     prices.setdefault(name, {})[instrument] = price
+                    live_prices.add((name, instrument))
+        # prices that expired (or came back) since the last update change the views too
+        dirty_prices |= live_prices ^ self._live_prices
+        self._live_prices = live_prices
+
+        if not (dirty_all or dirty_accounts or dirty_prices):
+            return
         data = {
-            'accounts': copy.deepcopy(self.accounts),
+            'accounts': accounts,
             'prices': prices,
         }
-        self.account_ui.on_data(data)
+        dirty_instruments = {instrument for _, instrument in dirty_prices}
+        if dirty_all or dirty_accounts:
+            self.account_ui.on_data(data)
         for price_table in self.price_ui_list:
-            price_table.on_data(data)
-        self.signals.on_data(data)
+            if dirty_all or dirty_accounts or price_table.instrument in dirty_instruments:
+                price_table.on_data(data)
+        if dirty_instruments:
+            self.signals.on_data(data, dirty_instruments)
 
     def handle_udp(self, request, address):
         data, _ = request
+        received_at = time.time()
         unpacked = unpack_from_bytes(data)
         if isinstance(unpacked, dict):
-            for k, v_dict in unpacked.items():
-                if k == 'accounts':
-                    for name, v in v_dict.items():
-                        self.accounts[name] = Account(*v)
-                if k == 'prices':
-                    for name, instrument_v in v_dict.items():
-                        for instrument, v in instrument_v.items():
-                            self.prices[name][instrument] = Price(*v)
+            for name, stamps in (unpacked.get('stamps') or {}).items():
+                self.latencies.record(name, dict(stamps, subscriber_received=received_at))
+            with self._dirty_lock:
+                for k, v_dict in unpacked.items():
+                    if k == 'accounts':
+                        for name, v in v_dict.items():
+                            self.accounts[name] = Account.make(v)
+                            self._dirty_accounts.add(name)
+                    if k == 'prices':
+                        for name, instrument_v in v_dict.items():
+                            for instrument, v in instrument_v.items():
+                                self.prices[name][instrument] = Price.make(v)
+                                self._dirty_prices.add((name, instrument))
+                    if k == 'feeds':
+                        for event in v_dict:
+                            key = tuple(event['key'])
+                            if event['stale']:
+                                self._stale_feeds.add(key)
+                            else:
+                                self._stale_feeds.discard(key)
 
 
 def main():
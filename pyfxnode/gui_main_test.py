@@ -0,0 +1,47 @@
+import os
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from gui_main import TableModel
+
+
+@pytest.fixture(scope='module')
+def app():
+    # no display needed
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return QApplication.instance() or QApplication([])
+
+
+def test_table_model_set_rows(app):
+    model = TableModel(['a', 'b', 'c'])
+    signals = []
+    model.dataChanged.connect(lambda top, bottom, *_: signals.append(
+        ('changed', top.row(), top.column(), bottom.row(), bottom.column())))
+    model.rowsInserted.connect(lambda parent, first, last: signals.append(('inserted', first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: signals.append(('removed', first, last)))
+
+    model.set_rows([[1, 2, 3], [4, 5, 6]])
+    assert signals == [('inserted', 0, 1)]
+    assert model.rowCount() == 2
+
+    # unchanged rows emit nothing
+    signals.clear()
+    model.set_rows([[1, 2, 3], [4, 5, 6]])
+    assert signals == []
+
+    # only the changed cells of each row, by dict rows and cell dicts too
+    model.set_rows([[1, 20, 3], {'a': 4, 'b': 5, 'c': {'value': 60, 'bg': None}}])
+    assert signals == [('changed', 0, 1, 0, 1), ('changed', 1, 2, 1, 2)]
+    assert model.index(0, 1).data() == 20
+    assert model.index(1, 2).data() == 60
+
+    signals.clear()
+    model.set_rows([[1, 20, 3], {'a': 4, 'b': 5, 'c': {'value': 60, 'bg': None}}, [7, 8, 9]])
+    assert signals == [('inserted', 2, 2)]
+
+    signals.clear()
+    model.set_rows([[10, 20, 30]])
+    assert signals == [('removed', 1, 2), ('changed', 0, 0, 0, 2)]
+    assert model.rowCount() == 1
+    assert [model.index(0, j).data() for j in range(3)] == [10, 20, 30]
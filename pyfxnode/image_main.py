@@ -0,0 +1,58 @@
+import logging
+import sys
+
+import time
+from docopt import docopt
+
+from pyfxnode.imagenode import ImageNode, CharDecoder, PNGSource, WindowSource
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s|%(name)s|%(levelname)s| %(message)s')
+    args = docopt("""
+    Usage:
+      {f} [options] NAME [TITLE_RE...]
+
+    Options:
+      --bind IP_PORT  [default: 127.0.0.1:10200]
+      --hub IP_PORT  [default: 127.0.0.1:10000]
+      --png-dir DIR  capture png files of DIR in turn instead of windows
+      --model-dir DIR  [default: .]
+      --interval SEC  [default: 0.5]
+      --workers N  [default: 2]
+    """.format(f=sys.argv[0]))
+
+    name = args['NAME']
+    l = args['--bind'].split(':')
+    address = (l[0], int(l[1]))
+
+    hub_addresses = [(hub_address.split(':')[0], int(hub_address.split(':')[1])) for hub_address in
+                     args['--hub'].split(',')]
+
+    if args['--png-dir']:
+        sources = {args['--png-dir']: PNGSource(args['--png-dir'])}
+    else:
+        sources = {title_re: WindowSource(title_re) for title_re in args['TITLE_RE']}
+
+    node = ImageNode(name, address,
+                     hub_addresses=hub_addresses,
+                     sources=sources,
+                     decoder=CharDecoder(args['--model-dir'], name),
+                     interval=float(args['--interval']),
+                     workers=int(args['--workers']))
+    try:
+        node.start()
+        while node.is_running():
+            time.sleep(10)
+            node.info('capture {}'.format(node.get_capture_metrics()))
+    finally:
+        node.stop()
+        # shuts the workers down and unlinks the shared memory of the frames
+        node.join()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
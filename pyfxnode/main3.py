@@ -17,7 +17,6 @@ import pytz
 from PyQt5.QtCore import *
 from PyQt5.QtGui import QBrush
 from PyQt5.QtGui import QCloseEvent
-from PyQt5.QtMultimedia import QSound
 from PyQt5.QtWidgets import *
 from docopt import docopt
 from gevent import monkey as _monkey
@@ -310,6 +309,8 @@ class SoundPlayer(ConfigurableMixin, QWidget):
         q = self.q_sounds.get(name)
         finished = False
         if not q:
+            # QtMultimedia loads its backends, only GUIs playing sounds pay for it
+            from PyQt5.QtMultimedia import QSound
             self.q_sounds[name] = q = QSound(sound['file'])
             finished = True
         if q.isFinished() or finished:
@@ -1,21 +1,28 @@
-import json
 import logging
 import re
 import sys
 
 import time
+from typing import Optional
+
 from docopt import docopt
 from mitmproxy.http import HTTPFlow
 
 from pyfxnode.account import Account
+from pyfxnode.dispatcher import ProxyResponse
+from pyfxnode.framedecoder import iter_fxc_prices, loads
 from pyfxnode.price import Price
 from pyfxnode.utils import jst_now_aware
 from pyfxnode.webnode import WebNode
 
+PRICE_LIST_RE = re.compile('var priceList = (.*?);')
+
 
 class Minfx(WebNode):
     NAME = 'minfx'
     PRICE_URL = 'https://fxlive.min-fx.tv/fxcbroadcast/rpc/FxCPullBsController?'
+    DISPATCH_URLS = (PRICE_URL,)
+    POLL_INTERVALS = {PRICE_URL: 0.5}
 
     accounts = {
         NAME: Account(NAME),
@@ -28,7 +35,13 @@ class Minfx(WebNode):
         if req.method == 'GET':
             if req.pretty_url.startswith(self.PRICE_URL):
                 data = self.parse_prices(res.text)
-                self.push_data(accounts=self.accounts, **data)
+                self.push_data(accounts=self.accounts, stamps=self.stamps(res.timestamp_end), **data)
+
+    def parse_dispatched_response(self, response: ProxyResponse) -> Optional[dict]:
+        if response.method == 'GET' and response.url.startswith(self.PRICE_URL):
+            return dict(accounts=self.accounts, stamps=self.stamps(response.received_at),
+                        **self.parse_prices(response.text))
+        return None
 
     def parse_prices(self, content: str) -> dict:
         """
@@ -54,17 +67,13 @@ class Minfx(WebNode):
         try:
             if not content:
                 return {}
-            m = re.search('var priceList = (.*?);', content)
+            m = PRICE_LIST_RE.search(content)
             if not m:
                 print('not m')
                 return {}
             prices = {}
             now = jst_now_aware()
-            data = json.loads(m.group(1))
-            for price_info in data.get('priceList', []):
-                instrument = price_info['currencyPair']
-                ask = float(price_info['ask']['price'])
-                bid = float(price_info['bid']['price'])
+            for instrument, bid, ask in iter_fxc_prices(loads(m.group(1))):
                 price = Price(self.NAME, instrument=instrument, time=now, bid=bid, ask=ask)
                 prices.setdefault(self.NAME, {})[instrument] = price
             return dict(prices=prices)
@@ -85,6 +94,9 @@ def main():
                   --proxy IP_PORT  [default: 127.0.0.1:8089]
                   --chrome IP_PORT  [default: 127.0.0.1:11009]
                   --hub IP_PORT  [default: 127.0.0.1:10000]
+                  --dispatch  parse rates in a worker process
+                  --capture  capture rates from chrome's Network domain without the proxy
+                  --poll  poll rates at POLL_INTERVALS besides the browser
                 """.format(f=sys.argv[0]))
 
     l = args['--bind'].split(':')
@@ -100,9 +112,12 @@ def main():
                      args['--hub'].split(',')]
 
     node = Minfx(Minfx.NAME, address,
-                 proxy_address=proxy_address,
+                 proxy_address=None if args['--capture'] else proxy_address,
                  chrome_address=chrome_address,
-                 hub_addresses=hub_addresses)
+                 hub_addresses=hub_addresses,
+                 dispatch=args['--dispatch'],
+                 capture=args['--capture'],
+                 poll=args['--poll'])
     try:
         node.start()
         while node.is_running():
@@ -1,22 +1,42 @@
-import json
 import logging
 import sys
 
 import time
+from typing import Iterator, Tuple
+
 from docopt import docopt
 from mitmproxy.http import HTTPFlow
-from mitmproxy.websocket import WebSocketFlow
 
 from pyfxnode.account import Account
-from pyfxnode.price import Price
-from pyfxnode.utils import jst_now_aware
+from pyfxnode.framedecoder import loads
 from pyfxnode.webnode import WebNode
+from pyfxnode.websocketrouter import WebSocketDecoder
+
+
+class QuoteDecoder(WebSocketDecoder):
+    """QUOTE events of the realtime websocket, one json document per message
+
+    {"event": "QUOTE", "data": [[_, instrument code, _, _, ask, bid, ...], ...]}
+    """
+
+    def decode(self, payload: memoryview) -> Iterator[Tuple[str, float, float]]:
+        message = loads(payload)
+        if message.get('event') != 'QUOTE':
+            return
+        for quote in message['data']:
+            instrument = Minsys.INSTRUMENT_CODES.get(quote[1])
+            if instrument:
+                yield instrument, float(quote[5]), float(quote[4])
 
 
 class Minsys(WebNode):
     NAME = 'minSys'
-    # WS_RATE_URL = 'wss://fxtrader.min-fx.tv/express/rest/realtime?'
-    WS_RATE_URL = 'fxtrader.min-fx.tv:443/express/rest/realtime?'
+    WS_RATE_URL = 'wss://fxtrader.min-fx.tv/express/rest/realtime?'
+    # the proxy sees the handshake url by https
+    WEBSOCKET_DECODERS = {
+        WS_RATE_URL: (NAME, QuoteDecoder),
+        'https://fxtrader.min-fx.tv/express/rest/realtime?': (NAME, QuoteDecoder),
+    }
 
     accounts = {
         NAME: Account(NAME),
@@ -25,19 +45,11 @@ class Minsys(WebNode):
     def handle_response_header(self, flow: HTTPFlow):
         req = flow.request
         res = flow.response
-        if req.pretty_url.startswith(self.WS_RATE_URL):
+        if req.pretty_url.startswith(tuple(self.WEBSOCKET_DECODERS)):
             pass
         else:
             res.stream = True
 
-    def handle_response(self, flow: HTTPFlow):
-        req = flow.request
-        # res = flow.response
-
-        if req.method == 'GET':
-            if req.pretty_url.startswith(self.WS_RATE_URL):
-                pass
-
     INSTRUMENT_CODES = {
         1: 'USD/JPY',
         2: 'EUR/JPY',
@@ -59,35 +71,6 @@ class Minsys(WebNode):
         18: 'GBP/CHF',
     }
 
-    def handle_websocket_message(self, flow: WebSocketFlow):
-        content = None
-        try:
-            addr = '{}{}'.format(flow.server_conn.address, flow.handshake_flow.request.path)
-            if not addr.startswith(self.WS_RATE_URL):
-                return
-            content = flow.messages[-1].content  # type: bytes
-            if not content:
-                return
-            message = json.loads(content.decode('utf-8'))
-            if 'event' not in message and message['event'] != 'QUOTE':
-                return
-            data = message['data']
-            prices = {}
-            now = jst_now_aware()
-            for quote in data:
-                code = quote[1]
-                if code not in self.INSTRUMENT_CODES:
-                    continue
-                instrument = self.INSTRUMENT_CODES[code]
-                ask = float(quote[4])
-                bid = float(quote[5])
-                price = Price(self.NAME, instrument=instrument, time=now, bid=bid, ask=ask)
-                prices.setdefault(self.NAME, {})[instrument] = price
-
-            self.push_data(accounts=self.accounts, prices=prices)
-        except Exception as e:
-            self.exception(str(e) + 'message={}'.format(content))
-
 
 def main():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s|%(name)s|%(levelname)s| %(message)s')
@@ -100,6 +83,7 @@ def main():
                       --proxy IP_PORT  [default: 127.0.0.1:8090]
                       --chrome IP_PORT  [default: 127.0.0.1:11010]
                       --hub IP_PORT  [default: 127.0.0.1:10000]
+                      --capture  capture rates from chrome's Network domain without the proxy
                     """.format(f=sys.argv[0]))
 
     l = args['--bind'].split(':')
@@ -115,9 +99,10 @@ def main():
                      args['--hub'].split(',')]
 
     node = Minsys(Minsys.NAME, address,
-                  proxy_address=proxy_address,
+                  proxy_address=None if args['--capture'] else proxy_address,
                   chrome_address=chrome_address,
-                  hub_addresses=hub_addresses)
+                  hub_addresses=hub_addresses,
+                  capture=args['--capture'])
     try:
         node.start()
         while node.is_running():
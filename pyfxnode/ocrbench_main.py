@@ -0,0 +1,48 @@
+import functools
+import logging
+import sys
+
+from docopt import docopt
+
+from ocrutil import ocrbench
+
+from pyfxnode.imagenode import CharDecoder
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s|%(name)s|%(levelname)s| %(message)s')
+    args = docopt("""
+    Usage:
+      {f} [options] CORPUS_DIR
+
+    Options:
+      --model-dir DIR  [default: .]
+      --repeat N  [default: 3]
+      --output FILE  [default: ocrbench.json]
+      --baseline FILE  compare with the output of a previous run
+    """.format(f=sys.argv[0]))
+
+    corpus = ocrbench.load_corpus(args['CORPUS_DIR'])
+    model_dir = args['--model-dir']
+    # one headless recognizer per broker, its glyph cache warms up in the first pass
+    result = ocrbench.run(corpus, lambda name: functools.partial(CharDecoder(model_dir, name), ''),
+                          repeat=int(args['--repeat']))
+    ocrbench.save(result, args['--output'])
+
+    baseline = ocrbench.load(args['--baseline']) if args['--baseline'] else None
+    diff = ocrbench.compare(baseline, result) if baseline else {}
+    for name, r in result['brokers'].items():
+        print('# {} frames:{} field_accuracy:{} frames/s:{:.1f} glyphs/s:{:.1f} p50:{:.6f} p99:{:.6f}'.format(
+            name, r['frames'], r['field_accuracy'], r['frames_per_sec'] or 0, r['glyphs_per_sec'] or 0,
+            r['latency']['p50'] or 0, r['latency']['p99'] or 0))
+        for k, (old, new) in diff.get(name, {}).items():
+            print('#   {}: {} -> {}'.format(k, old, new))
+        for error in r['errors']:
+            print('#   {}'.format(error))
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
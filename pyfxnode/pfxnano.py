@@ -1,19 +1,17 @@
-import json
 import logging
 import re
 import sys
-import threading
 import time
 from io import StringIO
 from typing import Dict
 
 import lxml.html
-import pychrome
 import yaml
 from docopt import docopt
 from mitmproxy.http import HTTPFlow
 
 from pyfxnode.account import Account
+from pyfxnode.framedecoder import FrameDecoder, iter_fxc_prices, loads
 from pyfxnode.price import Price
 from pyfxnode.webnode import WebNode
 
@@ -26,6 +24,7 @@ class Pfxnano(WebNode):
     NANO_SIMPLE_URL = 'https://trade-nano1.moneypartners.co.jp/quick/app/simpleBoardHome'
 
     PFX_PRICE_URL = 'https://trade.moneypartners.co.jp/fxcbroadcast/rpc/FxCAjaxPushBsController?'
+    # no --capture: prices are pushed by streamed responses, whose bodies chrome hands over only when they finish
 
     accounts = {
         'nano': Account('nano'),
@@ -35,22 +34,9 @@ class Pfxnano(WebNode):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.position_pl = {}  # type: Dict[str, float]
-        threading.Thread(target=lambda: self.poll_chrome(5.0), daemon=True).start()
+        self.watch_chrome(self.NANO_SIMPLE_URL, '.newOrderPanel', self.on_positions)
 
-    def poll_chrome(self, interval: float):
-        if not self.chrome:
-            self.warning('no chrome driver')
-            return
-        while True:
-            try:
-                for conn in self.chrome.connections(re.escape(self.NANO_SIMPLE_URL)):
-                    self.on_positions(conn)
-            except Exception as e:
-                self.exception(str(e))
-            time.sleep(interval)
-
-    def on_positions(self, conn: pychrome.Connection):
-        html = conn.get_html(css_selector='.newOrderPanel')
+    def on_positions(self, html: str):
         dom = lxml.html.fromstring(html)
         instrument = dom.cssselect('.selectBox.currencyPair span')[0].text_content()[:7]
         bid_amount = dom.cssselect('span[uifield="bidTotalAmount"]')[0].text_content().replace(',', '')
@@ -93,68 +79,32 @@ class Pfxnano(WebNode):
                 res.stream = True
 
     def process_nano_chunks(self, chunks):
-        #        now = datetime.utcnow()
-        #        with open('{}_{}_dump.txt'.format(self.NAME, now.strftime('%Y%m%dT%H%M%S%f')), 'w') as f:
-        name = 'nano'
-        chunk = b''
-        for new_chunk in chunks:
-            if not self.is_running():
-                return
-            try:
-                chunk += new_chunk
-                prices = {}
-                split_chunks = chunk.split(b';;')
-                for chunk in split_chunks[:-1]:
-                    try:
-                        d = json.loads(chunk.decode('utf-8'))  # type: dict
-                        for price_data in d.get('priceList', []):
-                            price_data = price_data['priceData']
-                            bid = price_data['bid']
-                            ask = price_data['ask']
-                            # label = bid['priceId'], ask['priceId']
-                            instrument = price_data['currencyPair']
-                            price = Price(name, instrument, float(bid['price']), float(ask['price']))
-                            prices.setdefault(name, {})[instrument] = price
-                    except Exception as e:
-                        self.exception('{}\nchunk={}'.format(str(e), chunk))
-                chunk = split_chunks[-1]
-                if prices:
-                    self.push_data(prices=prices)
-            except Exception as e:
-                self.exception(str(e))
-            yield new_chunk
+        return self.process_price_chunks('nano', chunks)
 
     def process_pfx_chunks(self, chunks):
+        return self.process_price_chunks('pfx', chunks)
+
+    def process_price_chunks(self, name: str, chunks):
         #        now = datetime.utcnow()
         #        with open('{}_{}_dump.txt'.format(self.NAME, now.strftime('%Y%m%dT%H%M%S%f')), 'w') as f:
-        name = 'pfx'
-        chunk = b''
-        for new_chunk in chunks:
+        decoder = FrameDecoder(b';;')
+        for chunk in chunks:
             if not self.is_running():
                 return
             try:
-                chunk += new_chunk
+                received_at = time.time()
                 prices = {}
-                split_chunks = chunk.split(b';;')
-                for chunk in split_chunks[:-1]:
+                for frame in decoder.feed(chunk):
                     try:
-                        d = json.loads(chunk.decode('utf-8'))  # type: dict
-                        for price_data in d.get('priceList', []):
-                            price_data = price_data['priceData']
-                            bid = price_data['bid']
-                            ask = price_data['ask']
-                            # label = bid['priceId'], ask['priceId']
-                            instrument = price_data['currencyPair']
-                            price = Price(name, instrument, float(bid['price']), float(ask['price']))
-                            prices.setdefault(name, {})[instrument] = price
+                        for instrument, bid, ask in iter_fxc_prices(loads(frame)):
+                            prices.setdefault(name, {})[instrument] = Price(name, instrument, bid, ask)
                     except Exception as e:
-                        self.exception('{}\nchunk={}'.format(str(e), chunk))
-                chunk = split_chunks[-1]
+                        self.exception('{}\nframe={}'.format(str(e), frame))
                 if prices:
-                    self.push_data(prices=prices)
+                    self.push_data(prices=prices, stamps=self.stamps(received_at))
             except Exception as e:
                 self.exception(str(e))
-            yield new_chunk
+            yield chunk
 
     def handle_response(self, flow: HTTPFlow):
         req = flow.request
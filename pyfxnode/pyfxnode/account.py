@@ -15,7 +15,7 @@ class Account(NamedTupleMixin,
             'equity': (0, float),
             'profit_loss': (0, float),
             'used_margin': (0, float),
-            'positions': ({}, dict),
+            'positions': (dict, dict),
             'time': (utc_now_aware, parse_datetime),
         }
 
@@ -17,3 +17,6 @@ def test_account():
 
     j = a.to_json()
     assert a == a.from_json(j)
+
+    assert Account('acc').positions is not Account('acc').positions
+    assert Account.make(a) == a
@@ -1,50 +1,80 @@
 import glob
 import hashlib
+import itertools
 import logging
 import os
 import pickle
-import random
+from concurrent.futures import ProcessPoolExecutor
 from typing import Tuple, List
 
-import keras
 import numpy as np
 from PIL import Image
 
+from ocrutil import GlyphCache, NumpyClassifier, binarize, crop_first, glyph_array, glyph_spans, read_fields, \
+    trim_margin
+
 from pyfxnode.utils import jst_now_aware
-from .deeputils import Classifier
+from .traindata import TrainData, unique_glyphs
 
 
 class CharRecognizer:
     CHAR_FILE = 'char.h5'
     WIDTH_FILE = 'width.h5'
+    CHAR_NPZ = 'char.npz'
+    WIDTH_NPZ = 'width.npz'
     TRAIN_FILE = 'train.pickle'
+    TRAIN_NPZ = TrainData.FILE
     C_WIDTH = 16
     C_HEIGHT = 16
     C_NUM = 128
 
-    def __init__(self, dir_path: str):
+    def __init__(self, dir_path: str, *, headless: bool = False):
+        """headless: classify by the exported .npz models without Keras, which cannot train"""
         self.dir_path = dir_path
-        try:
-            self.char = Classifier.load(os.path.join(dir_path, self.CHAR_FILE))
-        except FileNotFoundError:
-            self.char = Classifier(self.C_WIDTH * self.C_HEIGHT, 100, 100, self.C_NUM)
-        try:
-            self.width = Classifier.load(os.path.join(dir_path, self.WIDTH_FILE))
-        except FileNotFoundError:
-            self.width = Classifier(self.C_WIDTH * self.C_HEIGHT, 100, 100, self.C_WIDTH + 1)
+        self.headless = headless
+        if headless:
+            self.char = NumpyClassifier.load(os.path.join(dir_path, self.CHAR_NPZ))
+            self.width = NumpyClassifier.load(os.path.join(dir_path, self.WIDTH_NPZ))
+        else:
+            from .deeputils import Classifier
+            try:
+                self.char = Classifier.load(os.path.join(dir_path, self.CHAR_FILE))
+            except FileNotFoundError:
+                self.char = Classifier(self.C_WIDTH * self.C_HEIGHT, 100, 100, self.C_NUM)
+            try:
+                self.width = Classifier.load(os.path.join(dir_path, self.WIDTH_FILE))
+            except FileNotFoundError:
+                self.width = Classifier(self.C_WIDTH * self.C_HEIGHT, 100, 100, self.C_WIDTH + 1)
+        self.glyphs = GlyphCache().load(os.path.join(dir_path, GlyphCache.FILE))
+
+    def _classify(self, arr: np.ndarray) -> Tuple[str, int]:
+        x = arr.flatten()
+        return chr(int(self.char.classify_one(x))), int(self.width.classify_one(x))
 
     def classify(self, arr: np.ndarray) -> Tuple[str, int]:
-        char = chr(self.char.classify_one(arr))
-        width = self.char.classify_one(arr)
-        return char, width
+        return self.glyphs.lookup(arr, self._classify)
+
+    def classify_many(self, arrs: np.ndarray) -> List[Tuple[str, int]]:
+        x = arrs.reshape(len(arrs), -1)
+        return [(chr(int(c)), int(w)) for c, w in zip(self.char.classify(x), self.width.classify(x))]
 
     def save(self):
         os.makedirs(self.dir_path, exist_ok=True)
+        if self.headless:
+            self.glyphs.save(os.path.join(self.dir_path, GlyphCache.FILE))
+            return
         now = jst_now_aware()
         self.char.save(os.path.join(self.dir_path, self.CHAR_FILE))
         self.char.save(os.path.join(self.dir_path, '{}.{}'.format(self.CHAR_FILE, now.strftime('%Y%m%dT%H%M%S'))))
         self.width.save(os.path.join(self.dir_path, self.WIDTH_FILE))
         self.width.save(os.path.join(self.dir_path, '{}.{}'.format(self.WIDTH_FILE, now.strftime('%Y%m%dT%H%M%S'))))
+        self.glyphs.save(os.path.join(self.dir_path, GlyphCache.FILE))
+        self.export()
+
+    def export(self):
+        """save the models as .npz for headless recognizers"""
+        self.char.export(os.path.join(self.dir_path, self.CHAR_NPZ))
+        self.width.export(os.path.join(self.dir_path, self.WIDTH_NPZ))
 
     @classmethod
     def get_boxes(cls, name: str):
@@ -78,46 +108,35 @@ class CharRecognizer:
             assert False, name
 
     @classmethod
-    def gen_arrays(cls, name: str, img: Image.Image, box: Tuple[int, int, int, int], verbose: bool = False):
-        def filter_avg(_img: Image.Image):
-            colors = _img.getcolors()
-            colors.sort(key=lambda x: x[1])
-            px_count = _img.size[0] * _img.size[1]
-            total = 0
-            for count, color in reversed(colors):
-                total += count * color
-            avg = total / px_count
-            bg = _img.getpixel((0, 0))
-            if bg <= avg:
-                _img = _img.point(lambda px: 0 if px <= avg else 255)
-            else:
-                _img = _img.point(lambda px: 0 if px > avg else 255)
-            return _img
-
-        image_filter = filter_avg
-
-        img = img.crop(box).convert('L')
-        img = image_filter(img)
+    def crop_field(cls, gray: np.ndarray, box: Tuple[int, int, int, int], verbose: bool = False) -> np.ndarray:
+        """binarized and trimmed box of a grayscale frame"""
+        left, top, right, bottom = box
+        field = binarize(gray[top:bottom, left:right])
         if verbose:
-            cls.print_image(img)
-        img = img.crop(img.getbbox())
-        if img.size[1] > cls.C_HEIGHT:
+            cls.print_image(Image.fromarray(np.uint8(field)))
+        field = trim_margin(field)
+        if field.shape[0] > cls.C_HEIGHT:
+            img = Image.fromarray(np.uint8(field))
             img.thumbnail((img.size[0], cls.C_HEIGHT))
+            field = np.asarray(img, dtype=np.float32)
+        return field
+
+    @classmethod
+    def gen_field_arrays(cls, field: np.ndarray):
+        left = 0
         while True:
-            bbox = img.getbbox()
-            if bbox is None:
+            cols = np.flatnonzero(field[:, left:].any(axis=0))
+            if not len(cols):
                 break
-            cropped = img.crop((bbox[0], 0, bbox[0] + cls.C_WIDTH, cls.C_HEIGHT))
-            arr = np.asarray(cropped, dtype=np.float32)
-            arr.flags.writeable = True
-            col_sums = arr.sum(axis=0).flatten()
-            for j, col_sum in enumerate(col_sums):
-                if not col_sum:
-                    arr[:, j:] = 0
-                    break
-            shift_width = yield arr
-            assert shift_width, img
-            img = img.crop((bbox[0] + shift_width, 0, img.size[0], img.size[1]))
+            left += cols[0]
+            shift_width = yield crop_first(field[:, left:], cls.C_WIDTH, cls.C_HEIGHT)
+            assert shift_width, field
+            left += shift_width
+
+    @classmethod
+    def gen_arrays(cls, name: str, img: Image.Image, box: Tuple[int, int, int, int], verbose: bool = False):
+        gray = np.asarray(img.convert('L'))
+        return cls.gen_field_arrays(cls.crop_field(gray, box, verbose=verbose))
 
     @classmethod
     def print_image(cls, img: Image.Image):
@@ -182,21 +201,62 @@ class CharRecognizer:
             pickle.dump(train_data, f)
             logging.info('dump train_data to {}'.format(cls.TRAIN_FILE))
 
+    @classmethod
+    def png_glyphs(cls, png_path: str, boxes: List[Tuple[int, int, int, int]]) -> np.ndarray:
+        """distinct glyph inputs of the boxes of a png, segmented at blank columns"""
+        with Image.open(png_path) as img:
+            gray = np.asarray(img.convert('L'))
+        glyphs = [np.zeros((0, cls.C_HEIGHT, cls.C_WIDTH), dtype=np.uint8)]
+        for box in boxes:
+            field = cls.crop_field(gray, box)
+            glyphs.extend(glyph_array(field, start, end, cls.C_WIDTH, cls.C_HEIGHT)[np.newaxis].astype(np.uint8)
+                          for start, end in glyph_spans(field))
+        return unique_glyphs(np.concatenate(glyphs))
+
+    @classmethod
+    def load_train_data(cls) -> TrainData:
+        """TRAIN_NPZ with the glyphs labelled by make_train_data into TRAIN_FILE"""
+        try:
+            train_data = TrainData.load(cls.TRAIN_NPZ)
+        except FileNotFoundError:
+            train_data = TrainData.empty(cls.C_HEIGHT, cls.C_WIDTH)
+        try:
+            with open(cls.TRAIN_FILE, 'rb') as f:
+                train_data = train_data.merge(TrainData.from_dict(pickle.load(f), cls.C_HEIGHT, cls.C_WIDTH))
+        except FileNotFoundError:
+            pass
+        return train_data
+
+    @classmethod
+    def make_train_data_batch(cls, name: str, png_paths: List[str] = None, *, workers: int = None) -> np.ndarray:
+        """label the glyphs of all pngs by the train data without asking, return the unlabelled glyphs
+
+        The pngs are segmented in a process pool and their glyphs deduplicated before labelling. The labelled
+        ones are added to TRAIN_NPZ, the unlabelled ones are left to make_train_data.
+        """
+        png_paths = png_paths or sorted(glob.glob(os.path.join('.', '*.png')))
+        boxes = [box for k_boxes in cls.get_boxes(name) for box in k_boxes.values()]
+        glyphs = [np.zeros((0, cls.C_HEIGHT, cls.C_WIDTH), dtype=np.uint8)]
+        with ProcessPoolExecutor(workers) as executor:
+            glyphs.extend(executor.map(cls.png_glyphs, png_paths, itertools.repeat(boxes), chunksize=8))
+        glyphs = unique_glyphs(np.concatenate(glyphs))
+        train_data = cls.load_train_data()
+        labelled, unlabelled = train_data.label(glyphs)
+        train_data = train_data.merge(labelled)
+        train_data.save(cls.TRAIN_NPZ)
+        logging.info('{} pngs, {} glyphs, {} labelled, {} unlabelled'.format(
+            len(png_paths), len(glyphs), len(labelled), len(unlabelled)))
+        return unlabelled
+
     def train(self, epoch: int = 10):
-        with open(self.TRAIN_FILE, 'rb') as f:
-            train_data = pickle.load(f)
+        import keras
+        train_data = self.load_train_data()
         n = len(train_data)
 
-        x = []
-        char_y = []
-        width_y = []
-        for md5, (arr, c, shift_width) in random.sample(tuple(train_data.items()), n):
-            x.append(arr)
-            char_y.append(ord(c))
-            width_y.append(shift_width)
-        x = np.array(x)
-        char_y = keras.utils.to_categorical(char_y, self.C_NUM)
-        width_y = keras.utils.to_categorical(width_y, self.C_WIDTH + 1)
+        order = np.random.permutation(n)
+        x = train_data.x[order].reshape(n, -1).astype(np.float32)
+        char_y = keras.utils.to_categorical([ord(c) for c in train_data.chars[order]], self.C_NUM)
+        width_y = keras.utils.to_categorical(train_data.widths[order], self.C_WIDTH + 1)
 
         train_n = n * 9 // 10
         test_n = n - train_n
@@ -210,25 +270,35 @@ class CharRecognizer:
 
         self.char.train(train_x, train_char_y, test_x, test_char_y, epoch=epoch)
         self.width.train(train_x, train_width_y, test_x, test_width_y, epoch=epoch)
+        # results of the old model
+        self.glyphs.clear()
+        self.glyphs.seed(train_data.to_dict())
+
+    def recognize_field(self, field: np.ndarray) -> str:
+        arr_generator = self.gen_field_arrays(field)
+        s = ''
+        try:
+            arr = arr_generator.send(None)
+            while True:
+                c, shift_width = self.classify(arr)
+                s += c
+                arr = arr_generator.send(shift_width)
+        except StopIteration:
+            pass
+        return s
 
     def recognize(self, name: str, img: Image.Image) -> List[dict]:
-        dict_list = []
         boxes = self.get_boxes(name)
+        gray = np.asarray(img.convert('L'))
+        fields = [self.crop_field(gray, box) for k_boxes in boxes for box in k_boxes.values()]
+        texts = read_fields(fields, self.classify_many, width=self.C_WIDTH, height=self.C_HEIGHT, cache=self.glyphs)
+        texts = iter(zip(fields, texts))
+        dict_list = []
         for k_boxes in boxes:
             d = {}
-            for k, box in k_boxes.items():
-                arr_generator = self.gen_arrays(name, img, box)
-                s = ''
-                try:
-                    arr = arr_generator.send(None)
-                    while True:
-                        x = arr.flatten()
-                        ord_c = self.char.classify_one(x)
-                        s += chr(ord_c)
-                        shift_width = int(self.width.classify_one(x))
-                        arr = arr_generator.send(shift_width)
-                except StopIteration:
-                    pass
-                d[k] = s
+            for k in k_boxes:
+                field, s = next(texts)
+                # touching glyphs are split by the width net
+                d[k] = self.recognize_field(field) if s is None else s
             dict_list.append(d)
         return dict_list
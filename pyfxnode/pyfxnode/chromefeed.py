@@ -0,0 +1,87 @@
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import pychrome
+
+from .dispatcher import ProxyResponse
+from .poller import HTTPPoller
+from .server import Server
+
+
+class ChromeFeed(Server):
+    """feed source capturing responses and websocket frames of chrome pages by the CDP Network domain
+
+    Bodies of urls under handler.DISPATCH_URLS and handler.CAPTURE_URLS are handed to
+    handler.handle_dispatched_response and websocket frames of handler.WEBSOCKET_DECODERS to
+    handler.handle_websocket_frame, the same parsers used behind the proxy, without a TLS intercepting proxy.
+    Requests of handler.POLL_INTERVALS are passed to poller.learn() as the proxy does.
+
+    A body is fetched by Network.getResponseBody at loadingFinished, so streamed responses which never finish, e.g.
+    xhr-streaming or chunked push, cannot be captured and still need the proxy.
+    """
+
+    def __init__(self, driver: pychrome.Driver, handler, *, poller: HTTPPoller = None, url_re: str = '.*',
+                 interval: float = 5.0, logger: logging.Logger = None):
+        super().__init__(logger=logger)
+        self._driver = driver
+        self._handler = handler
+        self._poller = poller
+        self._url_re = url_re
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self.run, name=self.logger.name, daemon=True)
+
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    @property
+    def server_address(self) -> Tuple[str, int]:
+        return self._driver.address
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+
+    def join(self, timeout: float = None):
+        self._thread.join(timeout)
+
+    def run(self):
+        url_prefixes = tuple(getattr(self._handler, 'DISPATCH_URLS', ())) + \
+            tuple(getattr(self._handler, 'CAPTURE_URLS', ())) + \
+            tuple(getattr(self._handler, 'WEBSOCKET_DECODERS', ()))
+        if self._poller:
+            url_prefixes += tuple(getattr(self._handler, 'POLL_INTERVALS', ()))
+        captured = set()
+        while not self._stop_event.is_set():
+            try:
+                captured = {conn for conn in captured if conn.is_connected()}
+                for conn in self._driver.connections(self._url_re):
+                    if conn not in captured:
+                        self.info('capture {}'.format(url_prefixes))
+                        conn.capture_network(url_prefixes, self.on_body, self.on_websocket_frame,
+                                             self.on_request if self._poller else None)
+                        captured.add(conn)
+            except Exception as e:
+                self.exception(str(e))
+            self._stop_event.wait(self._interval)
+
+    def on_body(self, method: str, url: str, body: bytes, content_type: str, received_at: float):
+        try:
+            self._handler.handle_dispatched_response(ProxyResponse(method, url, body, '', content_type, received_at))
+        except Exception as e:
+            self.exception('{} {}'.format(url, str(e)))
+
+    def on_request(self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]):
+        try:
+            self._poller.learn(url, method, headers, body)
+        except Exception as e:
+            self.exception('{} {}'.format(url, str(e)))
+
+    def on_websocket_frame(self, url: str, payload: bytes, received_at: float):
+        try:
+            self._handler.handle_websocket_frame(url, payload, received_at)
+        except Exception as e:
+            self.exception('{} {}'.format(url, str(e)))
@@ -0,0 +1,76 @@
+import base64
+import time
+from queue import Queue
+
+import pychrome
+from pychrome.test_utils import FakeCDPServer
+
+from pyfxnode.chromefeed import ChromeFeed
+from pyfxnode.dispatcher import ProxyResponse
+from pyfxnode.poller import HTTPPoller
+
+
+def test_chrome_feed():
+    def handle_command(method: str, params: dict) -> dict:
+        if method == 'Network.getResponseBody':
+            if params['requestId'] == '1':
+                return {'body': 'USD/JPY,112.6', 'base64Encoded': False}
+            return {'body': base64.b64encode(b'\x00\x01').decode(), 'base64Encoded': True}
+        return {}
+
+    server = FakeCDPServer(handle_command, targets=[{'id': 'A', 'type': 'page', 'url': 'https://broker/'}])
+    q = Queue()
+
+    class Handler:
+        DISPATCH_URLS = ('https://broker/rate', 'wss://broker/stream')
+        CAPTURE_URLS = ('https://broker/account',)
+        POLL_INTERVALS = {'https://broker/poll': 1.0}
+
+        def handle_dispatched_response(self, response: ProxyResponse):
+            q.put(('body', response.method, response.url, response.text, response.content_type))
+
+        def handle_websocket_frame(self, url: str, payload: bytes, received_at: float):
+            q.put(('frame', url, payload))
+
+    # not started, only learns
+    poller = HTTPPoller(Handler())
+    feed = ChromeFeed(pychrome.Driver(server.address), Handler(), poller=poller)
+    feed.start()
+    try:
+        for _ in range(100):
+            if any(data['method'] == 'Network.enable' for data in server.received):
+                break
+            time.sleep(0.01)
+
+        response = {'mimeType': 'text/plain', 'headers': {'Content-Type': 'text/plain; charset=Shift_JIS'}}
+        for request_id, url in (('1', 'https://broker/rate?x'), ('2', 'https://broker/other'),
+                                ('3', 'https://broker/rate.bin'), ('6', 'https://broker/account')):
+            server.emit('Network.requestWillBeSent', requestId=request_id, request={'method': 'POST', 'url': url})
+            server.emit('Network.responseReceived', requestId=request_id, response=response)
+            server.emit('Network.loadingFinished', requestId=request_id)
+        assert q.get(timeout=1) == ('body', 'POST', 'https://broker/rate?x', 'USD/JPY,112.6',
+                                    'text/plain; charset=utf-8')
+        assert q.get(timeout=1)[:3] == ('body', 'POST', 'https://broker/rate.bin')
+        assert q.get(timeout=1)[:3] == ('body', 'POST', 'https://broker/account')
+
+        server.emit('Network.webSocketCreated', requestId='4', url='wss://broker/stream')
+        server.emit('Network.webSocketFrameReceived', requestId='4', timestamp=0,
+                    response={'opcode': 1, 'mask': False, 'payloadData': '{"a":1}'})
+        assert q.get(timeout=1) == ('frame', 'wss://broker/stream', b'{"a":1}')
+        # the poller learns the request, then its cookies
+        request = {'method': 'POST', 'url': 'https://broker/poll?x', 'headers': {'X-Token': 't'}, 'postData': 'q'}
+        server.emit('Network.requestWillBeSent', requestId='5', request=request)
+        server.emit('Network.requestWillBeSentExtraInfo', requestId='5', headers={'Cookie': 'c'})
+        for _ in range(100):
+            endpoint = poller.endpoints.get('https://broker/poll')
+            if endpoint and 'Cookie' in endpoint.template.headers:
+                break
+            time.sleep(0.01)
+        assert endpoint.template == ('https://broker/poll?x', 'POST', {'X-Token': 't', 'Cookie': 'c'}, b'q')
+        # not matched requests never fetch their bodies
+        assert [data['params']['requestId'] for data in server.received
+                if data['method'] == 'Network.getResponseBody'] == ['1', '3', '6']
+    finally:
+        feed.stop()
+        feed.join()
+        server.close()
@@ -47,8 +47,10 @@ class DataNode(UDPHandler, Server):
         data = pack_to_bytes(obj)
         self.udp_server.sendto(data, address)
 
-    def push_data(self, **data):
+    def push_data(self, *, stamps: Dict[str, float] = None, **data):
+        """stamps: latency.STAGES timestamps of data, 'sent' is added here"""
         assert self._hub_addresses, 'hub_addresses not set'
+        data['stamps'] = dict(stamps or {}, sent=time.time())
         for hub_address in self._hub_addresses:
             self.pack_sendto(data, hub_address)
 
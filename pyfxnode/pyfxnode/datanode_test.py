@@ -36,8 +36,8 @@ def test_data_node():
     prices = {'X': {'USD/JPY': price}}
     c.push_data(prices=prices)
     data = q.get(timeout=1)
-    assert len(data) == 1
-    assert 'prices' in data
+    assert set(data) == {'prices', 'stamps'}
+    assert set(data['stamps']) == {'sent'}
     assert 'X' in data['prices']
     assert 'USD/JPY' in data['prices']['X']
     assert Price(*data['prices']['X']['USD/JPY']) == price
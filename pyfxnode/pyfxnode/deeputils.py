@@ -1,19 +1,22 @@
 import logging
 import os
 
-import keras
 import numpy as np
-from keras.layers.core import Dense
-from keras.models import Sequential
+
+from ocrutil import NumpyClassifier
 
 
 class Classifier:
-    def __init__(self, *n_units, sequential: Sequential = None, use_cache: bool = True, loss_func=None, optimizer=None):
+    # keras is imported by the first Classifier rather than with this module
+    def __init__(self, *n_units, sequential: 'keras.models.Sequential' = None, use_cache: bool = True,
+                 loss_func=None, optimizer=None):
         self._use_cache = use_cache
         self._cache = {}
         if sequential:
             self._sequential = sequential
             return
+        from keras.layers.core import Dense
+        from keras.models import Sequential
         self._sequential = Sequential()
         for i in range(len(n_units) - 2):
             n1, n2 = n_units[i:i + 2]
@@ -30,8 +33,14 @@ class Classifier:
         self._sequential.save(file_path)
         logging.info('model saved to {}'.format(os.path.abspath(file_path)))
 
+    def export(self, file_path: str):
+        """save the weights as .npz of NumpyClassifier"""
+        layers = [layer.get_weights() for layer in self._sequential.layers if layer.get_weights()]
+        NumpyClassifier([w for w, _ in layers], [b for _, b in layers]).save(file_path)
+
     @classmethod
     def load(cls, file_path: str) -> 'Classifier':
+        import keras
         try:
             model = Classifier(sequential=keras.models.load_model(file_path))
             logging.info('model loaded from {}'.format(os.path.abspath(file_path)))
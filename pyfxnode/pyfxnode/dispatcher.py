@@ -0,0 +1,164 @@
+import logging
+import multiprocessing
+import re
+import threading
+import time
+from collections import namedtuple, deque
+from typing import Callable, Iterable, Optional
+
+from .loggermixin import LoggerMixin
+
+_CHARSET_RE = re.compile(r'charset=([\w-]+)', re.IGNORECASE)
+
+
+class ProxyResponse(namedtuple('ProxyResponse',
+                               ['method', 'url', 'raw_content', 'content_encoding', 'content_type', 'received_at'])):
+    """picklable copy of a proxied response, decoded lazily in the worker"""
+    __slots__ = ()
+
+    @property
+    def content(self) -> bytes:
+        if not self.content_encoding or self.content_encoding == 'identity':
+            return self.raw_content
+        from mitmproxy.net.http import encoding
+        return encoding.decode(self.raw_content, self.content_encoding)
+
+    @property
+    def text(self) -> str:
+        m = _CHARSET_RE.search(self.content_type)
+        return self.content.decode(m.group(1) if m else 'utf-8', 'replace')
+
+
+def run_worker(pipe, results, parse: Callable[[ProxyResponse], Optional[dict]], logger_name: str):
+    """parse responses of pipe into results, the worker is given parse only and no other state of the node"""
+    logger = logging.getLogger(logger_name)
+    logger.info('worker started')
+    while True:
+        response = pipe.get()
+        if response is None:
+            break
+        try:
+            data = parse(response)
+        except Exception as e:
+            logger.exception('{} {}'.format(response.url, str(e)))
+            continue
+        if data:
+            results.put(data)
+    results.put(None)
+    logger.info('worker stopped')
+
+
+class ProxyDispatcher(LoggerMixin):
+    """hand responses off the proxy's event loop to a worker process
+
+    dispatch() only copies the raw body into a bounded ring, which drops the oldest entry when the worker falls
+    behind, and a sender thread feeds the worker from it. The worker calls parse(response) and a receiver thread
+    calls push(**data) with its results, so pushes go through the node's own sockets. Without the fork start method,
+    e.g. on Windows, the sender thread parses and pushes in-process.
+    """
+
+    def __init__(self, parse: Callable[[ProxyResponse], Optional[dict]], push: Callable[..., None],
+                 url_prefixes: Iterable[str], *, ring_size: int = 1024, logger: logging.Logger = None):
+        super().__init__(logger=logger)
+        self._parse = parse
+        self._push = push
+        self._url_prefixes = tuple(url_prefixes)
+        self._ring = deque(maxlen=ring_size)
+        self._ring_cond = threading.Condition()
+        self._sender = threading.Thread(target=self.run_sender, name='{}.sender'.format(self.logger.name),
+                                        daemon=True)
+        self._process = self._receiver = None
+        # fork, since a spawned worker would have to pickle parse and import the broker's main script
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+            self._pipe = context.SimpleQueue()
+            self._results = context.SimpleQueue()
+            self._process = context.Process(target=run_worker,
+                                            args=(self._pipe, self._results, parse, self.logger.name),
+                                            name=self.logger.name, daemon=True)
+            self._receiver = threading.Thread(target=self.run_receiver, name='{}.receiver'.format(self.logger.name),
+                                              daemon=True)
+        self.dispatched = 0
+        self.dropped = 0
+
+    @property
+    def in_process(self) -> bool:
+        return self._process is None
+
+    def start(self):
+        if not self.in_process:
+            self._process.start()
+            self._receiver.start()
+        else:
+            self.warning('fork is not available, parse in-process')
+        self._sender.start()
+
+    def stop(self, timeout: float = None):
+        with self._ring_cond:
+            self._ring.append(None)
+            self._ring_cond.notify()
+
+    def join(self, timeout: float = None):
+        self._sender.join(timeout)
+        if not self.in_process:
+            self._process.join(timeout)
+            self._receiver.join(timeout)
+
+    def is_running(self) -> bool:
+        if self.in_process:
+            return self._sender.is_alive()
+        return self._process.is_alive() or self._receiver.is_alive()
+
+    def dispatch(self, flow) -> bool:
+        """return True if flow is handed to the worker"""
+        req = flow.request
+        url = req.pretty_url
+        if not self._url_prefixes or not url.startswith(self._url_prefixes):
+            return False
+        res = flow.response
+        self.put(ProxyResponse(req.method, url, res.raw_content,
+                               res.headers.get('content-encoding', ''), res.headers.get('content-type', ''),
+                               time.time()))
+        return True
+
+    def put(self, response: ProxyResponse):
+        self.dispatched += 1
+        with self._ring_cond:
+            if len(self._ring) == self._ring.maxlen:
+                self.dropped += 1
+                if self.dropped % 100 == 1:
+                    self.warning('worker is behind, dropped={}/{}'.format(self.dropped, self.dispatched))
+            self._ring.append(response)
+            self._ring_cond.notify()
+
+    def run_sender(self):
+        while True:
+            with self._ring_cond:
+                while not self._ring:
+                    self._ring_cond.wait()
+                response = self._ring.popleft()
+            if not self.in_process:
+                self._pipe.put(response)
+            elif response is not None:
+                try:
+                    data = self._parse(response)
+                except Exception as e:
+                    self.exception('{} {}'.format(response.url, str(e)))
+                    continue
+                if data:
+                    self.push(data)
+            if response is None:
+                break
+
+    def run_receiver(self):
+        while True:
+            data = self._results.get()
+            if data is None:
+                break
+            self.push(data)
+
+    def push(self, data: dict):
+        try:
+            self._push(**data)
+        except Exception as e:
+            self.exception(str(e))
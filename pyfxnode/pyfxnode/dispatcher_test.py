@@ -0,0 +1,73 @@
+import multiprocessing
+import os
+import queue
+from types import SimpleNamespace
+
+from pyfxnode.dispatcher import ProxyDispatcher, ProxyResponse
+
+
+def new_flow(url: str, content: bytes, headers: dict = None):
+    return SimpleNamespace(request=SimpleNamespace(method='GET', pretty_url=url),
+                           response=SimpleNamespace(raw_content=content, headers=headers or {}))
+
+
+def test_proxy_response():
+    response = ProxyResponse('GET', 'http://x/', 'あ'.encode('cp932'), '', 'text/csv; charset=Shift_JIS', 0)
+    assert response.text == 'あ'
+    response = ProxyResponse('GET', 'http://x/', b'abc', '', '', 0)
+    assert response.content == b'abc'
+    assert response.text == 'abc'
+
+
+def parse(response: ProxyResponse):
+    if response.url.endswith('error'):
+        raise ValueError(response.url)
+    return {'pid': os.getpid(), 'url': response.url, 'text': response.text}
+
+
+def run_dispatcher(dispatcher: ProxyDispatcher, pushed: queue.Queue):
+    dispatcher.start()
+    try:
+        assert dispatcher.dispatch(new_flow('http://rate/error', b''))
+        assert dispatcher.dispatch(new_flow('http://rate/1', b'rate'))
+        assert not dispatcher.dispatch(new_flow('http://account/', b'account'))
+        return pushed.get(timeout=5)
+    finally:
+        dispatcher.stop()
+        dispatcher.join(5)
+        assert not dispatcher.is_running()
+
+
+def test_proxy_dispatcher():
+    pushed = queue.Queue()
+
+    def push(**data):
+        pushed.put(data)
+
+    dispatcher = ProxyDispatcher(parse, push, ('http://rate/',), ring_size=10)
+    assert not dispatcher.in_process
+    data = run_dispatcher(dispatcher, pushed)
+    # parsed in the worker, pushed in this process
+    assert data.pop('pid') != os.getpid()
+    assert data == {'url': 'http://rate/1', 'text': 'rate'}
+
+
+def test_proxy_dispatcher_in_process(monkeypatch):
+    monkeypatch.setattr(multiprocessing, 'get_all_start_methods', lambda: ['spawn'])
+    pushed = queue.Queue()
+
+    def push(**data):
+        pushed.put(data)
+
+    dispatcher = ProxyDispatcher(parse, push, ('http://rate/',), ring_size=10)
+    assert dispatcher.in_process
+    data = run_dispatcher(dispatcher, pushed)
+    assert data == {'pid': os.getpid(), 'url': 'http://rate/1', 'text': 'rate'}
+
+
+def test_proxy_dispatcher_drop_oldest():
+    dispatcher = ProxyDispatcher(parse, print, ('http://rate/',), ring_size=2)
+    for i in range(5):
+        dispatcher.dispatch(new_flow('http://rate/{}'.format(i), b''))
+    assert dispatcher.dispatched == 5
+    assert dispatcher.dropped == 3
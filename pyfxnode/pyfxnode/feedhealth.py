@@ -0,0 +1,148 @@
+import threading
+from typing import Dict, Hashable, List, Set, Tuple, Optional
+
+
+class TimerWheel:
+    """hashed timer wheel of deadlines by key
+
+    schedule() only updates the deadline of a key already in the wheel when it is later. The key stays in its slot
+    and is moved to the slot of its latest deadline when that slot fires, so a key ticking faster than its timeout
+    costs one slot move per timeout instead of one per tick. An earlier deadline moves the key at once.
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 256):
+        self.tick = tick
+        self._slots = [set() for _ in range(slots)]  # type: List[Set[Hashable]]
+        self._deadlines = {}  # type: Dict[Hashable, float]
+        # tick of the slot of each key
+        self._ticks = {}  # type: Dict[Hashable, int]
+        self._current = None  # type: Optional[int]
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def _insert(self, key: Hashable, deadline: float):
+        tick = int(deadline / self.tick)
+        if self._current is None:
+            self._current = tick - 1
+        tick = max(tick, self._current + 1)
+        self._slots[tick % len(self._slots)].add(key)
+        self._ticks[key] = tick
+
+    def _remove(self, key: Hashable):
+        tick = self._ticks.pop(key, None)
+        if tick is not None:
+            self._slots[tick % len(self._slots)].discard(key)
+
+    def schedule(self, key: Hashable, deadline: float):
+        tick = self._ticks.get(key)
+        if tick is None or int(deadline / self.tick) < tick:
+            self._remove(key)
+            self._insert(key, deadline)
+        self._deadlines[key] = deadline
+
+    def cancel(self, key: Hashable):
+        self._remove(key)
+        self._deadlines.pop(key, None)
+
+    def advance(self, now: float) -> List[Hashable]:
+        """pop keys whose deadline <= now"""
+        tick = int(now / self.tick)
+        if self._current is None:
+            self._current = tick - 1
+        expired = []
+        # a full turn visits every slot once
+        for t in range(max(self._current + 1, tick - len(self._slots) + 1), tick + 1):
+            slot = self._slots[t % len(self._slots)]
+            if not slot:
+                continue
+            keys = list(slot)
+            slot.clear()
+            for key in keys:
+                del self._ticks[key]
+                deadline = self._deadlines.get(key)
+                if deadline is None:
+                    continue
+                if deadline <= now:
+                    del self._deadlines[key]
+                    expired.append(key)
+                else:
+                    self._current = t
+                    self._insert(key, deadline)
+        self._current = tick
+        return expired
+
+
+class FeedHealth:
+    """tick rate, inter-arrival EWMA and staleness of feeds by key, e.g. (broker, instrument)
+
+    A feed becomes stale when no tick arrives for stale_after seconds and fresh again on its next tick. Both
+    transitions are returned as events by on_tick()/check() so they can be published instead of rescanned.
+    """
+
+    def __init__(self, *, stale_after: float = 5.0, alpha: float = 0.1, tick: float = 0.1):
+        self.stale_after = stale_after
+        self.alpha = alpha
+        self._wheel = TimerWheel(tick=tick)
+        self._feeds = {}  # type: Dict[Hashable, dict]
+        self._lock = threading.Lock()
+
+    def set_stale_after(self, stale_after: float):
+        """reschedule the deadlines of fresh feeds, so a shorter stale_after applies before the old ones expire"""
+        with self._lock:
+            self.stale_after = stale_after
+            for key, feed in self._feeds.items():
+                if not feed['stale']:
+                    self._wheel.schedule(key, feed['last_seen'] + stale_after)
+
+    @staticmethod
+    def _event(key: Hashable, feed: dict) -> dict:
+        return {'key': key, 'stale': feed['stale'], 'last_seen': feed['last_seen']}
+
+    def on_tick(self, key: Hashable, now: float) -> Optional[dict]:
+        """return a fresh event if the feed was stale"""
+        with self._lock:
+            feed = self._feeds.get(key)
+            if feed is None:
+                feed = self._feeds[key] = {'count': 0, 'last_seen': now, 'interval': None, 'stale': False}
+            else:
+                interval = now - feed['last_seen']
+                feed['interval'] = interval if feed['interval'] is None else \
+                    feed['interval'] + self.alpha * (interval - feed['interval'])
+                feed['last_seen'] = now
+            feed['count'] += 1
+            self._wheel.schedule(key, now + self.stale_after)
+            if feed['stale']:
+                feed['stale'] = False
+                return self._event(key, feed)
+        return None
+
+    def check(self, now: float) -> List[dict]:
+        """return stale events of feeds expired by now"""
+        with self._lock:
+            events = []
+            for key in self._wheel.advance(now):
+                feed = self._feeds[key]
+                feed['stale'] = True
+                events.append(self._event(key, feed))
+            return events
+
+    def is_stale(self, key: Hashable) -> bool:
+        with self._lock:
+            feed = self._feeds.get(key)
+            return feed is None or feed['stale']
+
+    def stale_keys(self) -> List[Hashable]:
+        with self._lock:
+            return [key for key, feed in self._feeds.items() if feed['stale']]
+
+    def metrics(self, now: float) -> List[Tuple[Hashable, dict]]:
+        """[(key, {count, rate, interval, age, stale})], rate and interval in ticks/s and seconds by the EWMA"""
+        with self._lock:
+            return [(key, {
+                'count': feed['count'],
+                'rate': 1 / feed['interval'] if feed['interval'] else None,
+                'interval': feed['interval'],
+                'age': now - feed['last_seen'],
+                'stale': feed['stale'],
+            }) for key, feed in self._feeds.items()]
@@ -0,0 +1,68 @@
+import random
+import time
+
+from pyfxnode.feedhealth import TimerWheel, FeedHealth
+
+
+def test_timer_wheel():
+    wheel = TimerWheel(tick=1, slots=8)
+    wheel.schedule('a', 3)
+    wheel.schedule('b', 5)
+    wheel.schedule('c', 20)
+    assert wheel.advance(2) == []
+    assert wheel.advance(3) == ['a']
+    # rescheduled keys expire at their latest deadline only
+    wheel.schedule('b', 12)
+    assert wheel.advance(11) == []
+    wheel.cancel('c')
+    assert wheel.advance(100) == ['b']
+    assert len(wheel) == 0
+    # an earlier deadline moves the key to its slot
+    wheel.schedule('d', 150)
+    wheel.schedule('d', 103)
+    assert wheel.advance(103) == ['d']
+
+
+def test_feed_health():
+    feeds = FeedHealth(stale_after=5, alpha=0.5, tick=1)
+    assert feeds.on_tick(('X', 'USD/JPY'), 0) is None
+    assert feeds.on_tick(('X', 'USD/JPY'), 2) is None
+    assert feeds.on_tick(('X', 'USD/JPY'), 3) is None
+    assert feeds.check(7) == []
+    assert feeds.check(8) == [{'key': ('X', 'USD/JPY'), 'stale': True, 'last_seen': 3}]
+    assert feeds.is_stale(('X', 'USD/JPY'))
+    assert feeds.stale_keys() == [('X', 'USD/JPY')]
+    assert feeds.on_tick(('X', 'USD/JPY'), 9) == {'key': ('X', 'USD/JPY'), 'stale': False, 'last_seen': 9}
+    (key, metrics), = feeds.metrics(10)
+    assert metrics['count'] == 4
+    assert metrics['interval'] == 2 + 0.5 * (1 - 2) + 0.5 * (6 - 1.5)
+    assert metrics['age'] == 1
+    assert not metrics['stale']
+
+    # a shorter stale_after applies to the deadlines already scheduled
+    feeds = FeedHealth(stale_after=60, tick=1)
+    feeds.on_tick('a', 0)
+    feeds.on_tick('b', 3)
+    assert feeds.check(4) == []
+    feeds.set_stale_after(5)
+    assert feeds.check(5) == [{'key': 'a', 'stale': True, 'last_seen': 0}]
+    assert feeds.check(8) == [{'key': 'b', 'stale': True, 'last_seen': 3}]
+
+
+def test_feed_health_benchmark():
+    feeds = FeedHealth(stale_after=5)
+    keys = [('broker{}'.format(i), 'instrument{}'.format(j)) for i in range(10) for j in range(20)]
+    now = time.time()
+    events = []
+    start = time.time()
+    for i in range(100000):
+        feeds.on_tick(random.choice(keys), now + i * 0.0001)
+        if i % 100 == 0:
+            events.extend(feeds.check(now + i * 0.0001))
+    print('#', 'feed_health', '1:', time.time() - start)
+    # about 50 ticks/s per feed, none goes stale
+    assert events == []
+    metrics = dict(feeds.metrics(now + 10))
+    assert sum(m['count'] for m in metrics.values()) == 100000
+    assert all(20 < m['rate'] < 200 for m in metrics.values())
+    assert len(feeds.check(now + 10 + 5)) == len(keys)
@@ -0,0 +1,63 @@
+from typing import List, Any, Iterator, Tuple, Union
+
+try:
+    import orjson as _json
+except ImportError:
+    try:
+        import simdjson as _json
+    except ImportError:
+        import json as _json
+
+
+def loads(data: Union[bytes, str, memoryview]) -> Any:
+    """json.loads by the fastest installed backend (orjson, simdjson, json)
+
+    orjson reads memoryview slices in place, the others get a copy.
+    """
+    if isinstance(data, memoryview) and _json.__name__ != 'orjson':
+        data = data.tobytes()
+    return _json.loads(data)
+
+
+class FrameDecoder:
+    """split a pushed byte stream into delimited frames
+
+    Bytes are kept in a bytearray with a scan offset, so each byte is searched for the delimiter only once
+    however the stream is chunked.
+    """
+
+    def __init__(self, delimiter: bytes):
+        assert delimiter, 'empty delimiter'
+        self.delimiter = delimiter
+        self._buf = bytearray()
+        self._scanned = 0
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """return frames completed by data"""
+        buf = self._buf
+        buf += data
+        frames = []
+        start = 0
+        pos = self._scanned
+        while True:
+            i = buf.find(self.delimiter, pos)
+            if i < 0:
+                break
+            frames.append(bytes(buf[start:i]))
+            start = pos = i + len(self.delimiter)
+        if start:
+            del buf[:start]
+        # a delimiter may start in the last len(delimiter) - 1 bytes
+        self._scanned = max(0, len(buf) - len(self.delimiter) + 1)
+        return frames
+
+    def pending(self) -> bytes:
+        """bytes of the incomplete frame"""
+        return bytes(self._buf)
+
+
+def iter_fxc_prices(data: dict) -> Iterator[Tuple[str, float, float]]:
+    """(instrument, bid, ask) of a fxcbroadcast priceList document (push or pull)"""
+    for price_info in data.get('priceList', ()):
+        price_data = price_info.get('priceData', price_info)
+        yield price_data['currencyPair'], float(price_data['bid']['price']), float(price_data['ask']['price'])
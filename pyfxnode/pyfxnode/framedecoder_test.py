@@ -0,0 +1,29 @@
+import json
+
+from pyfxnode.framedecoder import FrameDecoder, iter_fxc_prices, loads
+
+
+def test_frame_decoder():
+    decoder = FrameDecoder(b';;')
+    assert decoder.feed(b'a;;b') == [b'a']
+    assert decoder.feed(b'c;') == []
+    assert decoder.feed(b';d;;;;') == [b'bc', b'd', b'']
+    assert decoder.pending() == b''
+    assert decoder.feed(b'e') == []
+    assert decoder.pending() == b'e'
+
+    stream = b''.join(b'frame%d;;' % i for i in range(100))
+    decoder = FrameDecoder(b';;')
+    frames = []
+    for i in range(0, len(stream), 7):
+        frames.extend(decoder.feed(stream[i:i + 7]))
+    assert frames == [b'frame%d' % i for i in range(100)]
+
+
+def test_iter_fxc_prices():
+    price_data = {'currencyPair': 'USD/JPY', 'bid': {'price': '109.050'}, 'ask': {'price': '109.053'}}
+    push = json.dumps({'priceList': [{'priceData': price_data}]}).encode()
+    pull = json.dumps({'priceList': [price_data]})
+    assert list(iter_fxc_prices(loads(push))) == [('USD/JPY', 109.05, 109.053)]
+    assert list(iter_fxc_prices(loads(pull))) == [('USD/JPY', 109.05, 109.053)]
+    assert list(iter_fxc_prices(loads(b'{}'))) == []
@@ -0,0 +1,77 @@
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# rings attached by name in this process
+_attached = {}  # type: Dict[str, FrameRing]
+
+
+class FrameRing:
+    """fixed size frame slots in shared memory, handed between processes by descriptors
+
+    The capturing process write()s a frame into a free slot once and passes the small descriptor (slot, shape) to
+    a worker, which gets a zero copy numpy view() of it. The ring pickles to its name, so sending it to a worker
+    process attaches the same memory there. The owner release()s a slot when the worker is done with it.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], slots: int = 8, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        self.slot_nbytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_nbytes * slots)
+        self._owner = True
+        self._free = list(range(slots))  # type: List[int]
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __getstate__(self):
+        return {'name': self.name, 'shape': self.shape, 'slots': self.slots, 'dtype': self.dtype.str}
+
+    def __setstate__(self, state):
+        ring = _attached.get(state['name'])
+        if ring is None:
+            ring = _attached[state['name']] = FrameRing.__new__(FrameRing)
+            ring.shape = state['shape']
+            ring.slots = state['slots']
+            ring.dtype = np.dtype(state['dtype'])
+            ring.slot_nbytes = int(np.prod(ring.shape)) * ring.dtype.itemsize
+            # workers share the resource tracker of the owner, which unlinks it
+            ring._shm = shared_memory.SharedMemory(name=state['name'])
+            ring._owner = False
+            ring._free = []
+            ring._lock = threading.Lock()
+        self.__dict__.update(ring.__dict__)
+
+    def fits(self, frame: np.ndarray) -> bool:
+        return frame.dtype == self.dtype and frame.nbytes <= self.slot_nbytes
+
+    def write(self, frame: np.ndarray) -> Optional[Tuple[int, Tuple[int, ...]]]:
+        """copy frame into a free slot, return its descriptor or None if all slots are in use"""
+        assert self.fits(frame), (frame.shape, frame.dtype)
+        with self._lock:
+            if not self._free:
+                return None
+            slot = self._free.pop()
+        np.copyto(self.view((slot, frame.shape), writeable=True), frame)
+        return slot, frame.shape
+
+    def view(self, descriptor: Tuple[int, Tuple[int, ...]], *, writeable: bool = False) -> np.ndarray:
+        slot, shape = descriptor
+        arr = np.ndarray(shape, dtype=self.dtype, buffer=self._shm.buf, offset=slot * self.slot_nbytes)
+        arr.flags.writeable = writeable
+        return arr
+
+    def release(self, descriptor: Tuple[int, Tuple[int, ...]]):
+        with self._lock:
+            self._free.append(descriptor[0])
+
+    def close(self):
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,56 @@
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pyfxnode.framering import FrameRing
+
+
+def frame_sum(ring: FrameRing, descriptor) -> int:
+    view = ring.view(descriptor)
+    assert not view.flags.writeable
+    return int(view.sum())
+
+
+def test_frame_ring():
+    ring = FrameRing((32, 64, 3), slots=2)
+    try:
+        frame = np.arange(32 * 64 * 3, dtype=np.uint8).reshape((32, 64, 3))
+        d1 = ring.write(frame)
+        d2 = ring.write(frame[:16])
+        assert ring.write(frame) is None
+        assert np.array_equal(ring.view(d1), frame)
+        assert np.array_equal(ring.view(d2), frame[:16])
+        assert not ring.fits(np.zeros((64, 64, 3), dtype=np.uint8))
+        assert len(pickle.dumps(ring)) < 200
+
+        with ProcessPoolExecutor(2) as executor:
+            assert executor.submit(frame_sum, ring, d1).result() == int(frame.sum())
+            assert executor.submit(frame_sum, ring, d2).result() == int(frame[:16].sum())
+            ring.release(d1)
+            d3 = ring.write(np.full((32, 64, 3), 2, dtype=np.uint8))
+            assert d3[0] == d1[0]
+            assert executor.submit(frame_sum, ring, d3).result() == 32 * 64 * 3 * 2
+    finally:
+        ring.close()
+
+
+def test_frame_ring_benchmark():
+    frame = np.random.randint(0, 255, (800, 1200, 3), dtype=np.uint8)
+    ring = FrameRing(frame.shape, slots=2)
+    try:
+        n = 100
+        start = time.time()
+        for _ in range(n):
+            pickle.loads(pickle.dumps(frame))
+        pickled = (time.time() - start) / n
+        start = time.time()
+        for _ in range(n):
+            descriptor = ring.write(frame)
+            pickle.loads(pickle.dumps(ring)).view(descriptor)
+            ring.release(descriptor)
+        shared = (time.time() - start) / n
+        print('#', 'pickle 1:', pickled, 'frame_ring 1:', shared)
+    finally:
+        ring.close()
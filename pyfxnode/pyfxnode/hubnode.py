@@ -4,10 +4,12 @@ import threading
 import time
 from collections import defaultdict
 from queue import Queue, Empty
-from typing import Tuple, Dict, DefaultDict, Any
+from typing import Tuple, Dict, DefaultDict, Any, List
 
 from .account import Account
 from .datanode import DataNode
+from .feedhealth import FeedHealth
+from .latency import LatencyRecorder
 from .price import Price
 from .utils import unpack_from_bytes
 
@@ -17,6 +19,7 @@ class HubNode(DataNode):
         'subscription_ttl': 10.0,
         'publish_interval': 0.3,
         'node_ttl': 10.0,
+        'stale_after': 5.0,
     }
 
     def __init__(self, name: str, address: Tuple[str, int]):
@@ -26,6 +29,10 @@ class HubNode(DataNode):
         self._new_accounts = {}  # type: Dict[str, Account]
         self.prices = defaultdict(dict)  # type: DefaultDict[str, Dict[str, Price]]
         self._new_prices = defaultdict(dict)  # type: DefaultDict[str, Dict[str, Price]]
+        self._new_stamps = {}  # type: Dict[str, Dict[str, float]]
+        self.latencies = LatencyRecorder()
+        self.feeds = FeedHealth(stale_after=self.CONFIG_DEFAULTS['stale_after'])
+        self._new_feed_events = []  # type: List[dict]
 
         self._data_q = Queue()
 
@@ -48,6 +55,7 @@ class HubNode(DataNode):
     def update_config(self, **kwargs):
         self.info('config update by {}'.format(kwargs))
         self.config.update(**kwargs)
+        self.feeds.set_stale_after(self.config['stale_after'])
 
     def handle_data_loop(self):
         published_at = 0
@@ -56,6 +64,7 @@ class HubNode(DataNode):
                 with contextlib.suppress(Empty):
                     data = self._data_q.get(timeout=self.config['publish_interval'])
                     self.handle_data(data)
+                self._new_feed_events.extend(self.feeds.check(time.time()))
                 if published_at + self.config['publish_interval'] <= time.time():
                     self.publish_data()
                     published_at = time.time()
@@ -63,18 +72,43 @@ class HubNode(DataNode):
                 self.exception(str(e))
 
     def handle_data(self, data: dict):
+        stamps = data.get('stamps') or {}
+        now = time.time()
         for k, v_dict in data.items():
             if k == 'accounts':
                 for name, v in v_dict.items():
-                    account = Account(*v)
+                    account = Account.make(v)
                     self.accounts[name] = account
                     self._new_accounts[name] = account
             elif k == 'prices':
                 for name, instrument_v in v_dict.items():
                     for instrument, v in instrument_v.items():
-                        price = Price(*v)
+                        price = Price.make(v)
                         self.prices[name][instrument] = price
                         self._new_prices[name][instrument] = price
+                        event = self.feeds.on_tick((name, instrument), now)
+                        if event:
+                            self._new_feed_events.append(event)
+                    if stamps:
+                        self.latencies.record(name, stamps)
+                        self._new_stamps[name] = stamps
+
+    def get_latencies(self) -> dict:
+        """latency summaries by broker and hop, see LatencyRecorder"""
+        return self.latencies.summary()
+
+    def reset_latencies(self):
+        self.latencies.reset()
+
+    def get_feed_health(self) -> Dict[str, Dict[str, dict]]:
+        """tick count, rate, inter-arrival EWMA, age and staleness by broker and instrument"""
+        health = defaultdict(dict)
+        for (name, instrument), metrics in self.feeds.metrics(time.time()):
+            health[name][instrument] = metrics
+        return dict(health)
+
+    def get_stale_feeds(self) -> List[Tuple[str, str]]:
+        return self.feeds.stale_keys()
 
     def subscribe(self, name: str, address: Tuple[str, int]):
         address = tuple(address)
@@ -96,6 +130,9 @@ class HubNode(DataNode):
 
     def publish_data(self):
         now = time.time()
+        # only ticks published for the first time, stale stamps would skew the subscribers' histograms
+        for stamps in self._new_stamps.values():
+            stamps['published'] = now
         with self._subscribers_lock:
             for name, info in tuple(self._subscribers.items()):
                 address = info['address']
@@ -104,16 +141,30 @@ class HubNode(DataNode):
                     self.warning('remove subscriber {} {}'.format(name, info))
                     self._subscribers.pop(name)
                 elif info['init']:
-                    # send all data
+                    # send all data, without stamps of ticks received long ago
                     info.update(init=False)
-                    self.pack_sendto({'accounts': self.accounts, 'prices': self.prices}, address)
+                    feeds = [{'key': key, 'stale': True} for key in self.feeds.stale_keys()]
+                    self.pack_sendto({'accounts': self.accounts, 'prices': self.prices, 'feeds': feeds}, address)
                 else:
-                    if self._new_accounts or self._new_prices:
+                    if self._new_accounts or self._new_prices or self._new_feed_events:
                         self.pack_sendto({'accounts': self._new_accounts,
-                                          'prices': self._new_prices},
+                                          'prices': self._new_prices,
+                                          'stamps': self._new_stamps,
+                                          'feeds': self._new_feed_events},
                                          address)
+        for event in self._new_feed_events:
+            self.log_feed_event(event)
         self._new_accounts.clear()
         self._new_prices.clear()
+        self._new_stamps.clear()
+        self._new_feed_events = []
+
+    def log_feed_event(self, event: dict):
+        name, instrument = event['key']
+        if event['stale']:
+            self.warning('stale feed {} {} last_seen={}'.format(name, instrument, event['last_seen']))
+        else:
+            self.info('feed {} {} recovered'.format(name, instrument))
 
     def notify_node(self, name: str, address: Tuple[str, int]):
         with self._nodes_lock:
@@ -141,4 +192,6 @@ class HubNode(DataNode):
         """handled by gevent.Greenlet"""
         data, _ = request
         data = unpack_from_bytes(data)
+        if isinstance(data.get('stamps'), dict):
+            data['stamps']['hub_received'] = time.time()
         self._data_q.put(data)
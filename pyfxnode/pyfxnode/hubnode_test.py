@@ -38,7 +38,16 @@ def test_hub_node():
         rpc.request('subscribe', 'sub', sub.server_address)
         subscribers = rpc.request('get_subscribers')
         assert len(subscribers) == 1
-        assert q.get(timeout=0.5)['prices']['X']['USD/JPY'] == list(price)
+        published = q.get(timeout=0.5)
+        assert published['prices']['X']['USD/JPY'] == list(price)
+        # no stamps of old ticks in the init snapshot
+        assert 'stamps' not in published
+        c.push_data(prices={'X': {'USD/JPY': price}})
+        published = q.get(timeout=0.5)
+        assert set(published['stamps']['X']) == {'sent', 'hub_received', 'published'}
+        assert set(rpc.request('get_latencies')['X']) == {'sent->hub_received', 'total'}
+        assert rpc.request('get_feed_health')['X']['USD/JPY']['count'] == 2
+        assert rpc.request('get_stale_feeds') == []
 
         subscribers = rpc.request('get_subscribers')
         assert subscribers['sub']['init'] is False
@@ -1,16 +1,263 @@
-from typing import Tuple, Iterable
+import functools
+import glob
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
 
 from .datanode import DataNode
+from .framering import FrameRing
+from .price import Price
+from .server import Server
+from .utils import JST
+
+
+class PNGSource:
+    """frames from the png files of a directory in turn, for testing without windows"""
+
+    def __init__(self, dir_path: str):
+        self.dir_path = dir_path
+        self._files = sorted(glob.glob(os.path.join(dir_path, '*.png')))
+        self._i = 0
+
+    def grab(self) -> Optional[np.ndarray]:
+        if not self._files:
+            return None
+        f = self._files[self._i % len(self._files)]
+        self._i += 1
+        with Image.open(f) as img:
+            return np.asarray(img.convert('RGB'))
+
+
+class WindowSource:
+    """frames of the first window whose title matches title_re"""
+
+    def __init__(self, title_re: str):
+        self.title_re = title_re
+        self._window = None
+
+    def grab(self) -> Optional[np.ndarray]:
+        # ewmh/pyautogui or win32 are only needed to capture windows
+        from .window import Window
+        try:
+            if self._window is None:
+                title_match = re.compile(self.title_re).search
+                self._window = next((win for win in Window.iter_window() if title_match(win.get_title())), None)
+                if self._window is None:
+                    return None
+            return np.asarray(self._window.get_screen_shot().convert('RGB'))
+        except Exception:
+            self._window = None
+            raise
+
+
+class CharDecoder:
+    """rows of a board by a headless CharRecognizer, built in each worker on its first frame"""
+
+    def __init__(self, dir_path: str, name: str):
+        self.dir_path = dir_path
+        self.name = name
+        self._recognizer = None
+
+    def __getstate__(self):
+        return dict(self.__dict__, _recognizer=None)
+
+    def __call__(self, key: str, frame: np.ndarray) -> List[dict]:
+        if self._recognizer is None:
+            from .charrecognizer import CharRecognizer
+            self._recognizer = CharRecognizer(self.dir_path, headless=True)
+        return self._recognizer.recognize(self.name, Image.fromarray(frame))
+
+
+_decoder = None  # type: Callable[[str, np.ndarray], list]
+
+
+def _init_worker(decoder: Callable[[str, np.ndarray], list]):
+    global _decoder
+    _decoder = decoder
+
+
+def _decode(key: str, frame: np.ndarray) -> list:
+    return _decoder(key, frame)
+
+
+def _decode_shared(key: str, ring: FrameRing, descriptor: Tuple[int, Tuple[int, ...]]) -> list:
+    return _decoder(key, ring.view(descriptor))
+
+
+class CapturePipeline(Server):
+    """capture -> recognize -> emit pipeline of frames of several sources
+
+    A capture thread grabs a frame of every source each interval, a pool of worker processes runs decoder(key, frame)
+    off the GIL and an emit thread hands the results to emit(key, result, captured_at) in capture order. Frames are
+    dropped while max_pending frames are being decoded, so a slow decoder delays no capture. Frames are handed to
+    the workers through a FrameRing per source, sized by its first frame, instead of being pickled.
+    """
+
+    def __init__(self, sources: Dict[str, object], decoder: Callable[[str, np.ndarray], list],
+                 emit: Callable[[str, list, float], None], *, interval: float = 0.5, workers: int = 2,
+                 max_pending: int = None, logger: logging.Logger = None):
+        super().__init__(logger=logger)
+        self._sources = sources
+        self._decoder = decoder
+        self._emit = emit
+        self.interval = interval
+        self.workers = workers
+        self.max_pending = max_pending or workers * 2
+        self.captured = 0
+        self.decoded = 0
+        self.dropped = 0
+        self.errors = 0
+        self._started_at = None  # type: float
+        self._pending = queue.Queue()  # type: queue.Queue[Optional[Tuple[str, float, Future, Callable]]]
+        self._rings = {}  # type: Dict[str, FrameRing]
+        self._stop_event = threading.Event()
+        self._executor = None  # type: ProcessPoolExecutor
+        self._capture_thread = threading.Thread(target=self.run_capture, name='{}.capture'.format(self.logger.name),
+                                                daemon=True)
+        self._emit_thread = threading.Thread(target=self.run_emit, name='{}.emit'.format(self.logger.name),
+                                             daemon=True)
+
+    def is_running(self) -> bool:
+        return self._capture_thread.is_alive()
+
+    @property
+    def server_address(self) -> Tuple[str, int]:
+        return '0.0.0.0', 0
+
+    def start(self):
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self._decoder,))
+        self._started_at = time.time()
+        self._capture_thread.start()
+        self._emit_thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+
+    def join(self, timeout: float = None):
+        self._capture_thread.join(timeout)
+        self._emit_thread.join(timeout)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        for ring in self._rings.values():
+            ring.close()
+
+    def metrics(self) -> dict:
+        elapsed = time.time() - self._started_at if self._started_at else 0
+        return {
+            'captured': self.captured,
+            'decoded': self.decoded,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'fps': self.decoded / elapsed if elapsed else 0.0,
+        }
+
+    def capture(self):
+        for key, source in self._sources.items():
+            try:
+                frame = source.grab()
+            except Exception as e:
+                self.errors += 1
+                self.exception('{} {}'.format(key, str(e)))
+                continue
+            if frame is None:
+                continue
+            captured_at = time.time()
+            self.captured += 1
+            if self._pending.qsize() >= self.max_pending:
+                self.dropped += 1
+                continue
+            ring = self._rings.get(key)
+            if ring is None:
+                ring = self._rings[key] = FrameRing(frame.shape, slots=self.max_pending + 1, dtype=frame.dtype)
+            if ring.fits(frame):
+                descriptor = ring.write(frame)
+                if descriptor is None:
+                    self.dropped += 1
+                    continue
+                future = self._executor.submit(_decode_shared, key, ring, descriptor)
+                self._pending.put((key, captured_at, future, functools.partial(ring.release, descriptor)))
+            else:
+                # grown beyond the slots of its first frame
+                self._pending.put((key, captured_at, self._executor.submit(_decode, key, frame), None))
+
+    def run_capture(self):
+        try:
+            while not self._stop_event.is_set():
+                started_at = time.time()
+                self.capture()
+                self._stop_event.wait(max(self.interval - (time.time() - started_at), 0))
+        finally:
+            self._pending.put(None)
+
+    def run_emit(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            key, captured_at, future, release = item
+            try:
+                result = future.result()
+            except Exception as e:
+                self.errors += 1
+                self.exception('{} {}'.format(key, str(e)))
+                continue
+            finally:
+                if release:
+                    release()
+            self.decoded += 1
+            try:
+                self._emit(key, result, captured_at)
+            except Exception as e:
+                self.exception(str(e))
 
 
 class ImageNode(DataNode):
     def __init__(self, name: str, address: Tuple[str, int], *,
-                 hub_addresses: Iterable[Tuple[str, int]]):
-        super().__init__(name, address, hub_addresses=hub_addresses)
+                 hub_addresses: Iterable[Tuple[str, int]],
+                 sources: Dict[str, object] = None,
+                 decoder: Callable[[str, np.ndarray], List[dict]] = None,
+                 interval: float = 0.5,
+                 workers: int = 2):
+        """sources: {key: PNGSource or WindowSource}
+        decoder: picklable decoder(key, frame) of [{'instrument', 'bid', 'ask'}] run in worker processes
+        """
+        servers = {}
+        self.pipeline = None  # type: CapturePipeline
+        if sources:
+            if decoder is None:
+                raise ValueError('sources need a decoder')
+            self.pipeline = servers['capture'] = CapturePipeline(
+                sources, decoder, self.emit_prices, interval=interval, workers=workers,
+                logger=logging.getLogger('{}.{}.capture'.format(self.__class__.__name__, name)))
+        super().__init__(name, address, hub_addresses=hub_addresses, servers=servers)
+
+    def emit_prices(self, key: str, rows: List[dict], captured_at: float):
+        """prices are timed at the capture of their frame, not after it has waited for and gone through OCR"""
+        captured_time = datetime.fromtimestamp(captured_at, JST)
+        prices = {}
+        for row in rows:
+            try:
+                prices[row['instrument']] = Price(self.name, instrument=row['instrument'], time=captured_time,
+                                                  bid=row['bid'], ask=row['ask'])
+            except (KeyError, ValueError) as e:
+                self.warning('{} {} {}'.format(key, row, str(e)))
+        if prices:
+            self.push_data(prices={self.name: prices}, stamps={'received': captured_at, 'parsed': time.time()})
+
+    def get_capture_metrics(self) -> dict:
+        return self.pipeline.metrics() if self.pipeline else {}
 
     def refresh(self):
         pass
 
     def reload(self):
         pass
-
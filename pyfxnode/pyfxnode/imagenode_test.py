@@ -1,14 +1,61 @@
 import os
+import time
+from queue import Queue
 
 import pytest
+from PIL import Image
 
-from pyfxnode.window import Window
+from pyfxnode.imagenode import CapturePipeline, ImageNode, PNGSource
 
 
 @pytest.mark.skipIf('os.name != \'posix\'')
 def test_image_node():
+    from pyfxnode.window import Window
     assert os.name == 'posix'
     for win in Window.iter_window():
         print(win.get_title())
         print(win.get_position())
         print(win.get_screen_shot())
+
+
+class MeanDecoder:
+    def __call__(self, key, frame):
+        time.sleep(0.01)
+        return [{'instrument': key, 'bid': float(frame.mean()), 'ask': float(frame.mean()) + 1, 'pid': os.getpid()}]
+
+
+def test_capture_pipeline(tmpdir):
+    for i in range(4):
+        Image.new('RGB', (64, 32), (i * 10,) * 3).save(os.path.join(str(tmpdir), '{}.png'.format(i)))
+    sources = {'a': PNGSource(str(tmpdir)), 'b': PNGSource(str(tmpdir)), 'none': PNGSource(str(tmpdir.mkdir('x')))}
+    q = Queue()
+    pipeline = CapturePipeline(sources, MeanDecoder(), lambda *args: q.put(args), interval=0.01, workers=2)
+    pipeline.start()
+    try:
+        results = [q.get(timeout=10) for _ in range(16)]
+    finally:
+        pipeline.stop()
+        pipeline.join()
+    # in capture order, frames of each source in turn
+    assert [key for key, _, _ in results[:4]] == ['a', 'b', 'a', 'b']
+    assert [rows[0]['bid'] for key, rows, _ in results[:4]] == [0, 0, 10, 10]
+    assert all(captured_at <= time.time() for _, _, captured_at in results)
+    assert {rows[0]['pid'] for _, rows, _ in results} - {os.getpid()}
+    metrics = pipeline.metrics()
+    assert metrics['decoded'] >= 16 and metrics['errors'] == 0
+    print('#', 'capture_pipeline', 'fps:', metrics['fps'], 'dropped:', metrics['dropped'])
+
+
+def test_image_node_prices(tmpdir):
+    with pytest.raises(ValueError):
+        ImageNode('image', ('127.0.0.1', 0), hub_addresses=[('127.0.0.1', 0)], sources={'a': PNGSource(str(tmpdir))})
+
+    node = ImageNode('image', ('127.0.0.1', 0), hub_addresses=[('127.0.0.1', 0)])
+    pushed = []
+    node.push_data = lambda **data: pushed.append(data)
+    captured_at = time.time() - 1
+    node.emit_prices('a', [{'instrument': 'USD/JPY', 'bid': 100.0, 'ask': 100.1}, {'bid': 1.0}], captured_at)
+    price = pushed[0]['prices']['image']['USD/JPY']
+    # timed at the capture, not at the emit
+    assert price.time.timestamp() == pytest.approx(captured_at)
+    assert pushed[0]['stamps']['received'] == captured_at
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+from typing import Dict
+
+import pytest
+
+# optional backends, imported only by the servers and models using them
+HEAVY = ('keras', 'tensorflow', 'chainer', 'PyQt5', 'pychrome', 'mitmproxy')
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """{module: cumulative microseconds} of `python -X importtime -c 'import module'` in a fresh process"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)], cwd=root,
+                          stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize('module', [
+    'pyfxnode.hubnode',
+    'pyfxnode.datanode',
+    'hub_main',
+    'image_main',
+    'pyfxnode.webnode',
+    'pyfxnode.proxyserver',
+    'pyfxnode.deeputils',
+    'pyfxnode.charrecognizer',
+    'pyfxnode.imagenode',
+])
+def test_import_time(module):
+    times = import_times(module)
+    heavy = sorted(name for name in times if name.split('.')[0] in HEAVY)
+    assert not heavy, heavy
+    top = sorted(times.items(), key=lambda item: -item[1])[:5]
+    # wall clock, reported only
+    print('#', module, '1:', times[module] / 1e6, 'top:', ['{}={:.3f}'.format(k, v / 1e6) for k, v in top])
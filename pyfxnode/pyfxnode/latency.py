@@ -0,0 +1,93 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+# pipeline stages of pushed data, stamped by time.time() of each process on the same host
+STAGES = ('received', 'parsed', 'sent', 'hub_received', 'published', 'subscriber_received')
+
+
+class LatencyHistogram:
+    """HdrHistogram-like log-linear histogram of latencies
+
+    Values are bucketed in microseconds keeping SUB_BUCKET_BITS significant bits,
+    so a recorded value is reported within 1 / 2 ** (SUB_BUCKET_BITS - 1) of itself.
+    """
+    SUB_BUCKET_BITS = 7
+
+    def __init__(self):
+        self.counts = defaultdict(int)  # type: Dict[int, int]
+        self.count = 0
+        self.total = 0.0
+        self.min = None  # type: Optional[float]
+        self.max = None  # type: Optional[float]
+
+    @classmethod
+    def _index(cls, us: int) -> int:
+        shift = max(us.bit_length() - cls.SUB_BUCKET_BITS, 0)
+        return (shift << cls.SUB_BUCKET_BITS) | (us >> shift)
+
+    @classmethod
+    def _value(cls, index: int) -> int:
+        shift = index >> cls.SUB_BUCKET_BITS
+        sub = index & ((1 << cls.SUB_BUCKET_BITS) - 1)
+        return (sub << shift) + ((1 << shift) >> 1)
+
+    def record(self, seconds: float):
+        seconds = max(seconds, 0.0)
+        self.counts[self._index(int(seconds * 1e6))] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """p in [0, 100], in seconds"""
+        if not self.count:
+            return None
+        threshold = self.count * p / 100
+        n = 0
+        for index, count in sorted(self.counts.items()):
+            n += count
+            if n >= threshold:
+                return self._value(index) / 1e6
+        return self.max
+
+    def summary(self) -> dict:
+        """in seconds"""
+        return {
+            'count': self.count,
+            'min': self.min,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+            'max': self.max,
+        }
+
+
+class LatencyRecorder:
+    """latency histograms per name (broker) and hop between consecutive STAGES"""
+
+    def __init__(self):
+        self._histograms = defaultdict(lambda: defaultdict(LatencyHistogram))
+        self._lock = threading.Lock()
+
+    def record(self, name: str, stamps: Dict[str, float]):
+        stages = [(stage, stamps[stage]) for stage in STAGES if stamps.get(stage)]
+        if len(stages) < 2:
+            return
+        with self._lock:
+            histograms = self._histograms[name]
+            for (a, a_time), (b, b_time) in zip(stages, stages[1:]):
+                histograms['{}->{}'.format(a, b)].record(b_time - a_time)
+            histograms['total'].record(stages[-1][1] - stages[0][1])
+
+    def summary(self) -> Dict[str, Dict[str, dict]]:
+        with self._lock:
+            return {name: {hop: histogram.summary() for hop, histogram in histograms.items()}
+                    for name, histograms in self._histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
@@ -0,0 +1,32 @@
+import random
+
+from pyfxnode.latency import LatencyHistogram, LatencyRecorder
+
+
+def test_latency_histogram():
+    h = LatencyHistogram()
+    assert h.percentile(50) is None
+    values = [random.uniform(0.0001, 0.5) for _ in range(10000)]
+    for v in values:
+        h.record(v)
+    values.sort()
+    summary = h.summary()
+    assert summary['count'] == len(values)
+    assert summary['min'] == values[0]
+    assert summary['max'] == values[-1]
+    for p in (50, 90, 99, 99.9):
+        expected = values[int(len(values) * p / 100) - 1]
+        assert abs(h.percentile(p) - expected) <= expected / 2 ** (LatencyHistogram.SUB_BUCKET_BITS - 1)
+
+
+def test_latency_recorder():
+    r = LatencyRecorder()
+    r.record('X', {'sent': 1.0})
+    assert r.summary() == {}
+    r.record('X', {'received': 1.0, 'parsed': 1.001, 'sent': 1.002, 'hub_received': 1.005})
+    summary = r.summary()['X']
+    assert set(summary) == {'received->parsed', 'parsed->sent', 'sent->hub_received', 'total'}
+    assert abs(summary['total']['p50'] - 0.005) < 0.0001
+    assert abs(summary['sent->hub_received']['max'] - 0.003) < 1e-9
+    r.reset()
+    assert r.summary() == {}
@@ -0,0 +1,86 @@
+import functools
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+from ocrutil import NumpyClassifier, glyph_array, glyph_spans, ocrbench
+
+from pyfxnode.charrecognizer import CharRecognizer
+from pyfxnode.imagenode import CharDecoder
+
+FONT = {
+    '1': ['010', '010', '010'],
+    '2': ['110', '010', '011'],
+    '7': ['111', '001', '001'],
+    '.': ['000', '000', '010'],
+}
+
+
+def draw_frame(texts) -> np.ndarray:
+    gray = np.zeros((400, 1300), dtype=np.uint8)
+    for (left, top, _, _), text in zip(CharRecognizer.get_boxes('test')[0].values(), texts):
+        for i, c in enumerate(text):
+            bitmap = np.kron(np.array([[int(px) for px in row] for row in FONT[c]]), np.ones((3, 3))) * 255
+            gray[top + 2:top + 11, left + 2 + i * 12:left + 11 + i * 12] = bitmap
+    return np.stack([gray] * 3, axis=2)
+
+
+def nearest_classifier(templates: np.ndarray, outputs, n_out: int) -> NumpyClassifier:
+    """a single layer picking the output of the nearest template, argmax of x.t - |t|^2 / 2"""
+    x = templates.reshape(len(templates), -1).astype(np.float32)
+    weights = np.zeros((x.shape[1], n_out), dtype=np.float32)
+    biases = np.full(n_out, -1e12, dtype=np.float32)
+    for t, out in zip(x, outputs):
+        weights[:, out] = t
+        biases[out] = -(t * t).sum() / 2
+    return NumpyClassifier([weights], [biases])
+
+
+def test_ocr_bench(tmpdir):
+    model_dir = os.path.join(str(tmpdir), 'model')
+    os.makedirs(model_dir)
+    field = CharRecognizer.crop_field(draw_frame(['127.'])[:, :, 0], CharRecognizer.get_boxes('test')[0]['instrument'])
+    templates = np.array([glyph_array(field, start, end, CharRecognizer.C_WIDTH, CharRecognizer.C_HEIGHT)
+                          for start, end in glyph_spans(field)])
+    widths = [int(t.any(axis=0).sum()) + 1 for t in templates]
+    nearest_classifier(templates, [ord(c) for c in '127.'], CharRecognizer.C_NUM).save(
+        os.path.join(model_dir, CharRecognizer.CHAR_NPZ))
+    nearest_classifier(templates, widths, CharRecognizer.C_WIDTH + 1).save(
+        os.path.join(model_dir, CharRecognizer.WIDTH_NPZ))
+
+    corpus_dir = os.path.join(str(tmpdir), 'corpus')
+    os.makedirs(os.path.join(corpus_dir, 'test'))
+    labels = {}
+    for i in range(6):
+        texts = ['1' * (i % 4 + 1), '2.7{}'.format(i % 2 + 1), '7.{}'.format('1' * (i % 3))]
+        png_name = '{:02d}.png'.format(i)
+        Image.fromarray(draw_frame(texts)).save(os.path.join(corpus_dir, 'test', png_name))
+        labels[png_name] = [dict(zip(('instrument', 'bid', 'ask'), texts))]
+    # a wrong label
+    labels['05.png'][0]['ask'] = '7.1'
+    with open(os.path.join(corpus_dir, 'test', ocrbench.LABELS), 'w') as f:
+        json.dump(labels, f)
+
+    corpus = ocrbench.load_corpus(corpus_dir)
+    assert list(corpus) == ['test']
+    assert [png_name for png_name, _, _ in corpus['test']] == sorted(labels)
+
+    result = ocrbench.run(corpus, lambda name: functools.partial(CharDecoder(model_dir, name), ''), repeat=2)
+    r = result['brokers']['test']
+    assert r['frames'] == 6
+    assert r['fields'] == 18
+    assert r['frame_accuracy'] == 5 / 6
+    assert r['field_accuracy'] == 17 / 18
+    assert r['errors'] == [{'file': '05.png', 'row': 0, 'key': 'ask', 'expected': '7.1', 'actual': '7.11'}]
+    assert r['cold']['count'] == 6
+    assert r['latency']['count'] == 12
+    assert r['latency']['p50'] <= r['latency']['p99']
+
+    file_path = os.path.join(str(tmpdir), 'ocrbench.json')
+    ocrbench.save(result, file_path)
+    diff = ocrbench.compare(ocrbench.load(file_path), result)
+    assert diff['test']['field_accuracy'] == (17 / 18, 17 / 18)
+    print('#', 'ocr_bench frames/s:', r['frames_per_sec'], 'glyphs/s:', r['glyphs_per_sec'],
+          'p50:', r['latency']['p50'], 'p99:', r['latency']['p99'])
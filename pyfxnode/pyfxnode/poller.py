@@ -0,0 +1,162 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import requests
+
+from .dispatcher import ProxyResponse
+from .server import Server
+
+# request headers not replayed from a learned request
+_SKIP_HEADERS = {'content-length', 'connection', 'host', 'if-none-match', 'if-modified-since'}
+
+
+class PollTemplate(namedtuple('PollTemplate', ['url', 'method', 'headers', 'body'])):
+    """request replayed by a poll, replaced as a whole while polls in flight keep the one they read"""
+    __slots__ = ()
+
+    @classmethod
+    def learn(cls, url: str, method: str, headers: Dict[str, str], body: bytes = None) -> 'PollTemplate':
+        return cls(url, method, {k: v for k, v in headers.items() if k.lower() not in _SKIP_HEADERS}, body or None)
+
+
+class PollEndpoint:
+    def __init__(self, url: str, interval: float, *, method: str = 'GET', headers: Dict[str, str] = None,
+                 body: bytes = None):
+        self.template = PollTemplate(url, method, headers or {}, body)
+        self.interval = interval
+        self.etag = None
+        self.last_modified = None
+        self.errors = 0
+        self.requests = 0
+        self.not_modified = 0
+
+
+class HTTPPoller(Server):
+    """poll pull feeds at their own target rates and hand responses to handler.handle_dispatched_response
+
+    Each endpoint has at most one request in flight and max_concurrency caps them all. The next poll is due
+    interval after the start of the last one, jittered by +-jitter, and backs off exponentially up to max_backoff
+    on errors. ETag/Last-Modified are sent back as conditional headers, so unchanged rates cost a 304 only.
+    Endpoints are added by add() or learned from the browser's own requests of handler.POLL_INTERVALS, which
+    ProxyServer and ChromeFeed pass to learn().
+    """
+
+    def __init__(self, handler, *, max_concurrency: int = 4, jitter: float = 0.1, max_backoff: float = 30.0,
+                 timeout: float = 5.0, logger: logging.Logger = None):
+        super().__init__(logger=logger)
+        self._handler = handler
+        self._intervals = tuple(getattr(handler, 'POLL_INTERVALS', {}).items())
+        self.max_concurrency = max_concurrency
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.endpoints = {}  # type: Dict[str, PollEndpoint]
+        self._heap = []  # type: List[Tuple[float, int, PollEndpoint]]
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_concurrency)
+        self._thread = threading.Thread(target=self.run, name=self.logger.name, daemon=True)
+
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    @property
+    def server_address(self) -> Tuple[str, int]:
+        return '0.0.0.0', 0
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def join(self, timeout: float = None):
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=False)
+
+    def add(self, key: str, endpoint: PollEndpoint):
+        with self._cond:
+            self.endpoints[key] = endpoint
+            heapq.heappush(self._heap, (time.time(), next(self._seq), endpoint))
+            self._cond.notify()
+
+    def learn(self, url: str, method: str, headers: Dict[str, str], body: bytes = None) -> bool:
+        """take url's request as the template of its endpoint, return True if url is polled"""
+        for prefix, interval in self._intervals:
+            if url.startswith(prefix):
+                template = PollTemplate.learn(url, method, headers, body)
+                # _cond is reentrant, add() takes it again
+                with self._cond:
+                    endpoint = self.endpoints.get(prefix)
+                    if endpoint is None:
+                        endpoint = PollEndpoint(url, interval)
+                        self.info('poll {} every {}s'.format(url, interval))
+                        self.add(prefix, endpoint)
+                    endpoint.template = template
+                return True
+        return False
+
+    def run(self):
+        with self._cond:
+            while not self._stopped:
+                if not self._heap or self._in_flight >= self.max_concurrency:
+                    self._cond.wait()
+                    continue
+                due_at = self._heap[0][0]
+                now = time.time()
+                if due_at > now:
+                    self._cond.wait(due_at - now)
+                    continue
+                _, _, endpoint = heapq.heappop(self._heap)
+                self._in_flight += 1
+                self._executor.submit(self.poll, endpoint)
+
+    def next_delay(self, endpoint: PollEndpoint) -> float:
+        delay = endpoint.interval
+        if endpoint.errors:
+            delay = min(delay * 2 ** endpoint.errors, self.max_backoff)
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def poll(self, endpoint: PollEndpoint):
+        started_at = time.time()
+        with self._cond:
+            template = endpoint.template
+        try:
+            headers = dict(template.headers)
+            if endpoint.etag:
+                headers['If-None-Match'] = endpoint.etag
+            if endpoint.last_modified:
+                headers['If-Modified-Since'] = endpoint.last_modified
+            endpoint.requests += 1
+            r = self._session.request(template.method, template.url, headers=headers, data=template.body,
+                                      timeout=self.timeout)
+            if r.status_code == 304:
+                endpoint.not_modified += 1
+            else:
+                r.raise_for_status()
+                endpoint.etag = r.headers.get('ETag')
+                endpoint.last_modified = r.headers.get('Last-Modified')
+                self._handler.handle_dispatched_response(ProxyResponse(
+                    template.method, template.url, r.content, '', r.headers.get('Content-Type', ''), time.time()))
+            endpoint.errors = 0
+        except Exception as e:
+            endpoint.errors += 1
+            self.warning('{} errors={} {}'.format(template.url, endpoint.errors, str(e)))
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                due_at = max(started_at + self.next_delay(endpoint), time.time())
+                heapq.heappush(self._heap, (due_at, next(self._seq), endpoint))
+                self._cond.notify()
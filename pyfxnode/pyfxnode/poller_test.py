@@ -0,0 +1,83 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pyfxnode.dispatcher import ProxyResponse
+from pyfxnode.poller import HTTPPoller, PollEndpoint
+
+
+def test_http_poller():
+    state = {'version': 1, 'active': 0, 'max_active': 0}
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            with lock:
+                state['active'] += 1
+                state['max_active'] = max(state['max_active'], state['active'])
+            try:
+                time.sleep(0.01)
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                etag = '"{}"'.format(state['version'])
+                if self.path == '/error':
+                    self.send_response(500)
+                    self.end_headers()
+                elif self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                else:
+                    content = body + b' v' + str(state['version']).encode()
+                    self.send_response(200)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                    self.send_header('Content-Length', str(len(content)))
+                    self.end_headers()
+                    self.wfile.write(content)
+            finally:
+                with lock:
+                    state['active'] -= 1
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    responses = []
+
+    class Handler:
+        POLL_INTERVALS = {url + '/rate': 0.02}
+
+        def handle_dispatched_response(self, response: ProxyResponse):
+            responses.append((response.url, response.text))
+
+    poller = HTTPPoller(Handler(), max_concurrency=2, max_backoff=0.5)
+    poller.start()
+    try:
+        assert not poller.learn(url + '/other', 'POST', {}, b'')
+        assert poller.learn(url + '/rate?a', 'POST', {'Content-Length': '1', 'X-Token': 't'}, b'q')
+        template = poller.endpoints[url + '/rate'].template
+        assert template == (url + '/rate?a', 'POST', {'X-Token': 't'}, b'q')
+        poller.add('error', PollEndpoint(url + '/error', 0.02, method='POST', body=b'x'))
+        for i in range(10):
+            poller.add(str(i), PollEndpoint(url + '/slow{}'.format(i), 0.02, method='POST', body=b'x'))
+        time.sleep(0.3)
+        state['version'] = 2
+        time.sleep(0.3)
+    finally:
+        poller.stop()
+        poller.join()
+        server.shutdown()
+
+    rate = poller.endpoints[url + '/rate']
+    # a learned request replaces the template, not the one read by polls
+    poller.learn(url + '/rate?b', 'POST', {'X-Token': 'u'}, b'r')
+    assert rate.template == (url + '/rate?b', 'POST', {'X-Token': 'u'}, b'r')
+    assert template.headers == {'X-Token': 't'}
+    # only changed content is handed to the parsers
+    assert [text for u, text in responses if u.startswith(url + '/rate')] == ['q v1', 'q v2']
+    assert rate.not_modified >= 2
+    assert state['max_active'] <= 2
+    # backed off 0.02, 0.04, ... 0.5 s
+    assert 3 <= poller.endpoints['error'].requests <= 7
+    assert poller.endpoints['error'].errors == poller.endpoints['error'].requests
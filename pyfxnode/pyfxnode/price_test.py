@@ -1,4 +1,7 @@
+import time
+
 from pyfxnode.price import Price
+from pyfxnode.utils import pack_to_bytes, unpack_from_bytes
 
 
 def test_price():
@@ -16,3 +19,29 @@ def test_price():
 
     j = a.to_json()
     assert a == a.from_json(j)
+
+
+def test_price_make():
+    price = Price('X', 'USD/JPY', 100, 101)
+    v = unpack_from_bytes(pack_to_bytes(price))
+    assert Price.make(v) == price
+    assert Price.make(v) == Price(*v)
+
+
+def test_price_benchmark():
+    N = 10000
+    v = unpack_from_bytes(pack_to_bytes(Price('X', 'USD/JPY', 100, 101)))
+
+    start = time.perf_counter()
+    for _ in range(N):
+        converted = Price(*v)
+    before = (time.perf_counter() - start) / N
+
+    start = time.perf_counter()
+    for _ in range(N):
+        trusted = Price.make(v)
+    after = (time.perf_counter() - start) / N
+
+    print('#', 'Price(*v) 1:', before, 'Price.make(v) 1:', after)
+    assert trusted == converted
+    assert type(trusted.time) is type(converted.time)
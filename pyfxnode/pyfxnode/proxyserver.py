@@ -2,68 +2,109 @@ import logging
 import signal
 import sys
 import threading
-from typing import Tuple
-
-from mitmproxy import options, exceptions
-from mitmproxy.controller import handler as controller_handler
-from mitmproxy.http import HTTPFlow
-from mitmproxy.proxy import config
-from mitmproxy.tools import cmdline
-from mitmproxy.tools.dump import DumpMaster
-from mitmproxy.utils import version_check, debug
-from mitmproxy.websocket import WebSocketFlow
+from typing import Optional, Tuple, TYPE_CHECKING
 
+from pyfxnode.dispatcher import ProxyDispatcher, ProxyResponse
+from pyfxnode.poller import HTTPPoller
 from pyfxnode.server import Server
+from pyfxnode.websocketrouter import WebSocketRouter
+
+if TYPE_CHECKING:
+    # mitmproxy is imported by ProxyServer only, a handler alone does not pay for it
+    from mitmproxy.http import HTTPFlow
+    from mitmproxy.websocket import WebSocketFlow
 
 
 class ProxyHandler:
-    def handle_request_header(self, flow: HTTPFlow):
+    # url prefixes of responses handed to parse_dispatched_response when dispatching
+    DISPATCH_URLS = ()
+    # url prefixes of other responses of handle_response, e.g. accounts, which ChromeFeed hands in-process to
+    # handle_dispatched_response
+    CAPTURE_URLS = ()
+    # {url_prefix: (name, decoder factory)} of websocket price feeds, see WebSocketRouter
+    WEBSOCKET_DECODERS = {}
+    # {url_prefix: seconds} of pull feeds replayed by HTTPPoller once the browser has requested them
+    POLL_INTERVALS = {}
+
+    def handle_request_header(self, flow: 'HTTPFlow'):
+        pass
+
+    def handle_request(self, flow: 'HTTPFlow'):
         pass
 
-    def handle_request(self, flow: HTTPFlow):
+    def handle_response_header(self, flow: 'HTTPFlow'):
         pass
 
-    def handle_response_header(self, flow: HTTPFlow):
+    def handle_response(self, flow: 'HTTPFlow'):
         pass
 
-    def handle_response(self, flow: HTTPFlow):
+    def handle_websocket_message(self, flow: 'WebSocketFlow'):
         pass
 
-    def handle_websocket_message(self, flow: WebSocketFlow):
+    def parse_dispatched_response(self, response: ProxyResponse) -> Optional[dict]:
+        """return push_data kwargs of response, called in the dispatcher's worker process without the node's state"""
+        return None
+
+    def handle_dispatched_response(self, response: ProxyResponse):
+        """called by ChromeFeed and HTTPPoller"""
+        pass
+
+    def handle_websocket_frame(self, url: str, payload: bytes, received_at: float):
         pass
 
 
 class ProxyServer(Server):
-    def __init__(self, address: Tuple[str, int], handler: ProxyHandler, logger: logging.Logger = None):
+    def __init__(self, address: Tuple[str, int], handler: ProxyHandler, logger: logging.Logger = None,
+                 dispatcher: ProxyDispatcher = None, websocket_router: WebSocketRouter = None,
+                 poller: HTTPPoller = None):
+        from mitmproxy.controller import handler as controller_handler
+        from mitmproxy.tools.dump import DumpMaster
+
         class ProxyMaster(DumpMaster):
             def __init__(self, *args, **kwargs):
                 super().__init__(*args, **kwargs)
 
             @controller_handler
-            def requestheaders(self, flow: HTTPFlow):
+            def requestheaders(self, flow: 'HTTPFlow'):
                 handler.handle_request_header(flow)
 
             @controller_handler
-            def request(self, flow: HTTPFlow):
+            def request(self, flow: 'HTTPFlow'):
+                if poller:
+                    req = flow.request
+                    poller.learn(req.pretty_url, req.method, dict(req.headers), req.content)
                 handler.handle_request_header(flow)
 
             @controller_handler
-            def responseheaders(self, flow: HTTPFlow):
+            def responseheaders(self, flow: 'HTTPFlow'):
                 handler.handle_response_header(flow)
 
             @controller_handler
-            def response(self, flow: HTTPFlow):
+            def response(self, flow: 'HTTPFlow'):
+                if dispatcher and dispatcher.dispatch(flow):
+                    return
                 handler.handle_response(flow)
 
             @controller_handler
-            def websocket_message(self, flow: WebSocketFlow):
+            def websocket_message(self, flow: 'WebSocketFlow'):
+                if websocket_router:
+                    message = flow.messages[-1]
+                    if not message.from_client and websocket_router.on_message(
+                            flow.id, flow.handshake_flow.request.pretty_url, message.content, message.timestamp):
+                        return
                 handler.handle_websocket_message(flow)
 
+            @controller_handler
+            def websocket_end(self, flow: 'WebSocketFlow'):
+                if websocket_router:
+                    websocket_router.close(flow.id)
+
         super().__init__(logger=logger)
         self.address = address
         self._thread = threading.Thread(target=self.run, name=self.logger.name, daemon=True)
         self._master_type = ProxyMaster
         self._master = None  # type: ProxyMaster
+        self._dispatcher = dispatcher
 
     def is_running(self) -> bool:
         return self._thread.is_alive()
@@ -73,6 +114,8 @@ class ProxyServer(Server):
         return self.address
 
     def start(self):
+        if self._dispatcher:
+            self._dispatcher.start()
         self._thread.start()
 
         def clean_kill(*args, **kwargs):
@@ -83,11 +126,20 @@ class ProxyServer(Server):
     def stop(self, timeout: float = None):
         if self._master:
             self._master.shutdown()
+        if self._dispatcher:
+            self._dispatcher.stop(timeout)
 
     def join(self, timeout: float = None):
         self._thread.join(timeout)
+        if self._dispatcher:
+            self._dispatcher.join(timeout)
 
     def run(self):
+        from mitmproxy import options, exceptions
+        from mitmproxy.proxy import config
+        from mitmproxy.tools import cmdline
+        from mitmproxy.utils import version_check, debug
+
         def process_options(_, _options, _args):
             from mitmproxy.proxy import server  # noqa
 
@@ -2,9 +2,7 @@ from collections import namedtuple
 from datetime import datetime
 from typing import Union, Tuple
 
-import pytz
-
-from .utils import parse_datetime, NamedTupleMixin
+from .utils import parse_datetime, NamedTupleMixin, utc_now_aware
 
 
 class Spread(NamedTupleMixin,
@@ -17,7 +15,7 @@ class Spread(NamedTupleMixin,
             'pair': (None, tuple),
             'bid': (None, float),
             'ask': (None, float),
-            'time': (pytz.utc.localize(datetime.utcnow()), parse_datetime),
+            'time': (utc_now_aware, parse_datetime),
         }
 
     def __init__(self, pair: Tuple[str, str], instrument: str,
@@ -35,11 +33,14 @@ class Spread(NamedTupleMixin,
             self.time = parse_datetime(time)
 
     def __new__(cls, *args, **kwargs):
+        if len(args) > 4 or 'sp' in kwargs:
+            return super().__new__(cls, *args, **kwargs)
+
         fields = getattr(cls, '_fields')
-        new_kwargs = dict(tuple(zip(fields, args)))
-        new_kwargs.update(**kwargs)
+        new_kwargs = dict(zip(fields, args))
+        new_kwargs.update(kwargs)
 
-        if 'bid' in new_kwargs and 'ask' in new_kwargs and 'sp' not in new_kwargs:
+        if 'bid' in new_kwargs and 'ask' in new_kwargs:
             new_kwargs['sp'] = float(new_kwargs['ask']) - float(new_kwargs['bid'])
 
         return super().__new__(cls, **new_kwargs)
@@ -0,0 +1,99 @@
+import logging
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+
+from ocrutil import GlyphCache
+
+
+def unique_glyphs(glyphs: np.ndarray) -> np.ndarray:
+    """distinct glyphs of (n, height, width) in order of first appearance"""
+    if not len(glyphs):
+        return glyphs
+    _, index = np.unique(glyphs.reshape(len(glyphs), -1), axis=0, return_index=True)
+    return glyphs[np.sort(index)]
+
+
+def mask_columns(glyphs: np.ndarray, widths: np.ndarray) -> np.ndarray:
+    """glyphs blank from their widths on"""
+    return glyphs * (np.arange(glyphs.shape[2]) < np.asarray(widths)[:, np.newaxis])[:, np.newaxis, :]
+
+
+class TrainData:
+    """labelled glyphs as (n, height, width) uint8 with their chars and widths, saved as compressed .npz
+
+    The .npz replaces the pickle of {md5: (arr, char, width)}, which keeps float32 glyphs and md5 keys.
+    """
+    FILE = 'train.npz'
+
+    def __init__(self, x: np.ndarray, chars: np.ndarray, widths: np.ndarray):
+        self.x = np.asarray(x, dtype=np.uint8)
+        self.chars = np.asarray(chars, dtype='<U1')
+        self.widths = np.asarray(widths, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.x)
+
+    @classmethod
+    def empty(cls, height: int, width: int) -> 'TrainData':
+        return cls(np.zeros((0, height, width)), np.zeros(0), np.zeros(0))
+
+    @classmethod
+    def from_dict(cls, train_data: dict, height: int, width: int) -> 'TrainData':
+        """from the pickled {md5: (arr, char, width)}"""
+        if not train_data:
+            return cls.empty(height, width)
+        values = list(train_data.values())
+        return cls(np.array([np.reshape(arr, (height, width)) for arr, _, _ in values]),
+                   [c for _, c, _ in values], [w for _, _, w in values])
+
+    def to_dict(self) -> Dict[str, Tuple[np.ndarray, str, int]]:
+        """{md5: (arr, char, width)} of float32 glyphs, the keys of GlyphCache"""
+        train_data = {}
+        for arr, c, w in zip(self.x.astype(np.float32), self.chars, self.widths):
+            train_data[GlyphCache.key(arr)] = (arr, str(c), int(w))
+        return train_data
+
+    def merge(self, other: 'TrainData') -> 'TrainData':
+        """glyphs of both, labels of self first"""
+        x = np.concatenate((self.x, other.x))
+        _, index = np.unique(x.reshape(len(x), -1), axis=0, return_index=True)
+        index = np.sort(index)
+        return TrainData(x[index], np.concatenate((self.chars, other.chars))[index],
+                         np.concatenate((self.widths, other.widths))[index])
+
+    def label(self, glyphs: np.ndarray) -> Tuple['TrainData', np.ndarray]:
+        """(labelled, unlabelled) glyphs by the labelled glyphs of self
+
+        A glyph is labelled by an equal glyph or, widest first, by a glyph equal up to its width like the cache of
+        make_train_data. Every glyph is masked at once per distinct width instead of copied and hashed per edge.
+        """
+        glyphs = np.asarray(glyphs, dtype=np.uint8)
+        labels = {}  # type: Dict[bytes, Tuple[str, int]]
+        for arr, c, w in zip(mask_columns(self.x, self.widths), self.chars, self.widths):
+            labels.setdefault(arr.tobytes(), (c, w))
+        exact = {arr.tobytes(): (c, w) for arr, c, w in zip(self.x, self.chars, self.widths)}
+        found = [exact.get(arr.tobytes()) for arr in glyphs]
+        for w in sorted(set(self.widths.tolist()), reverse=True):
+            missing = [i for i, value in enumerate(found) if value is None]
+            if not missing:
+                break
+            masked = mask_columns(glyphs[missing], np.full(len(missing), w))
+            for i, arr in zip(missing, masked):
+                found[i] = labels.get(arr.tobytes())
+        index = [i for i, value in enumerate(found) if value is not None]
+        labelled = TrainData(glyphs[index], [found[i][0] for i in index], [found[i][1] for i in index])
+        return labelled, glyphs[[i for i, value in enumerate(found) if value is None]]
+
+    def save(self, file_path: str):
+        with open(file_path, 'wb') as f:
+            np.savez_compressed(f, x=self.x, chars=self.chars, widths=self.widths)
+        logging.info('{} glyphs saved to {}'.format(len(self), os.path.abspath(file_path)))
+
+    @classmethod
+    def load(cls, file_path: str) -> 'TrainData':
+        with np.load(file_path) as arrays:
+            data = cls(arrays['x'], arrays['chars'], arrays['widths'])
+        logging.info('{} glyphs loaded from {}'.format(len(data), os.path.abspath(file_path)))
+        return data
@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from ocrutil import GlyphCache
+
+from pyfxnode.charrecognizer import CharRecognizer
+from pyfxnode.traindata import TrainData, unique_glyphs
+
+# 3x3 bitmaps drawn 3 times larger into the boxes of 'test'
+FONT = {
+    '1': ['010', '010', '010'],
+    '2': ['110', '010', '011'],
+    '7': ['111', '001', '001'],
+    '0': ['111', '101', '111'],
+}
+
+
+def draw_png(file_path: str, texts):
+    gray = np.zeros((400, 1300), dtype=np.uint8)
+    for (left, top, _, _), text in zip(CharRecognizer.get_boxes('test')[0].values(), texts):
+        for i, c in enumerate(text):
+            bitmap = np.kron(np.array([[int(px) for px in row] for row in FONT[c]]), np.ones((3, 3))) * 255
+            gray[top + 2:top + 11, left + 2 + i * 12:left + 11 + i * 12] = bitmap
+    Image.fromarray(gray).save(file_path)
+
+
+def test_train_data(tmpdir):
+    x = np.zeros((3, 4, 4), dtype=np.uint8)
+    x[0, :, 0] = 255
+    x[1, :, 1:3] = 255
+    x[2, 0, :] = 255
+    data = TrainData(x, ['a', 'b', 'c'], [2, 3, 4])
+
+    # a glyph equal up to its width, e.g. touching the next one
+    touching = x[0].copy()
+    touching[:, 3] = 255
+    unknown = np.full((4, 4), 255, dtype=np.uint8)
+    labelled, unlabelled = data.label(np.array([x[2], touching, unknown, x[1]]))
+    assert labelled.chars.tolist() == ['c', 'a', 'b']
+    assert labelled.widths.tolist() == [4, 2, 3]
+    assert np.array_equal(unlabelled, [unknown])
+
+    merged = data.merge(TrainData(np.array([x[1], unknown]), ['z', 'd'], [1, 4]))
+    assert merged.chars.tolist() == ['a', 'b', 'c', 'd']
+
+    # the pickled dict of make_train_data
+    train_dict = merged.to_dict()
+    assert set(train_dict) == {GlyphCache.key(arr.astype(np.float32)) for arr in merged.x}
+    restored = TrainData.from_dict({k: (arr.flatten(), c, w) for k, (arr, c, w) in train_dict.items()}, 4, 4)
+    assert np.array_equal(restored.x, merged.x)
+
+    file_path = os.path.join(str(tmpdir), TrainData.FILE)
+    merged.save(file_path)
+    loaded = TrainData.load(file_path)
+    assert np.array_equal(loaded.x, merged.x)
+    assert loaded.chars.tolist() == merged.chars.tolist()
+    assert loaded.widths.tolist() == merged.widths.tolist()
+    assert len(unique_glyphs(np.concatenate((x, x)))) == 3
+
+
+def test_make_train_data_batch(tmpdir, monkeypatch):
+    monkeypatch.chdir(str(tmpdir))
+    draw_png('a.png', ['17', '21', '72'])
+    boxes = [box for box in CharRecognizer.get_boxes('test')[0].values()]
+    glyphs = CharRecognizer.png_glyphs('a.png', boxes)
+    assert glyphs.shape == (3, CharRecognizer.C_HEIGHT, CharRecognizer.C_WIDTH)
+    TrainData(glyphs, ['1', '7', '2'], [4, 10, 10]).save(CharRecognizer.TRAIN_NPZ)
+
+    for i in range(10):
+        draw_png('b{}.png'.format(i), ['1277'[i % 4:], '7' * (i % 3 + 1), '12'])
+    draw_png('c.png', ['10', '2', '7'])
+    unlabelled = CharRecognizer.make_train_data_batch('test', workers=2)
+    assert len(unlabelled) == 1
+
+    train_data = CharRecognizer.load_train_data()
+    assert sorted(train_data.chars.tolist()) == ['1', '2', '7']
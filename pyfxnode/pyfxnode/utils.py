@@ -4,7 +4,8 @@ from typing import Union, Any
 
 import msgpack
 import pytz
-from dateutil import parser
+
+import timeutil
 
 JST = pytz.timezone('Asia/Tokyo')
 
@@ -21,7 +22,8 @@ def jst_now_aware() -> datetime:
 
 def parse_datetime(dt: Union[str, datetime]) -> datetime:
     if isinstance(dt, str):
-        dt = parser.parse(dt)
+        # cached, by regex for the formats we produce
+        dt = timeutil.parse_datetime(dt)
     assert isinstance(dt, datetime), 'dt is {}, must be (str, datetime)'.format(dt)
     if not dt.tzinfo:
         dt = pytz.utc.localize(dt)
@@ -41,12 +43,21 @@ class NamedTupleMixin:
     def _get_defaults(cls) -> dict:
         return {}
 
+    @classmethod
+    def _defaults(cls) -> tuple:
+        """_get_defaults() items, computed once per class"""
+        defaults = cls.__dict__.get('_defaults_cache')
+        if defaults is None:
+            defaults = tuple(cls._get_defaults().items())
+            setattr(cls, '_defaults_cache', defaults)
+        return defaults
+
     def __new__(cls, *args, **kwargs):
         fields = getattr(cls, '_fields')
-        new_kwargs = dict(tuple(zip(fields, args)))
-        new_kwargs.update(**kwargs)
+        new_kwargs = dict(zip(fields, args))
+        new_kwargs.update(kwargs)
 
-        for k, (default, converter) in cls._get_defaults().items():
+        for k, (default, converter) in cls._defaults():
             if k not in new_kwargs:
                 if default is not None:
                     if callable(default):
@@ -58,6 +69,11 @@ class NamedTupleMixin:
 
         return getattr(super(), '__new__')(cls, **new_kwargs)
 
+    @classmethod
+    def make(cls, iterable):
+        """trusted construction from already typed values such as unpacked wire data, skips converters"""
+        return getattr(cls, '_make')(iterable)
+
     def replace(self, **kwargs):
         return getattr(self, '_replace')(**kwargs)
 
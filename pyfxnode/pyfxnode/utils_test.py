@@ -1,4 +1,14 @@
-from .utils import utc_now_aware, pack_to_bytes, unpack_from_bytes, get_packer, get_unpacker
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from dateutil import parser
+
+from .account import Account
+from .price import Price
+from .spread import Spread
+from .utils import utc_now_aware, pack_to_bytes, unpack_from_bytes, get_packer, get_unpacker, parse_datetime, \
+    datetime_str
 
 
 def test_pack_unpack():
@@ -29,3 +39,43 @@ def test_packer_unpacker():
     unpacker.feed(packed)
     unpacked = next(unpacker)
     assert unpacked == data
+
+
+def test_parse_datetime():
+    dt = pytz.utc.localize(datetime(2016, 10, 21, 20, 0, 0, 123456))
+    assert parse_datetime(datetime_str(dt)) == dt
+    assert parse_datetime('2016-10-21 20:00:00.123456') == dt
+    assert parse_datetime('2016-10-22 05:00:00.123456+09:00') == dt
+    assert parse_datetime('20161022T050000+0900') == dt.replace(microsecond=0)
+    assert parse_datetime('2016-10-21T20:00:00.1Z') == dt.replace(microsecond=100000)
+    # fallback to dateutil
+    assert parse_datetime('Oct 21 2016 20:00:00') == dt.replace(microsecond=0)
+    assert parse_datetime(dt) is dt
+
+
+def test_parse_datetime_benchmark():
+    N = 10000
+    now = utc_now_aware()
+    times = [datetime_str(now + timedelta(microseconds=i)) for i in range(N)]
+    targets = [
+        ('parse_datetime', lambda t: parse_datetime(t)),
+        ('Price', lambda t: Price('X', 'USD/JPY', 100, 101, t)),
+        ('Account', lambda t: Account('X', time=t)),
+        ('Spread', lambda t: Spread(('A', 'B'), 'USD/JPY', 100, 101, time=t)),
+        ('unpack_from_bytes', lambda t: unpack_from_bytes(pack_to_bytes(parse_datetime(t)))),
+    ]
+
+    def bench(f, values):
+        start = time.perf_counter()
+        for v in values:
+            f(v)
+        return (time.perf_counter() - start) / len(values)
+
+    dateutil_elapsed = bench(parser.parse, times)
+    print('#', 'dateutil', '1:', dateutil_elapsed)
+    for name, f in targets:
+        # distinct strings miss the lru cache, repeated ones hit it
+        miss = bench(f, times)
+        hit = bench(f, times[:1] * N)
+        print('#', name, 'miss 1:', miss, 'hit 1:', hit)
+    assert [parse_datetime(t) for t in times] == [parser.parse(t) for t in times]
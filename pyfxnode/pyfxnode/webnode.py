@@ -1,29 +1,117 @@
 import logging
-from typing import Tuple, Iterable
-
-import pychrome
+import re
+import threading
+import time
+from typing import Tuple, Iterable, Callable, List
 
 from .datanode import DataNode
-from .proxyserver import ProxyServer, ProxyHandler
+from .dispatcher import ProxyDispatcher, ProxyResponse
+from .poller import HTTPPoller
+from .proxyserver import ProxyHandler
+from .websocketrouter import WebSocketRouter
 
 
 class WebNode(ProxyHandler, DataNode):
     def __init__(self, name: str, address: Tuple[str, int], *,
                  proxy_address: Tuple[str, int] = None,
                  chrome_address: Tuple[str, int] = None,
-                 hub_addresses: Iterable[Tuple[str, int]]):
+                 hub_addresses: Iterable[Tuple[str, int]],
+                 dispatch: bool = False,
+                 capture: bool = False,
+                 poll: bool = False):
+        """capture: feed responses from chrome's Network domain, which needs no proxy_address
+        poll: replay the browser's requests of POLL_INTERVALS at their own rates, learned by the proxy or the capture
+        """
+        # stops the threads of watch_chrome
+        self._stop_event = threading.Event()
+        self._watch_threads = []  # type: List[threading.Thread]
+        # pychrome and mitmproxy are imported only when their servers are used
+        self.chrome = None  # type: pychrome.Driver
+        if chrome_address:
+            import pychrome
+            self.chrome = pychrome.Driver(address=chrome_address,
+                                          logger=logging.getLogger(
+                                              '{}.{}.chrome'.format(self.__class__.__name__, name)))
+        self.websocket_router = None  # type: WebSocketRouter
+        if self.WEBSOCKET_DECODERS:
+            self.websocket_router = WebSocketRouter(self.WEBSOCKET_DECODERS, self.push_data, logger=logging.getLogger(
+                '{}.{}.websocket'.format(self.__class__.__name__, name)))
         servers = {}
+        poller = None
+        if poll and self.POLL_INTERVALS:
+            assert proxy_address or (capture and self.chrome), 'poll learns requests from the proxy or the capture'
+            poller = servers['poll'] = HTTPPoller(self, logger=logging.getLogger(
+                '{}.{}.poll'.format(self.__class__.__name__, name)))
+        if capture and self.chrome:
+            from .chromefeed import ChromeFeed
+            servers['capture'] = ChromeFeed(self.chrome, self, poller=poller, logger=logging.getLogger(
+                '{}.{}.capture'.format(self.__class__.__name__, name)))
         if proxy_address:
+            from .proxyserver import ProxyServer
+            dispatcher = None
+            if dispatch:
+                dispatcher = ProxyDispatcher(self.parse_dispatched_response, self.push_data, self.DISPATCH_URLS,
+                                             logger=logging.getLogger(
+                                                 '{}.{}.dispatcher'.format(self.__class__.__name__, name)))
             servers['proxy'] = ProxyServer(proxy_address, self,
                                            logger=logging.getLogger(
-                                               '{}.{}.proxy'.format(self.__class__.__name__, name)))
+                                               '{}.{}.proxy'.format(self.__class__.__name__, name)),
+                                           dispatcher=dispatcher,
+                                           websocket_router=self.websocket_router,
+                                           poller=poller)
         super().__init__(name, address, hub_addresses=hub_addresses, servers=servers)
 
-        self.chrome = None  # type: pychrome.Driver
-        if chrome_address:
-            self.chrome = pychrome.Driver(address=chrome_address,
-                                          logger=logging.getLogger(
-                                              '{}.{}.chrome'.format(self.__class__.__name__, name)))
+    @staticmethod
+    def stamps(received_at: float) -> dict:
+        """latency stamps of data parsed from a response received at received_at"""
+        return {'received': received_at, 'parsed': time.time()}
+
+    def watch_chrome(self, url: str, css_selector: str, callback: Callable[[str], None], *,
+                     frame_key: tuple = None, interval: float = 5.0):
+        """subscribe css_selector of every chrome page under url in a thread
+
+        callback(outer_html) is called on DOM mutation events, interval is only for finding new pages. The thread
+        runs until stop().
+        """
+        if not self.chrome:
+            self.warning('no chrome driver')
+            return
+
+        def run():
+            subscribed = set()
+            while not self._stop_event.is_set():
+                try:
+                    subscribed = {conn for conn in subscribed if conn.is_connected()}
+                    for conn in self.chrome.connections(re.escape(url)):
+                        if conn not in subscribed:
+                            self.info('subscribe {} {}'.format(url, css_selector))
+                            conn.subscribe(css_selector, callback, frame_key=frame_key)
+                            subscribed.add(conn)
+                except Exception as e:
+                    self.exception(str(e))
+                self._stop_event.wait(interval)
+
+        thread = threading.Thread(target=run, name='{}.watch_chrome'.format(self.logger.name), daemon=True)
+        self._watch_threads.append(thread)
+        thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+        super().stop(timeout)
+
+    def join(self, timeout: float = None):
+        super().join(timeout)
+        for thread in self._watch_threads:
+            thread.join(timeout)
+
+    def handle_dispatched_response(self, response: ProxyResponse):
+        data = self.parse_dispatched_response(response)
+        if data:
+            self.push_data(**data)
+
+    def handle_websocket_frame(self, url: str, payload: bytes, received_at: float):
+        if self.websocket_router:
+            self.websocket_router.on_message(url, url, payload, received_at)
 
     def refresh(self):
         pass
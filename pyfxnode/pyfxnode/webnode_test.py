@@ -1,6 +1,9 @@
 import threading
+import time
 from queue import Queue
 
+from pychrome.test_utils import FakeCDPServer
+
 from pyfxnode.datanode import DataNode
 from pyfxnode.price import Price
 from pyfxnode.utils import unpack_from_bytes
@@ -37,8 +40,8 @@ def test_web_node():
     prices = {'X': {'USD/JPY': price}}
     c.push_data(prices=prices)
     data = q.get(timeout=1)
-    assert len(data) == 1
-    assert 'prices' in data
+    assert set(data) == {'prices', 'stamps'}
+    assert set(data['stamps']) == {'sent'}
     assert 'X' in data['prices']
     assert 'USD/JPY' in data['prices']['X']
     assert Price(*data['prices']['X']['USD/JPY']) == price
@@ -50,3 +53,18 @@ def test_web_node():
     c.join()
     s.join()
     print(threading.enumerate())
+
+
+def test_watch_chrome_stops():
+    server = FakeCDPServer(lambda method, params: {}, targets=[{'id': 'A', 'type': 'page', 'url': 'https://broker/'}])
+    node = WebNode('data1', ('127.0.0.1', 0), chrome_address=server.address, hub_addresses=[('127.0.0.1', 0)])
+    node.start()
+    try:
+        node.watch_chrome('https://broker/', 'table', print, interval=0.01)
+        time.sleep(0.05)
+        assert all(thread.is_alive() for thread in node._watch_threads)
+        node.stop()
+        node.join(1)
+        assert not any(thread.is_alive() for thread in node._watch_threads)
+    finally:
+        server.close()
@@ -0,0 +1,94 @@
+import logging
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterator, Tuple, Union
+
+from .framedecoder import FrameDecoder, iter_fxc_prices, loads
+from .loggermixin import LoggerMixin
+from .price import Price
+
+
+class WebSocketDecoder(ABC):
+    """per-flow decoder of websocket messages into (instrument, bid, ask)
+
+    One instance lives as long as its flow, so state of frames fragmented over messages stays with it.
+    COMPRESSED payloads are raw deflate streams sharing one window over the flow.
+    """
+    COMPRESSED = False
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflater = zlib.decompressobj(-zlib.MAX_WBITS) if self.COMPRESSED else None
+
+    def feed(self, payload: memoryview) -> Iterator[Tuple[str, float, float]]:
+        if self._inflater:
+            payload = memoryview(self._inflater.decompress(payload))
+        return self.decode(payload)
+
+    @abstractmethod
+    def decode(self, payload: memoryview) -> Iterator[Tuple[str, float, float]]:
+        pass
+
+
+class FxcPushDecoder(WebSocketDecoder):
+    """fxcbroadcast push frames delimited by ';;', which may be split over messages"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._frames = FrameDecoder(b';;')
+
+    def decode(self, payload: memoryview) -> Iterator[Tuple[str, float, float]]:
+        for frame in self._frames.feed(payload):
+            if frame:
+                yield from iter_fxc_prices(loads(frame))
+
+
+class WebSocketRouter(LoggerMixin):
+    """route websocket messages by url prefix to per-flow decoders and push the ticks of each message at once
+
+    decoders: {url_prefix: (name, factory)}, factory(name) makes the decoder of a new flow and prices are pushed
+    under name. Messages are passed to decoders as memoryview, which loads() reads in place with orjson. Decoders of
+    frames split over messages, e.g. FrameDecoder, copy each frame out of their buffer.
+    """
+
+    def __init__(self, decoders: Dict[str, Tuple[str, Callable[[str], WebSocketDecoder]]],
+                 push_data: Callable[..., None], *, logger: logging.Logger = None):
+        super().__init__(logger=logger)
+        self._routes = tuple(decoders.items())
+        self._push_data = push_data
+        self._flows = {}  # type: Dict[str, WebSocketDecoder]
+        self.messages = 0
+        self.ticks = 0
+
+    def _decoder(self, flow_key: str, url: str) -> WebSocketDecoder:
+        decoder = self._flows.get(flow_key)
+        if decoder is None:
+            for prefix, (name, factory) in self._routes:
+                if url.startswith(prefix):
+                    decoder = self._flows[flow_key] = factory(name)
+                    break
+        return decoder
+
+    def on_message(self, flow_key: str, url: str, content: Union[bytes, bytearray, memoryview],
+                   received_at: float = None) -> bool:
+        """return False if url has no route"""
+        received_at = received_at or time.time()
+        decoder = self._decoder(flow_key, url)
+        if decoder is None:
+            return False
+        self.messages += 1
+        prices = {}
+        try:
+            for instrument, bid, ask in decoder.feed(memoryview(content)):
+                prices[instrument] = Price(decoder.name, instrument, bid, ask)
+        except Exception as e:
+            self.exception('{} {}'.format(url, str(e)))
+        if prices:
+            self.ticks += len(prices)
+            self._push_data(prices={decoder.name: prices},
+                            stamps={'received': received_at, 'parsed': time.time()})
+        return True
+
+    def close(self, flow_key: str):
+        self._flows.pop(flow_key, None)
@@ -0,0 +1,54 @@
+import json
+import zlib
+
+import pytest
+
+from pyfxnode.websocketrouter import WebSocketRouter, FxcPushDecoder, WebSocketDecoder
+
+
+class CompressedFxcPushDecoder(FxcPushDecoder):
+    COMPRESSED = True
+
+
+def fxc_frame(instrument: str, bid: str, ask: str) -> bytes:
+    price_data = {'currencyPair': instrument, 'bid': {'price': bid}, 'ask': {'price': ask}}
+    return json.dumps({'priceList': [{'priceData': price_data}]}).encode() + b';;'
+
+
+def test_websocket_router():
+    pushed = []
+    router = WebSocketRouter({'wss://a/': ('a', FxcPushDecoder), 'wss://z/': ('z', CompressedFxcPushDecoder)},
+                             lambda **data: pushed.append(data))
+    assert not router.on_message('1', 'wss://other/', b'')
+
+    # frames split over messages, per flow
+    frames = fxc_frame('USD/JPY', '100.0', '100.1') + fxc_frame('EUR/JPY', '120.0', '120.1')
+    assert router.on_message('1', 'wss://a/', frames[:10], 1.0)
+    assert not pushed
+    assert router.on_message('2', 'wss://a/', frames[:-3], 2.0)
+    assert set(pushed[0]['prices']['a']) == {'USD/JPY'}
+    assert router.on_message('1', 'wss://a/', frames[10:], 3.0)
+    assert set(pushed[1]['prices']['a']) == {'USD/JPY', 'EUR/JPY'}
+    assert pushed[1]['prices']['a']['EUR/JPY'].ask == 120.1
+    assert pushed[1]['stamps']['received'] == 3.0
+    router.on_message('2', 'wss://a/', frames[-3:])
+    assert set(pushed[2]['prices']['a']) == {'EUR/JPY'}
+    router.close('2')
+
+    # one deflate stream over the flow
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    for bid in ('1.10', '1.20'):
+        payload = compressor.compress(fxc_frame('EUR/USD', bid, '1.30')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        router.on_message('3', 'wss://z/', payload)
+        assert pushed[-1]['prices']['z']['EUR/USD'].bid == float(bid)
+
+    # a broken frame is logged and the flow goes on
+    router.on_message('1', 'wss://a/', b'{;;')
+    router.on_message('1', 'wss://a/', fxc_frame('USD/JPY', '101.0', '101.1'))
+    assert pushed[-1]['prices']['a']['USD/JPY'].bid == 101.0
+    assert router.messages == 8
+
+
+def test_websocket_decoder_is_abstract():
+    with pytest.raises(TypeError):
+        WebSocketDecoder('a')
@@ -29,9 +29,10 @@ if __name__ == '__main__':
               'numpy',
               'pillow', 'pyautogui', 'python-dateutil', 'pytz', 'pyyaml',
               'socketpool',
-              'tensorflow',
+              'ocrutil', 'tensorflow', 'timeutil',
           ],
           extras_require={
               'posix': ['ewmh'],
+              'json': ['orjson'],
           },
           )
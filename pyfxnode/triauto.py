@@ -1,17 +1,17 @@
-import json
 import logging
 import re
 import sys
-import threading
 import time
 from collections import defaultdict
+from typing import Optional
 
 import lxml.html
-import pychrome
 from docopt import docopt
 from mitmproxy.http import HTTPFlow
 
 from pyfxnode.account import Account
+from pyfxnode.dispatcher import ProxyResponse
+from pyfxnode.framedecoder import loads
 from pyfxnode.price import Price
 from pyfxnode.utils import jst_now_aware
 from pyfxnode.webnode import WebNode
@@ -22,6 +22,8 @@ class Triauto(WebNode):
     ACCOUNT_URL = 'https://triauto.invast.jp/TriAuto/user/api/getContainerAccountInfo.do'
     RATE_URL = 'https://triauto.invast.jp/TriAuto/user/api/getHomeRateMap.do'
     INDEX_URL = 'https://triauto.invast.jp/TriAuto/user/index.do'
+    DISPATCH_URLS = (RATE_URL,)
+    CAPTURE_URLS = (ACCOUNT_URL,)
 
     accounts = {
         NAME: Account(NAME),
@@ -30,33 +32,9 @@ class Triauto(WebNode):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        threading.Thread(target=lambda: self.poll_chrome(5.0), daemon=True).start()
-
-    def poll_chrome(self, interval: float):
-        if not self.chrome:
-            self.warning('no chrome driver')
-            return
-        while True:
-            try:
-                for conn in self.chrome.connections(re.escape(self.INDEX_URL)):
-                    self.on_account(conn)
-            except Exception as e:
-                self.exception(str(e))
-            time.sleep(interval)
-
-    def on_account(self, conn: pychrome.Connection):
-        key = ('id', 'triautocontent')
-        node_id = conn.frame_ids.get(key)
-        if not node_id:
-            self.logger.warn('#no key={}'.format(key))
-            conn.get_html_all('frame,iframe')
-            time.sleep(3)
-            return
-
-        # if stop_loading:
-        #    print('#', conn.command('Page.stopLoading'))
-
-        html = conn.get_html(css_selector='table table', node_id=node_id)
+        self.watch_chrome(self.INDEX_URL, 'table table', self.on_account, frame_key=('id', 'triautocontent'))
+
+    def on_account(self, html: str):
         dom = lxml.html.fromstring(html)
         text = dom.text_content()
         text = re.sub('\s+', ' ', text).replace(',', '')
@@ -103,16 +81,31 @@ class Triauto(WebNode):
             if req.pretty_url.startswith(self.RATE_URL):
                 data = self.parse_prices(res.text)
                 if data:
-                    self.push_data(**data)
+                    self.push_data(stamps=self.stamps(res.timestamp_end), **data)
             elif req.pretty_url.startswith(self.ACCOUNT_URL):
                 data = self.parse_account(res.text)
                 if data:
                     self.push_data(**data)
 
+    def handle_dispatched_response(self, response: ProxyResponse):
+        if response.method == 'GET' and response.url.startswith(self.ACCOUNT_URL):
+            data = self.parse_account(response.text)
+            if data:
+                self.push_data(**data)
+        else:
+            super().handle_dispatched_response(response)
+
+    def parse_dispatched_response(self, response: ProxyResponse) -> Optional[dict]:
+        if response.method == 'GET' and response.url.startswith(self.RATE_URL):
+            data = self.parse_prices(response.text)
+            if data:
+                return dict(stamps=self.stamps(response.received_at), **data)
+        return None
+
     def parse_prices(self, content: str):
         prices = {}
         now = jst_now_aware()
-        for k, v in json.loads(content)['rateMap'].items():
+        for k, v in loads(content)['rateMap'].items():
             instrument = '{}/{}'.format(k[:3], k[-3:])
             bid, ask = float(v['bid']), float(v['ask'])
             price = Price(self.NAME, instrument=instrument, time=now, bid=bid, ask=ask)
@@ -121,7 +114,7 @@ class Triauto(WebNode):
 
     def parse_account(self, content: str):
         print('content={}'.format(content))
-        body = json.loads(content)
+        body = loads(content)
         info = body['accountInfo']
         equity = float(info['equity'])
         used_margin = float(info['position_margin'])
@@ -150,6 +143,8 @@ def main():
           --proxy IP_PORT  [default: 127.0.0.1:8081]
           --chrome IP_PORT  [default: 127.0.0.1:11001]
           --hub IP_PORT  [default: 127.0.0.1:10000]
+          --dispatch  parse rates in a worker process
+          --capture  capture rates from chrome's Network domain without the proxy
         """.format(f=sys.argv[0]))
 
     l = args['--bind'].split(':')
@@ -165,9 +160,11 @@ def main():
                      args['--hub'].split(',')]
 
     node = Triauto(Triauto.NAME, address,
-                   proxy_address=proxy_address,
+                   proxy_address=None if args['--capture'] else proxy_address,
                    chrome_address=chrome_address,
-                   hub_addresses=hub_addresses)
+                   hub_addresses=hub_addresses,
+                   dispatch=args['--dispatch'],
+                   capture=args['--capture'])
     try:
         node.start()
         while node.is_running():
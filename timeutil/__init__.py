@@ -1,5 +1,5 @@
 from .timeutil import TOKYO, UTC, NY, LONDON
-from .timeutil import to_datetime
+from .timeutil import to_datetime, parse_datetime
 from .timeutil import utc_now, jst_now
 
-__all__ = ['TOKYO', 'NY', 'LONDON', 'to_datetime', 'utc_now', 'jst_now']
\ No newline at end of file
+__all__ = ['TOKYO', 'NY', 'LONDON', 'to_datetime', 'parse_datetime', 'utc_now', 'jst_now']
\ No newline at end of file
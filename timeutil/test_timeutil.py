@@ -0,0 +1,40 @@
+import time
+from datetime import datetime, timedelta
+
+from dateutil import parser
+
+from .timeutil import TOKYO, UTC, to_datetime
+
+
+def test_to_datetime():
+    dt = UTC.localize(datetime(2016, 10, 21, 20, 0, 0, 123456))
+    assert to_datetime('2016-10-21T20:00:00.123456Z') == dt
+    assert to_datetime('2016-10-21 20:00:00.123456') == dt
+    assert to_datetime('2016-10-22 05:00:00.123456+09:00') == dt
+    assert to_datetime('20161022T050000+0900') == dt.replace(microsecond=0)
+    # fallback to dateutil
+    assert to_datetime('Oct 21 2016 20:00:00') == dt.replace(microsecond=0)
+
+
+def test_to_datetime_benchmark():
+    N = 10000
+    now = datetime(2016, 10, 22, 5)
+    call_sites = [
+        # mysql DATETIME(6) converter
+        ('mysql', [(now + timedelta(microseconds=i)).strftime('%Y-%m-%d %H:%M:%S.%f') for i in range(N)]),
+        # arbcheck/arbfilter csv
+        ('csv', [str(TOKYO.localize(now + timedelta(microseconds=i))) for i in range(N)]),
+        ('basic', [(now + timedelta(seconds=i)).strftime('%Y%m%dT%H%M%S+0900') for i in range(N)]),
+    ]
+
+    def bench(f, values):
+        start = time.perf_counter()
+        for v in values:
+            f(v)
+        return (time.perf_counter() - start) / len(values)
+
+    for name, values in call_sites:
+        dateutil_elapsed = bench(parser.parse, values)
+        elapsed = bench(to_datetime, values)
+        print('#', name, 'dateutil 1:', dateutil_elapsed, 'to_datetime 1:', elapsed)
+        assert [to_datetime(v) for v in values[:100]] == [to_datetime(parser.parse(v)) for v in values[:100]]
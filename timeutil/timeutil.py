@@ -1,5 +1,7 @@
+import re
 from datetime import datetime, date
-from typing import Union
+from functools import lru_cache
+from typing import Union, Optional
 
 from dateutil import parser
 from dateutil.relativedelta import relativedelta
@@ -11,10 +13,35 @@ LONDON = pytz.timezone('Europe/London')
 TOKYO = pytz.timezone('Asia/Tokyo')
 UTC = pytz.timezone('UTC')
 
+# formats we produce: 2016-10-22T05:00:00.000000Z, 2016-10-22 05:00:00.000000(+09:00), 20161022T050000+0900
+_DATETIME_RE = re.compile(r'(\d{4})-?(\d\d)-?(\d\d)[T ](\d\d):?(\d\d):?(\d\d)(?:\.(\d{1,6}))?'
+                          r'(?:(Z)|([+-])(\d\d):?(\d\d))?$')
+
+
+def _fast_parse(s: str) -> Optional[datetime]:
+    m = _DATETIME_RE.match(s)
+    if not m:
+        return None
+    year, month, day, hour, minute, second, fraction, z, sign, tz_hour, tz_minute = m.groups()
+    tzinfo = None
+    if z:
+        tzinfo = UTC
+    elif sign:
+        offset = int(tz_hour) * 60 + int(tz_minute)
+        tzinfo = pytz.FixedOffset(-offset if sign == '-' else offset)
+    return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second),
+                    int(fraction.ljust(6, '0')) if fraction else 0, tzinfo)
+
+
+@lru_cache(maxsize=4096)
+def parse_datetime(s: str) -> datetime:
+    """parse s by regex for the formats we produce and by dateutil for others"""
+    return _fast_parse(s) or parser.parse(s)
+
 
 def to_datetime(obj: Union[str, datetime, date]) -> datetime:
     if isinstance(obj, str):
-        dt = parser.parse(obj)
+        dt = parse_datetime(obj)
     elif isinstance(obj, datetime):
         dt = obj
     elif isinstance(obj, date):